@@ -31,6 +31,32 @@ class BaseConfig:
                                  default=Path(__file__).parents[
                                              2].__str__() + "/assets/saved_models/")
 
+        self.parser.add_argument("--checkpoint_path", type=str,
+                                 default=Path(__file__).parents[2].__str__() +
+                                 "/assets/saved_models/english/version_1/checkpoints/"
+                                 "QTag-epoch=00-val_loss=1.85.ckpt",
+                                 help="fp32 Classifier checkpoint used for inference")
+        self.parser.add_argument("--quantize", action="store_true",
+                                 help="run inference with dynamic int8 quantized linear layers "
+                                      "(cpu only)")
+        self.parser.add_argument("--quantized_model_path", type=str,
+                                 default=Path(__file__).parents[2].__str__() +
+                                 "/assets/saved_models/quantized_model.pt",
+                                 help="quantized model artifact, created from checkpoint_path "
+                                      "when it does not exist")
+
+        self.parser.add_argument("--export_format", type=str, default="torchscript",
+                                 choices=["torchscript", "onnx", "safetensors"],
+                                 help="graph format (or weights only safetensors) created by "
+                                      "export_runner")
+        self.parser.add_argument("--exported_model_path", type=str, default="",
+                                 help="exported graph, when it is set inference_runner runs it "
+                                      "instead of the checkpoint")
+
+        self.parser.add_argument("--weights_path", type=str, default="",
+                                 help="weights only (safetensors) model, when it is set "
+                                      "inference_runner loads it instead of the checkpoint")
+
         self.parser.add_argument("--language_model_path", type=str,
                                  default=Path(__file__).parents[4].__str__()
                                          + "/LanguageModels/t5_en_large")
@@ -38,18 +64,62 @@ class BaseConfig:
                                  default=Path(__file__).parents[4].__str__()
                                          + "/LanguageModels/t5_en_large")
 
+        self.parser.add_argument("--fast_tokenizer", action="store_true",
+                                 help="use the Rust backed tokenizer and batched tokenization")
+
+        self.parser.add_argument("--subword_cache_size", type=int, default=100000,
+                                 help="number of words kept in word to sub_tokens cache "
+                                      "(0 disables it)")
+        self.parser.add_argument("--persist_subword_cache", action="store_true",
+                                 help="load/save word to sub_tokens cache next to tokenizer files")
+
         self.parser.add_argument("--csv_logger_path", type=str,
                                  default=Path(__file__).parents[2].__str__() + "/assets")
 
+        self.parser.add_argument("--cache_dir", type=str,
+                                 default=Path(__file__).parents[2].__str__() + "/assets/cache/",
+                                 help="directory of memory mapped tokenized data shards")
+        self.parser.add_argument("--disable_cache", action="store_true",
+                                 help="always re-run preprocessing and ignore cached shards")
+
+        self.parser.add_argument("--device", type=str, default="cpu",
+                                 help="device to train and run the model on: cpu, cuda or cuda:N")
+        self.parser.add_argument("--precision", type=str, default="32", choices=["32", "bf16"],
+                                 help="train and run the model in fp32 or in bfloat16 autocast")
+        self.parser.add_argument("--num_threads", type=int, default=0,
+                                 help="number of torch intra-op threads (0: torch default or one "
+                                      "per pinned core)")
+        self.parser.add_argument("--num_interop_threads", type=int, default=0,
+                                 help="number of torch inter-op threads (0: torch default)")
+        self.parser.add_argument("--cpu_cores", type=int, nargs="*", default=None,
+                                 help="pin the process to these cpu core ids, so several "
+                                      "instances can share one node")
+
         self.parser.add_argument("--train_data", type=str, default="EN-English/en_train.conll")
         self.parser.add_argument("--test_data", type=str, default="test_data.csv")
         self.parser.add_argument("--dev_data", type=str, default="EN-English/en_dev.conll")
 
+        self.parser.add_argument("--languages", type=str, nargs="*", default=None,
+                                 help="language directories of processed_data_dir to preprocess "
+                                      "(default: all of them)")
+        self.parser.add_argument("--n_train_samples", type=int, default=100,
+                                 help="only use the first n train sentences (0 uses all)")
+        self.parser.add_argument("--preprocess_workers", type=int, default=0,
+                                 help="number of tokenization processes (0 uses all cores)")
+
         self.parser.add_argument("--save_top_k", type=int, default=1, help="...")
 
         self.parser.add_argument("--num_workers", type=int,
                                  default=10,
-                                 help="...")
+                                 help="number of DataLoader worker processes")
+        self.parser.add_argument("--persistent_workers", action=argparse.BooleanOptionalAction,
+                                 default=True,
+                                 help="keep DataLoader workers alive between epochs")
+        self.parser.add_argument("--pin_memory", action=argparse.BooleanOptionalAction,
+                                 default=False,
+                                 help="copy batches into pinned memory (for cuda devices)")
+        self.parser.add_argument("--prefetch_factor", type=int, default=2,
+                                 help="number of batches loaded in advance by each worker")
 
         self.parser.add_argument("--n_epochs", type=int,
                                  default=1,
@@ -59,10 +129,64 @@ class BaseConfig:
                                  default=32,
                                  help="...")
 
+        self.parser.add_argument("--max_tokens", type=int, default=0,
+                                 help="maximum (padded) tokens per batch, replaces batch_size "
+                                      "when it is set (0 disables it)")
+
+        self.parser.add_argument("--padding", type=str, default="dynamic",
+                                 choices=["dynamic", "fixed", "packed"],
+                                 help="pad batches to their longest sample (with length bucketing), "
+                                      "every sample to the longest train sentence or pack train "
+                                      "samples into sequences of the longest train sentence")
+
+        self.parser.add_argument("--attention_impl", type=str, default="sdpa",
+                                 choices=["sdpa", "reference"],
+                                 help="fused scaled_dot_product_attention or the explicit "
+                                      "attention matrix in the head encoder layer")
+
         self.parser.add_argument("--dropout", type=float,
                                  default=0.15,
                                  help="...")
 
+        self.parser.add_argument("--gradient_checkpointing", action="store_true",
+                                 help="recompute T5 block and head encoder activations in "
+                                      "backward to save memory")
+        self.parser.add_argument("--lora_rank", type=int, default=0,
+                                 help="train low rank adapters of this rank on a frozen T5 "
+                                      "(0 fine-tunes the whole model)")
+        self.parser.add_argument("--lora_alpha", type=float, default=16,
+                                 help="scale of low rank updates is lora_alpha / lora_rank")
+        self.parser.add_argument("--lora_dropout", type=float, default=0.05,
+                                 help="dropout on the input of low rank updates")
+        self.parser.add_argument("--lora_targets", type=str, nargs="*",
+                                 default=["q", "k", "v", "o", "wi", "wi_0", "wi_1", "wo"],
+                                 help="names of T5 attention and feed forward projections "
+                                      "with adapters")
+        self.parser.add_argument("--adapter_paths", type=str, nargs="*", default=None,
+                                 help="per language adapters (see save_adapter), when it is "
+                                      "set inference_runner loads them over one T5 and "
+                                      "activates the adapter of model_name")
+        self.parser.add_argument("--teacher_checkpoint_path", type=str, default="",
+                                 help="trained Classifier checkpoint used as teacher by "
+                                      "distillation_trainer")
+        self.parser.add_argument("--distillation_alpha", type=float, default=0.5,
+                                 help="weight of the teacher KL loss, the cross entropy loss has "
+                                      "weight 1 - distillation_alpha")
+        self.parser.add_argument("--distillation_temperature", type=float, default=2.0,
+                                 help="softmax temperature of teacher and student logits")
+        self.parser.add_argument("--cache_teacher_logits", action="store_true",
+                                 help="run the teacher once over train data and reuse its "
+                                      "logits from cache_dir instead of running it every step")
+        self.parser.add_argument("--feature_cache", action="store_true",
+                                 help="freeze T5, run it once over train/val data, cache its "
+                                      "outputs in cache_dir and train only the head on them")
+        self.parser.add_argument("--optimizer", type=str, default="adamw",
+                                 choices=["adamw", "adafactor"],
+                                 help="adafactor keeps factored second moments (less memory)")
+        self.parser.add_argument("--log_peak_memory", action="store_true",
+                                 help="log peak memory of every train step (resident "
+                                      "memory change of the step on cpu)")
+
         self.parser.add_argument("--lr", default=2e-5,
                                  help="...")
 
@@ -2,5 +2,5 @@
     Complex NER Project:
         Make the importing much shorter
 """
-from .data_reader import read_text
+from .data_reader import read_text, read_text_lines, read_json
 from .data_writer import write_pickle, write_json, write_text
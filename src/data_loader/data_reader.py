@@ -5,11 +5,18 @@ This module is written to read function for read different file types.
 """
 
 # ============================ Third Party libs ============================
+import gzip
+import io
+import json
 import pickle
-
+from typing import Iterator
 
 # ==========================================================================
 
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
 def read_text(path: str) -> list:
     """
     function to read .txt file
@@ -25,3 +32,60 @@ def read_text(path: str) -> list:
     with open(path, "r", encoding="utf8") as file:
         data = file.readlines()
     return data
+
+
+def read_json(path: str) -> dict:
+    """
+    function to read .json file
+
+    Args:
+        path: path of .json file
+
+    Returns:
+        .json data
+
+    """
+
+    with open(path, "r", encoding="utf8") as file:
+        data = json.load(file)
+    return data
+
+
+def _open_text(path: str):
+    """
+    function to open plain, gzip or zstd compressed text file based on its magic bytes
+
+    Args:
+        path: path of text file
+
+    Returns:
+        text file object
+
+    """
+    with open(path, "rb") as file:
+        magic = file.read(4)
+
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rt", encoding="utf8")
+    if magic.startswith(ZSTD_MAGIC):
+        import zstandard  # optional dependency, only needed for .zst corpora
+        binary_file = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(
+            binary_file, closefd=True), encoding="utf8")
+    return open(path, "r", encoding="utf8")
+
+
+def read_text_lines(path: str) -> Iterator[str]:
+    """
+    function to lazily read lines of a (optionally gzip/zstd compressed) text file
+
+    Args:
+        path: path of text file
+
+    Returns:
+        generator over lines of the file
+
+    """
+    with _open_text(path) as file:
+        for line in file:
+            yield line
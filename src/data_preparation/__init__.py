@@ -4,5 +4,15 @@
         Make the importing much shorter
 """
 
-from .data_preparation import prepare_conll_data, tokenize_and_keep_labels, \
-    pad_sequence, truncate_sequence, create_test_samples
+from utils.lazy_import import lazy_import
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    **dict.fromkeys(["prepare_conll_data", "iter_conll_data", "tokenize_and_keep_labels",
+                     "batch_tokenize_and_keep_labels", "pad_sequence", "truncate_sequence",
+                     "create_test_samples", "batch_create_test_samples"], ".data_preparation"),
+    **dict.fromkeys(["build_cache_key", "encode_samples", "write_shards", "read_shards",
+                     "shards_exist", "model_fingerprint", "hash_arrays"], ".shard_cache"),
+    "SubwordCache": ".subword_cache",
+    **dict.fromkeys(["tokenize_conll_file", "prepare_training_data", "load_cached_training_data",
+                     "build_subword_cache", "create_tokenize_pool", "pool_tokenize_and_keep_labels"], ".pipeline"),
+})
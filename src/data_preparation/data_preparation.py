@@ -7,38 +7,124 @@
 """
 
 # ============================ Third Party libs ============================
-from typing import List
+from typing import Iterable, Iterator, List, Tuple
 
+# word start marker of sentencepiece tokenizers
+SPIECE_UNDERLINE = "\u2581"
 
-def prepare_conll_data(data: list) -> [List[list], List[list]]:
+
+def iter_conll_data(data: Iterable[str]) -> Iterator[Tuple[list, list]]:
     """
-    function to load data in conll format
+    function to lazily load data in conll format
 
     Args:
-        data: NER data from txt file
+        data: iterable over lines of NER data (ex: read_text_lines output)
 
     Returns:
-        sentences: list of tokenized sentences
-        labels: list of labels for each sentence
+        generator of (tokens, tags) for each sentence
 
     """
-    sentences, labels, tokens, tags = [], [], [], []
+    tokens, tags = [], []
     for line in data:
         if not line.startswith("# id"):
             if line == "\n":
                 if len(tokens) != 0:
-                    sentences.append(tokens)
-                    labels.append(tags)
+                    yield tokens, tags
                     tokens, tags = [], []
             else:
                 line = line.strip().split()
                 tokens.append(line[0].strip())
                 tags.append(line[3].strip())
+    if len(tokens) != 0:
+        yield tokens, tags
+
+
+def prepare_conll_data(data: Iterable[str]) -> [List[list], List[list]]:
+    """
+    function to load data in conll format
+
+    Args:
+        data: NER data from txt file
+
+    Returns:
+        sentences: list of tokenized sentences
+        labels: list of labels for each sentence
+
+    """
+    sentences, labels = [], []
+    for tokens, tags in iter_conll_data(data):
+        sentences.append(tokens)
+        labels.append(tags)
     return sentences, labels
 
 
+def _align_word_pieces(word_pieces: List[list], label: list,
+                       mode: str = "same") -> [list, list, list]:
+    """
+    function to build sub_tokens, their labels and subtoken checks of a sentence
+
+    Args:
+        word_pieces: list of sub_tokens for each word of the sentence
+        label: list of labels for each word of the sentence
+        mode: use "same" or "x_mode" (see tokenize_and_keep_labels)
+
+    Returns:
+        sentence: list of sub_tokens
+        labels: list of labels for each sub_token
+        checks: list of subtoken check for each sub_token
+
+    """
+    sentence_, labels_, checks_ = [], [], []
+    for tokenized_word, tag in zip(word_pieces, label):
+        checks_.append("1")
+        # count number of subwords of each word
+        n_subwords = len(tokenized_word)
+        # The tokenized word is added to the resulting tokenized word list
+        sentence_.extend(tokenized_word)
+        checks_.extend(["0"] * (n_subwords - 1))
+
+        # The same label is added to the new list of labels `n_subwords` times
+        if mode == "same":
+            labels_.extend([tag] * n_subwords)
+        elif mode == "x_mode":
+            labels_.append(tag)
+            labels_.extend(["X"] * (n_subwords - 1))
+    return sentence_, labels_, checks_
+
+
+def _batch_word_pieces(sentences: List[list], tokenizer,
+                       batch_size: int = 1024) -> Iterator[List[list]]:
+    """
+    function to tokenize many pre-split sentences with a fast tokenizer in one call
+
+    Args:
+        sentences: list of tokenized sentences
+        tokenizer: fast tokenizer object (ex: T5TokenizerFast)
+        batch_size: number of sentences sent to the tokenizer in each call
+
+    Returns:
+        generator of list of sub_tokens for each word of each sentence
+
+    """
+    assert tokenizer.is_fast, "Batched tokenization needs a fast (Rust backed) tokenizer"
+    for start in range(0, len(sentences), batch_size):
+        batch = [[str(word) for word in sentence]
+                 for sentence in sentences[start: start + batch_size]]
+        encodings = tokenizer(batch, is_split_into_words=True, add_special_tokens=False)
+        for index, sentence in enumerate(batch):
+            word_pieces = [[] for _ in sentence]
+            # use word ids to give each sub_token back to its word
+            for token, word_id in zip(encodings.tokens(index), encodings.word_ids(index)):
+                if word_id is not None:
+                    word_pieces[word_id].append(token)
+            # a word that is empty after normalization (ex: zero width space) keeps only the
+            # metaspace prefix in the fast tokenizer, sentencepiece gives no pieces for it
+            yield [[] if pieces == [SPIECE_UNDERLINE] else pieces for pieces in word_pieces]
+
+
 def tokenize_and_keep_labels(sentences: List[list], labels: List[list], tokenizer,
-                             mode: str = "same") -> [List[list], List[list], List[list]]:
+                             mode: str = "same", word_cache=None) \
+        -> [List[list], List[list], List[list]]:
     """
     function to tokenize and preserve labels
 
@@ -49,6 +135,7 @@ def tokenize_and_keep_labels(sentences: List[list], labels: List[list], tokenize
         mode: use "same" or "x_mode". When using same, the same label is considered for all
         sub_tokens. And when x_mode is used, the first subtoken will be labeled ner tag and other
         sub_tokens will be labeled X tag.
+        word_cache: optional SubwordCache of the same tokenizer to reuse repeated words
 
     Returns:
         sentences: list of tokenized sentences
@@ -58,25 +145,41 @@ def tokenize_and_keep_labels(sentences: List[list], labels: List[list], tokenize
     """
     assert len(sentences) == len(labels), "Sentences and labels should have " \
                                           "the same number of samples"
+    tokenize = word_cache.tokenize if word_cache is not None else tokenizer.tokenize
     subtoken_checks = []
     for idx, (sentence, label) in enumerate(zip(sentences, labels)):
-        sentence_, labels_, checks_ = [], [], []
-        for word, tag in zip(sentence, label):
-            checks_.append("1")
-            # Tokenize each word and count number of its subwords
-            tokenized_word = tokenizer.tokenize(str(word))
-            n_subwords = len(tokenized_word)
-            # The tokenized word is added to the resulting tokenized word list
-            sentence_.extend(tokenized_word)
-            checks_.extend(["0"] * (n_subwords - 1))
-
-            # The same label is added to the new list of labels `n_subwords` times
-            if mode == "same":
-                labels_.extend([tag] * n_subwords)
-            elif mode == "x_mode":
-                labels_.append(tag)
-                labels_.extend(["X"] * (n_subwords - 1))
-        sentences[idx], labels[idx] = sentence_, labels_
+        # Tokenize each word
+        word_pieces = [tokenize(str(word)) for word in sentence]
+        sentences[idx], labels[idx], checks_ = _align_word_pieces(word_pieces, label, mode)
+        subtoken_checks.append(checks_)
+    return sentences, labels, subtoken_checks
+
+
+def batch_tokenize_and_keep_labels(sentences: List[list], labels: List[list], tokenizer,
+                                   mode: str = "same", batch_size: int = 1024) \
+        -> [List[list], List[list], List[list]]:
+    """
+    function to tokenize and preserve labels with a fast tokenizer, many sentences per call.
+    The output is the same as tokenize_and_keep_labels.
+
+    Args:
+        sentences: list of tokenized sentences
+        labels: list of labels for each sentence
+        tokenizer: fast tokenizer object (ex: T5TokenizerFast)
+        mode: use "same" or "x_mode" (see tokenize_and_keep_labels)
+        batch_size: number of sentences sent to the tokenizer in each call
+
+    Returns:
+        sentences: list of tokenized sentences
+        labels: list of labels for each sentence
+        subtoken_checks: list of subtoken check for each sentences
+
+    """
+    assert len(sentences) == len(labels), "Sentences and labels should have " \
+                                          "the same number of samples"
+    subtoken_checks = []
+    for idx, word_pieces in enumerate(_batch_word_pieces(sentences, tokenizer, batch_size)):
+        sentences[idx], labels[idx], checks_ = _align_word_pieces(word_pieces, labels[idx], mode)
         subtoken_checks.append(checks_)
     return sentences, labels, subtoken_checks
 
@@ -127,13 +230,14 @@ def pad_sequence(texts: List[list], max_length: int, pad_item: str = "[PAD]") ->
     return texts
 
 
-def truncate_sequence(texts: List[list], max_length: int) -> list:
+def truncate_sequence(texts: List[list], max_length: int, end_item: str = "[SEP]") -> list:
     """
     function to truncate sentences
 
     Args:
         texts: list of tokenized sentences
         max_length: maximum length for sentences
+        end_item: item put at the end of truncated sentences
 
     Returns:
         truncated sentences
@@ -142,33 +246,51 @@ def truncate_sequence(texts: List[list], max_length: int) -> list:
     for idx, text in enumerate(texts):
         if len(text) > max_length:
             texts[idx] = text[: max_length - 1]
-            texts[idx].append("[SEP]")
+            texts[idx].append(end_item)
     return texts
 
 
-def create_test_samples(data: List[list], tokenizer) -> [List[list], List[list], List[list]]:
+def create_test_samples(data: List[list], tokenizer,
+                        word_cache=None) -> [List[list], List[list], List[list]]:
     """
     function to prepare suitable examples for inference
     Args:
         data: list of sentences
         tokenizer: tokenizer object
+        word_cache: optional SubwordCache of the same tokenizer to reuse repeated words
 
     Returns:
         data: list of tokenized sentences
         subtoken_checks: list of subtoken check for each sentence
 
     """
+    tokenize = word_cache.tokenize if word_cache is not None else tokenizer.tokenize
     subtoken_checks = []
     for idx, item in enumerate(data):
-        tokenized_item = []
-        subtoken_checks_temp = []
-        for tok in item:
-            subtoken_checks_temp.append("1")
-            tokenized_word = tokenizer.tokenize(tok)
-            n_subwords = len(tokenized_word)
-            tokenized_item.extend(tokenized_word)
-            subtoken_checks_temp.extend(["0"] * (n_subwords - 1))
-
-        data[idx] = tokenized_item
+        word_pieces = [tokenize(tok) for tok in item]
+        data[idx], _, subtoken_checks_temp = _align_word_pieces(word_pieces, item)
+        subtoken_checks.append(subtoken_checks_temp)
+    return data, subtoken_checks
+
+
+def batch_create_test_samples(data: List[list], tokenizer,
+                              batch_size: int = 1024) -> [List[list], List[list]]:
+    """
+    function to prepare suitable examples for inference with a fast tokenizer, many sentences
+    per call. The output is the same as create_test_samples.
+
+    Args:
+        data: list of sentences
+        tokenizer: fast tokenizer object
+        batch_size: number of sentences sent to the tokenizer in each call
+
+    Returns:
+        data: list of tokenized sentences
+        subtoken_checks: list of subtoken check for each sentence
+
+    """
+    subtoken_checks = []
+    for idx, word_pieces in enumerate(_batch_word_pieces(data, tokenizer, batch_size)):
+        data[idx], _, subtoken_checks_temp = _align_word_pieces(word_pieces, data[idx])
         subtoken_checks.append(subtoken_checks_temp)
     return data, subtoken_checks
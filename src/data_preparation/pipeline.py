@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        data preparation:
+            pipeline.py
+
+"""
+
+# ============================ Third Party libs ============================
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+# =============================== My packages ==============================
+from data_loader import read_text_lines
+from indexer import LabelSchema, LABEL_SCHEMA_FILE
+from utils import find_max_length_in_list
+from .data_preparation import iter_conll_data, tokenize_and_keep_labels, \
+    batch_tokenize_and_keep_labels, pad_sequence, truncate_sequence
+from .subword_cache import SubwordCache
+from .shard_cache import build_cache_key, encode_samples, write_shards, read_shards, \
+    shards_exist
+
+# tokenizer and word cache of each preprocessing worker process
+_WORKER_STATE = {}
+
+
+def _init_tokenize_worker(tokenizer, subword_cache_size: int) -> None:
+    """
+    function to keep tokenizer in worker process, so it is pickled once per worker
+
+    Args:
+        tokenizer: tokenizer object
+        subword_cache_size: size of word to sub_tokens cache of the worker (0 disables it)
+
+    Returns:
+        None
+
+    """
+    # workers are already parallel, avoid rust thread pool oversubscription
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    _WORKER_STATE["tokenizer"] = tokenizer
+    _WORKER_STATE["word_cache"] = SubwordCache(tokenizer, max_size=subword_cache_size) \
+        if subword_cache_size > 0 and not tokenizer.is_fast else None
+
+
+def _tokenize_chunk(chunk: tuple) -> [list, list, list]:
+    """
+    function to tokenize a chunk of sentences in worker process
+
+    Args:
+        chunk: (sentences, labels, mode)
+
+    Returns:
+        sentences: list of tokenized sentences
+        labels: list of labels for each sentence
+        subtoken_checks: list of subtoken check for each sentences
+
+    """
+    sentences, labels, mode = chunk
+    tokenizer = _WORKER_STATE["tokenizer"]
+    if tokenizer.is_fast:
+        return batch_tokenize_and_keep_labels(sentences=sentences, labels=labels,
+                                              tokenizer=tokenizer, mode=mode)
+    return tokenize_and_keep_labels(sentences=sentences, labels=labels, tokenizer=tokenizer,
+                                    mode=mode, word_cache=_WORKER_STATE["word_cache"])
+
+
+def create_tokenize_pool(tokenizer, n_workers: int = None,
+                         subword_cache_size: int = 0) -> ProcessPoolExecutor:
+    """
+    function to create process pool for parallel tokenization
+
+    Args:
+        tokenizer: tokenizer object
+        n_workers: number of worker processes (None uses all cores)
+        subword_cache_size: size of word to sub_tokens cache of each worker
+
+    Returns:
+        process pool
+
+    """
+    return ProcessPoolExecutor(max_workers=n_workers or os.cpu_count(),
+                               initializer=_init_tokenize_worker,
+                               initargs=(tokenizer, subword_cache_size))
+
+
+def pool_tokenize_and_keep_labels(pool: ProcessPoolExecutor, sentences: List[list],
+                                  labels: List[list], mode: str = "same",
+                                  chunk_size: int = 2000) -> [List[list], List[list], List[list]]:
+    """
+    function to tokenize and preserve labels in a process pool, chunked by sentence ranges.
+    Chunks are merged in their original order, so the output is the same as
+    tokenize_and_keep_labels.
+
+    Args:
+        pool: process pool created by create_tokenize_pool
+        sentences: list of tokenized sentences
+        labels: list of labels for each sentence
+        mode: use "same" or "x_mode" (see tokenize_and_keep_labels)
+        chunk_size: number of sentences of each chunk
+
+    Returns:
+        sentences: list of tokenized sentences
+        labels: list of labels for each sentence
+        subtoken_checks: list of subtoken check for each sentences
+
+    """
+    assert len(sentences) == len(labels), "Sentences and labels should have " \
+                                          "the same number of samples"
+    chunks = [(sentences[start: start + chunk_size], labels[start: start + chunk_size], mode)
+              for start in range(0, len(sentences), chunk_size)]
+    sentences_, labels_, subtoken_checks = [], [], []
+    for chunk_sentences, chunk_labels, chunk_checks in pool.map(_tokenize_chunk, chunks):
+        sentences_.extend(chunk_sentences)
+        labels_.extend(chunk_labels)
+        subtoken_checks.extend(chunk_checks)
+    return sentences_, labels_, subtoken_checks
+
+
+def tokenize_conll_file(path: str, tokenizer, mode: str = "x_mode", n_samples: int = None,
+                        word_cache: SubwordCache = None,
+                        pool: ProcessPoolExecutor = None) -> [list, list, list]:
+    """
+    function to stream a conll file and tokenize it while keeping labels
+
+    Args:
+        path: conll file path
+        tokenizer: tokenizer object
+        mode: "same" or "x_mode" (see tokenize_and_keep_labels)
+        n_samples: only use the first n_samples sentences
+        word_cache: optional SubwordCache used by the per-word (slow tokenizer) path
+        pool: optional process pool (see create_tokenize_pool) to tokenize in parallel
+
+    Returns:
+        sentences: list of tokenized sentences
+        labels: list of labels for each sentence
+        subtoken_checks: list of subtoken check for each sentences
+
+    """
+    samples = list(itertools.islice(iter_conll_data(read_text_lines(path)), n_samples))
+    sentences = [tokens for tokens, _ in samples]
+    labels = [tags for _, tags in samples]
+    logging.debug("We have {} samples in {}.".format(len(labels), path))
+    if pool is not None:
+        return pool_tokenize_and_keep_labels(pool, sentences=sentences, labels=labels, mode=mode)
+    if tokenizer.is_fast:
+        return batch_tokenize_and_keep_labels(sentences=sentences, labels=labels,
+                                              tokenizer=tokenizer, mode=mode)
+    return tokenize_and_keep_labels(sentences=sentences, labels=labels, tokenizer=tokenizer,
+                                    mode=mode, word_cache=word_cache)
+
+
+def build_subword_cache(config, tokenizer):
+    """
+    function to create word to sub_tokens cache from config
+
+    Args:
+        config: config object
+        tokenizer: tokenizer object
+
+    Returns:
+        SubwordCache object or None when it is disabled
+
+    """
+    if config.subword_cache_size <= 0 or tokenizer.is_fast:
+        return None
+    word_cache = SubwordCache(tokenizer, max_size=config.subword_cache_size)
+    if config.persist_subword_cache and \
+            word_cache.load(config.language_model_tokenizer_path):
+        logging.debug("Load {} cached words".format(len(word_cache)))
+    return word_cache
+
+
+def build_training_cache_path(config, tokenizer, mode: str = "x_mode",
+                              n_train_samples: int = None) -> str:
+    """
+    function to create cached shards directory of train and val data
+
+    Args:
+        config: config object
+        tokenizer: tokenizer object
+        mode: "same" or "x_mode" (see tokenize_and_keep_labels)
+        n_train_samples: only use the first n_train_samples train sentences
+
+    Returns:
+        cached shards directory
+
+    """
+    train_path = os.path.join(config.processed_data_dir, config.train_data)
+    val_path = os.path.join(config.processed_data_dir, config.dev_data)
+    return os.path.join(config.cache_dir, build_cache_key(
+        [train_path, val_path], tokenizer, label_schema=mode, n_train_samples=n_train_samples))
+
+
+def load_cached_training_data(config, tokenizer, mode: str = "x_mode",
+                              n_train_samples: int = None) -> [dict, dict, int]:
+    """
+    function to load encoded train and val data from cached shards
+
+    Args:
+        config: config object
+        tokenizer: tokenizer object
+        mode: "same" or "x_mode" (see tokenize_and_keep_labels)
+        n_train_samples: only use the first n_train_samples train sentences
+
+    Returns:
+        data, tag2idx and max_length (see prepare_training_data) or None when the shards are
+        missing, disabled or use another label schema
+
+    """
+    cache_path = build_training_cache_path(config, tokenizer, mode=mode,
+                                           n_train_samples=n_train_samples)
+    if config.disable_cache or not shards_exist(os.path.join(cache_path, "train")) or \
+            not shards_exist(os.path.join(cache_path, "val")):
+        return None
+
+    # the label schema is frozen once it is written, later runs reuse its ids
+    schema_path = os.path.join(config.assets_dir, LABEL_SCHEMA_FILE)
+    label_schema = LabelSchema.load(schema_path) if os.path.isfile(schema_path) else None
+
+    train_data, meta = read_shards(os.path.join(cache_path, "train"))
+    if "label_schema" not in meta or (label_schema is not None and
+                                      meta["label_schema"] != label_schema.content_hash):
+        logging.debug("Cached shards use another label schema, rebuild them")
+        return None
+    logging.debug("Load cached shards from {}".format(cache_path))
+    if label_schema is None:
+        label_schema = LabelSchema(meta["tags"])
+        label_schema.save(schema_path)
+    val_data, _ = read_shards(os.path.join(cache_path, "val"))
+    return {"train_data": train_data, "val_data": val_data, "test_data": val_data}, \
+        label_schema.tag2idx, meta["max_length"]
+
+
+def prepare_training_data(config, tokenizer, mode: str = "x_mode", n_train_samples: int = None,
+                          pool: ProcessPoolExecutor = None) -> [dict, dict, int]:
+    """
+    function to create encoded train and val data, reusing cached shards when possible
+
+    Args:
+        config: config object
+        tokenizer: tokenizer object
+        mode: "same" or "x_mode" (see tokenize_and_keep_labels)
+        n_train_samples: only use the first n_train_samples train sentences
+        pool: optional process pool (see create_tokenize_pool) to tokenize in parallel
+
+    Returns:
+        data: dictionary of encoded train_data, val_data and test_data
+        tag2idx: label to index dictionary used for encoding
+        max_length: sentence max length
+
+    """
+    cached_data = load_cached_training_data(config, tokenizer, mode=mode,
+                                            n_train_samples=n_train_samples)
+    if cached_data is not None:
+        return cached_data
+
+    train_path = os.path.join(config.processed_data_dir, config.train_data)
+    val_path = os.path.join(config.processed_data_dir, config.dev_data)
+    cache_path = build_training_cache_path(config, tokenizer, mode=mode,
+                                           n_train_samples=n_train_samples)
+    schema_path = os.path.join(config.assets_dir, LABEL_SCHEMA_FILE)
+    label_schema = LabelSchema.load(schema_path) if os.path.isfile(schema_path) else None
+
+    word_cache = build_subword_cache(config, tokenizer) if pool is None else None
+    train_sentences, train_labels, train_subtoken_checks = tokenize_conll_file(
+        train_path, tokenizer, mode=mode, n_samples=n_train_samples, word_cache=word_cache,
+        pool=pool)
+    logging.debug("Create Train Samples")
+    val_sentences, val_labels, val_subtoken_checks = tokenize_conll_file(
+        val_path, tokenizer, mode=mode, word_cache=word_cache, pool=pool)
+    logging.debug("Create Valid Samples")
+    if word_cache is not None:
+        logging.debug("Subword cache: {}".format(word_cache.stats()))
+        if config.persist_subword_cache:
+            word_cache.save(config.language_model_tokenizer_path)
+
+    # label padding
+    max_length = find_max_length_in_list(train_sentences)
+    train_labels = pad_sequence(train_labels, max_length=max_length,
+                                pad_item=tokenizer.pad_token)
+    val_labels = pad_sequence(val_labels, max_length=max_length, pad_item=tokenizer.pad_token)
+
+    # label truncating, the last position is the end of sentence token of the input ids
+    train_labels = truncate_sequence(train_labels, max_length, end_item=tokenizer.pad_token)
+    val_labels = truncate_sequence(val_labels, max_length, end_item=tokenizer.pad_token)
+
+    # Create target indexer
+    tags = set(itertools.chain(*train_labels, [tokenizer.pad_token]))
+    if label_schema is None:
+        label_schema = LabelSchema.from_tags(tags)
+        label_schema.save(schema_path)
+    elif not tags.issubset(label_schema.tags):
+        raise ValueError("Tags {} of {} are not in the label schema {}, it was written for "
+                         "another dataset. Use another assets_dir or remove it.".format(
+                             sorted(tags.difference(label_schema.tags)), train_path,
+                             schema_path))
+    target_indexer = label_schema.to_indexer()
+    target_indexer.save(config.assets_dir)
+    tag2idx = label_schema.tag2idx
+
+    train_data = encode_samples(train_sentences, train_labels, train_subtoken_checks,
+                                tokenizer=tokenizer, target_indexer=target_indexer,
+                                max_length=max_length)
+    val_data = encode_samples(val_sentences, val_labels, val_subtoken_checks,
+                              tokenizer=tokenizer, target_indexer=target_indexer,
+                              max_length=max_length)
+    if not config.disable_cache:
+        meta = {"tags": list(label_schema.tags), "label_schema": label_schema.content_hash,
+                "max_length": max_length}
+        write_shards(train_data, os.path.join(cache_path, "train"), meta=meta)
+        write_shards(val_data, os.path.join(cache_path, "val"), meta=meta)
+        logging.debug("Write cached shards to {}".format(cache_path))
+    return {"train_data": train_data, "val_data": val_data, "test_data": val_data}, \
+        tag2idx, max_length
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        data preparation:
+            shard_cache.py
+
+"""
+
+# ============================ Third Party libs ============================
+import hashlib
+import json
+import os
+import shutil
+from typing import List
+
+import numpy
+
+# =============================== My packages ==============================
+from data_loader import read_json, write_json
+
+SHARD_FIELDS = ("input_ids", "attention_mask", "subtoken_check", "target")
+META_FILE = "meta.json"
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    function to compute sha1 of file content without loading the whole file
+
+    Args:
+        path: file path
+        chunk_size: number of bytes read at each step
+
+    Returns:
+        hex digest of file content
+
+    """
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def tokenizer_fingerprint(tokenizer) -> dict:
+    """
+    function to describe a tokenizer in a way that changes whenever its vocab changes
+
+    Args:
+        tokenizer: tokenizer object
+
+    Returns:
+        dictionary of tokenizer properties
+
+    """
+    fingerprint = {"class": type(tokenizer).__name__,
+                   "name_or_path": str(getattr(tokenizer, "name_or_path", "")),
+                   "vocab_size": len(tokenizer)}
+    vocab_file = getattr(tokenizer, "vocab_file", None)
+    if vocab_file and os.path.isfile(vocab_file):
+        fingerprint["vocab_file"] = hash_file(vocab_file)
+    return fingerprint
+
+
+def model_fingerprint(model_path: str) -> dict:
+    """
+    function to describe a pretrained model in a way that changes whenever its weights change
+
+    Args:
+        model_path: pretrained model directory (or model name)
+
+    Returns:
+        dictionary of model file hashes
+
+    """
+    fingerprint = {"name_or_path": str(model_path)}
+    if os.path.isdir(model_path):
+        for name in sorted(os.listdir(model_path)):
+            # config and (sharded) weight files written by save_pretrained
+            if name == "config.json" or name.startswith(("pytorch_model", "model")) and \
+                    name.endswith((".bin", ".safetensors")):
+                fingerprint[name] = hash_file(os.path.join(model_path, name))
+    return fingerprint
+
+
+def hash_arrays(arrays: dict) -> str:
+    """
+    function to compute sha1 of array contents (with their dtype and shape)
+
+    Args:
+        arrays: dictionary of arrays
+
+    Returns:
+        hex digest of arrays
+
+    """
+    sha1 = hashlib.sha1()
+    for name in sorted(arrays):
+        array = numpy.ascontiguousarray(arrays[name])
+        sha1.update("{}:{}:{}".format(name, array.dtype.str, array.shape).encode("utf8"))
+        sha1.update(memoryview(array).cast("B"))
+    return sha1.hexdigest()
+
+
+def build_cache_key(source_paths: List[str], tokenizer, label_schema, **params) -> str:
+    """
+    function to build cache key from source files, tokenizer and label schema
+
+    Args:
+        source_paths: list of raw data files
+        tokenizer: tokenizer object
+        label_schema: anything json serializable that identifies labels (ex: tagging mode)
+        **params: other preprocessing parameters that change the encoded data
+
+    Returns:
+        hex digest used as cache directory name
+
+    """
+    description = {"sources": [hash_file(path) for path in source_paths],
+                   "tokenizer": tokenizer_fingerprint(tokenizer),
+                   "label_schema": label_schema,
+                   "params": params}
+    return hashlib.sha1(json.dumps(description, sort_keys=True).encode("utf8")).hexdigest()
+
+
+def encode_samples(texts: List[list], targets: List[list], subtoken_checks: List[list],
+                   tokenizer, target_indexer, max_length: int) -> dict:
+    """
+    function to encode tokenized samples into fixed width integer arrays
+
+    Args:
+        texts: list of tokenized sentences
+        targets: list of labels for each sentence, padded to max_length
+        subtoken_checks: list of subtoken check for each sentence
+        tokenizer: tokenizer object
+        target_indexer: label indexer (ex: Indexer)
+        max_length: maximum length for sentences
+
+    Returns:
+        dictionary of input_ids, attention_mask, subtoken_check and target arrays
+
+    """
+    n_samples = len(texts)
+    arrays = {"input_ids": numpy.zeros((n_samples, max_length), dtype=numpy.int32),
+              "attention_mask": numpy.zeros((n_samples, max_length), dtype=numpy.int8),
+              "subtoken_check": numpy.zeros((n_samples, max_length), dtype=numpy.bool_),
+              "target": numpy.zeros((n_samples, max_length), dtype=numpy.int32)}
+    for index, (text, subtoken_check) in enumerate(zip(texts, subtoken_checks)):
+        # same as encode_plus on a list of sub_tokens, but also works for fast tokenizers
+        data = tokenizer.prepare_for_model(tokenizer.convert_tokens_to_ids(text),
+                                           add_special_tokens=True, max_length=max_length,
+                                           padding="max_length", truncation=True)
+        arrays["input_ids"][index] = data["input_ids"]
+        arrays["attention_mask"][index] = data["attention_mask"]
+        checks = [check == "1" for check in subtoken_check[:max_length]]
+        arrays["subtoken_check"][index, :len(checks)] = checks
+    if n_samples:
+        arrays["target"][:] = target_indexer.convert_samples_to_index_array(
+            [target[:max_length] for target in targets])
+    return arrays
+
+
+def write_shards(arrays: dict, path: str, meta: dict = None) -> None:
+    """
+    function to write encoded arrays as memory mappable .npy shards
+
+    Args:
+        arrays: dictionary of encoded arrays
+        path: shard directory
+        meta: extra information saved next to shards
+
+    Returns:
+        None
+
+    """
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        numpy.save(os.path.join(tmp_path, name + ".npy"), numpy.ascontiguousarray(array))
+    meta = dict(meta or {})
+    meta["fields"] = sorted(arrays)
+    meta["n_samples"] = len(next(iter(arrays.values())))
+    write_json(data=meta, path=os.path.join(tmp_path, META_FILE))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def shards_exist(path: str) -> bool:
+    """
+    function to check whether a complete shard directory exists
+
+    Args:
+        path: shard directory
+
+    Returns:
+        True if shards were written completely
+
+    """
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def read_shards(path: str) -> [dict, dict]:
+    """
+    function to open shards in memory mapped read only mode
+
+    Args:
+        path: shard directory
+
+    Returns:
+        arrays: dictionary of memory mapped arrays
+        meta: information saved next to shards
+
+    """
+    meta = read_json(os.path.join(path, META_FILE))
+    arrays = {name: numpy.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+              for name in meta["fields"]}
+    return arrays, meta
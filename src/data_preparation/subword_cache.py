@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        data preparation:
+            subword_cache.py
+
+"""
+
+# ============================ Third Party libs ============================
+import os
+from collections import OrderedDict
+
+# =============================== My packages ==============================
+from data_loader import read_json, write_json
+from .shard_cache import tokenizer_fingerprint
+
+SUBWORD_CACHE_FILE = "subword_cache.json"
+
+
+class SubwordCache:
+    """
+    Bounded (least recently used) word to sub_tokens cache in front of tokenizer.tokenize
+    """
+
+    def __init__(self, tokenizer, max_size: int = 100000):
+        self.tokenizer = tokenizer
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._pieces = OrderedDict()
+
+    def __len__(self):
+        return len(self._pieces)
+
+    def tokenize(self, word: str) -> tuple:
+        """
+        method to tokenize a word, reusing previous result of the same word
+
+        Args:
+            word: input word
+
+        Returns:
+            sub_tokens of the word
+
+        """
+        word = str(word)
+        pieces = self._pieces.get(word)
+        if pieces is not None:
+            self.hits += 1
+            self._pieces.move_to_end(word)
+            return pieces
+        self.misses += 1
+        pieces = tuple(self.tokenizer.tokenize(word))
+        self._pieces[word] = pieces
+        if len(self._pieces) > self.max_size:
+            self._pieces.popitem(last=False)
+        return pieces
+
+    def stats(self) -> dict:
+        """
+        method to return cache counters
+
+        Returns:
+            dictionary of hits, misses, hit_rate and size
+
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0, "size": len(self._pieces)}
+
+    def save(self, path: str) -> None:
+        """
+        method to save cached words (ex: alongside the tokenizer files)
+
+        Args:
+            path: directory to save cache file
+
+        Returns:
+            None
+
+        """
+        write_json(data={"tokenizer": tokenizer_fingerprint(self.tokenizer),
+                         "pieces": self._pieces},
+                   path=os.path.join(path, SUBWORD_CACHE_FILE))
+
+    def load(self, path: str) -> bool:
+        """
+        method to load cached words saved for the same tokenizer
+
+        Args:
+            path: directory of cache file
+
+        Returns:
+            True if cache file was loaded
+
+        """
+        cache_path = os.path.join(path, SUBWORD_CACHE_FILE)
+        if not os.path.isfile(cache_path):
+            return False
+        data = read_json(cache_path)
+        if data["tokenizer"] != tokenizer_fingerprint(self.tokenizer):
+            return False
+        for word, pieces in list(data["pieces"].items())[-self.max_size:]:
+            self._pieces[word] = tuple(pieces)
+        return True
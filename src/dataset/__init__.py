@@ -3,4 +3,15 @@
     Complex NER Project:
         Make the importing much shorter
 """
-from .dataset import DataModule, InferenceDataset
+from utils.lazy_import import lazy_import
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    **dict.fromkeys(["DataModule", "EncodedDataset"], ".dataset"),
+    "InferenceDataset": ".inference_dataset",
+    "SentenceStore": ".sentence_store",
+    **dict.fromkeys(["FeatureDataset", "write_features", "write_teacher_logits", "read_features",
+                     "prepare_feature_data", "prepare_teacher_logits"], ".feature_store"),
+    **dict.fromkeys(["BucketBatchSampler", "TokenBudgetBatchSampler", "PackedBatchSampler",
+                     "build_batch_sampler", "build_loader_kwargs", "collate_dynamic_padding",
+                     "collate_packed", "pack_lengths"], ".batching"),
+})
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        dataset:
+            batching.py
+"""
+# ============================ Third Party libs ============================
+from typing import Iterator, List
+
+import numpy
+import torch
+from torch.utils.data import Sampler
+from torch.utils.data.dataloader import default_collate
+
+
+def collate_dynamic_padding(batch: List[dict]) -> dict:
+    """
+    function to collate fixed length samples and cut padding to the longest sample of batch
+
+    Args:
+        batch: list of samples with input_ids, attention_mask, ... of the same length
+
+    Returns:
+        batched sample which length is the longest attention mask in the batch
+
+    """
+    batch = default_collate(batch)
+    batch_length = max(int(batch["attention_mask"].sum(dim=1).max()), 1)
+    return {name: value[:, :batch_length] if isinstance(value, torch.Tensor) and
+            value.dim() >= 2 else value for name, value in batch.items()}
+
+
+def pack_lengths(lengths: List[int], max_length: int) -> List[List[int]]:
+    """
+    function to group consecutive samples in packs whose total length is at most max_length
+    (next fit, a sample longer than max_length gets a pack of its own)
+
+    Args:
+        lengths: length of every sample
+        max_length: length of packed sequences
+
+    Returns:
+        list of packs, each pack is a list of sample positions
+
+    """
+    packs, pack, pack_length = [], [], 0
+    for position, length in enumerate(lengths):
+        if pack and pack_length + length > max_length:
+            packs.append(pack)
+            pack, pack_length = [], 0
+        pack.append(position)
+        pack_length += length
+    if pack:
+        packs.append(pack)
+    return packs
+
+
+def collate_packed(batch: List[dict], max_length: int) -> dict:
+    """
+    function to pack the non pad part of samples (in order) into sequences of at most
+    max_length. segment_ids numbers the samples of each sequence from 1 (0 for padding) and
+    segment_lengths keeps the length of every packed sample in order.
+
+    Args:
+        batch: list of samples with input_ids, attention_mask, ...
+        max_length: length of packed sequences
+
+    Returns:
+        batched sample of packed sequences
+
+    """
+    lengths = [int(sample["attention_mask"].sum()) for sample in batch]
+    packs = pack_lengths(lengths, max_length)
+    batch_length = max(sum(lengths[position] for position in pack) for pack in packs)
+    names = [name for name in ("input_ids", "target", "subtoken_check", "features",
+                               "teacher_logits") if name in batch[0]]
+    packed = {name: torch.zeros(len(packs), batch_length, *batch[0][name].shape[1:],
+                                dtype=batch[0][name].dtype) for name in names}
+    segment_ids = torch.zeros(len(packs), batch_length, dtype=torch.long)
+    for row, pack in enumerate(packs):
+        start = 0
+        for segment, position in enumerate(pack, start=1):
+            end = start + lengths[position]
+            for name in names:
+                packed[name][row, start: end] = batch[position][name][:lengths[position]]
+            segment_ids[row, start: end] = segment
+            start = end
+    packed["attention_mask"] = (segment_ids > 0).long()
+    packed["segment_ids"] = segment_ids
+    packed["segment_lengths"] = torch.tensor([lengths[position] for pack in packs
+                                              for position in pack])
+    return packed
+
+
+class BucketBatchSampler(Sampler):
+    """
+    Batch sampler that puts samples of similar length in the same batch.
+    Samples are shuffled, split into pools of batch_size * bucket_size_multiplier samples
+    and each pool is sorted by length before it is cut into batches, then batches are
+    shuffled. Without shuffle, samples are sorted by length once.
+    """
+
+    def __init__(self, lengths: numpy.ndarray, batch_size: int, shuffle: bool = True,
+                 bucket_size_multiplier: int = 100, drop_last: bool = False, seed: int = 0):
+        super().__init__()
+        self.lengths = numpy.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_size = batch_size * bucket_size_multiplier
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+        self._epoch_batches = (None, None)
+
+    def __len__(self):
+        return len(self._get_batches(self.epoch))
+
+    def _make_batches(self, indexes: numpy.ndarray) -> List[numpy.ndarray]:
+        """
+        method to cut length sorted sample indexes into batches
+
+        Args:
+            indexes: sample indexes sorted by length
+
+        Returns:
+            list of batches
+
+        """
+        batches = [indexes[start: start + self.batch_size]
+                   for start in range(0, len(indexes), self.batch_size)]
+        if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+            batches = batches[:-1]
+        return batches
+
+    def _get_batches(self, epoch: int) -> List[numpy.ndarray]:
+        """
+        method to create (deterministic) batches of an epoch
+
+        Args:
+            epoch: epoch number, used as part of the shuffle seed
+
+        Returns:
+            list of batches
+
+        """
+        if self._epoch_batches[0] == epoch:
+            return self._epoch_batches[1]
+        if not self.shuffle:
+            batches = self._make_batches(numpy.argsort(self.lengths, kind="stable"))
+        else:
+            generator = numpy.random.default_rng(self.seed + epoch)
+            indexes = generator.permutation(len(self.lengths))
+            batches = []
+            for start in range(0, len(indexes), self.bucket_size):
+                bucket = indexes[start: start + self.bucket_size]
+                bucket = bucket[numpy.argsort(self.lengths[bucket], kind="stable")]
+                batches.extend(self._make_batches(bucket))
+            batches = [batches[index] for index in generator.permutation(len(batches))]
+        self._epoch_batches = (epoch, batches)
+        return batches
+
+    def __iter__(self) -> Iterator[list]:
+        batches = self._get_batches(self.epoch)
+        self.epoch += 1
+        for batch in batches:
+            yield batch.tolist()
+
+
+class TokenBudgetBatchSampler(BucketBatchSampler):
+    """
+    Batch sampler that fills each batch with similar length samples until the padded batch
+    (number of samples * longest sample) would exceed max_tokens. A sample longer than
+    max_tokens gets a batch of its own.
+    """
+
+    def __init__(self, lengths: numpy.ndarray, max_tokens: int, shuffle: bool = True,
+                 bucket_size: int = 10000, seed: int = 0):
+        super().__init__(lengths, batch_size=bucket_size, shuffle=shuffle,
+                         bucket_size_multiplier=1, seed=seed)
+        self.max_tokens = max_tokens
+
+    def _make_batches(self, indexes: numpy.ndarray) -> List[numpy.ndarray]:
+        batches, start, longest = [], 0, 0
+        for end, length in enumerate(self.lengths[indexes]):
+            longest = max(longest, length)
+            if end > start and (end - start + 1) * longest > self.max_tokens:
+                batches.append(indexes[start: end])
+                start, longest = end, length
+        if start < len(indexes):
+            batches.append(indexes[start:])
+        return batches
+
+
+class PackedBatchSampler(BucketBatchSampler):
+    """
+    Batch sampler for collate_packed, length sorted samples are packed into sequences of
+    max_length and each batch has batch_size packed sequences. The samples of a batch are
+    yielded in pack order, so collate_packed rebuilds the same packs.
+    """
+
+    def __init__(self, lengths: numpy.ndarray, max_length: int, batch_size: int,
+                 shuffle: bool = True, bucket_size_multiplier: int = 100, seed: int = 0):
+        super().__init__(lengths, batch_size=batch_size, shuffle=shuffle,
+                         bucket_size_multiplier=bucket_size_multiplier, seed=seed)
+        self.max_length = max_length
+
+    def _make_batches(self, indexes: numpy.ndarray) -> List[numpy.ndarray]:
+        packs = [indexes[pack] for pack in pack_lengths(self.lengths[indexes], self.max_length)]
+        return [numpy.concatenate(packs[start: start + self.batch_size])
+                for start in range(0, len(packs), self.batch_size)]
+
+
+def build_batch_sampler(lengths: numpy.ndarray, batch_size: int, max_tokens: int = 0,
+                        shuffle: bool = False) -> BucketBatchSampler:
+    """
+    function to create batch sampler by sentence count or, if max_tokens is set, by token budget
+
+    Args:
+        lengths: length of every sample
+        batch_size: number of samples in each batch
+        max_tokens: maximum number of (padded) tokens in each batch, 0 disables it
+        shuffle: shuffle samples and batches
+
+    Returns:
+        batch sampler
+
+    """
+    if max_tokens:
+        return TokenBudgetBatchSampler(lengths, max_tokens=max_tokens, shuffle=shuffle)
+    return BucketBatchSampler(lengths, batch_size=batch_size, shuffle=shuffle)
+
+
+def build_loader_kwargs(num_workers: int, persistent_workers: bool = False,
+                        pin_memory: bool = False, prefetch_factor: int = 2) -> dict:
+    """
+    function to create DataLoader worker arguments, worker only arguments are dropped when
+    data is loaded in the main process
+
+    Args:
+        num_workers: number of worker processes
+        persistent_workers: keep workers alive between epochs
+        pin_memory: copy batches into pinned memory
+        prefetch_factor: number of batches loaded in advance by each worker
+
+    Returns:
+        DataLoader keyword arguments
+
+    """
+    loader_kwargs = {"num_workers": num_workers, "pin_memory": pin_memory}
+    if num_workers > 0:
+        loader_kwargs.update(persistent_workers=persistent_workers,
+                             prefetch_factor=prefetch_factor)
+    return loader_kwargs
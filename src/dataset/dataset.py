@@ -4,120 +4,143 @@
         Make the importing much shorter
 """
 # ============================ Third Party libs ============================
+import functools
+import numpy
 import torch
 import pytorch_lightning as pl
 from typing import List
 from torch.utils.data import Dataset, DataLoader
 
+# ============================ My packages ============================
+from data_preparation import encode_samples
+from .batching import build_batch_sampler, build_loader_kwargs, collate_dynamic_padding, \
+    collate_packed, PackedBatchSampler
 
-class CustomDataset(Dataset):
-    def __init__(self, texts: List[list], targets: List[list],
-                 subtoken_checks: List[list], max_length: int, tokenizer, target_indexer):
-        self.texts = texts
-        self.targets = targets
-        self.subtoken_checks = subtoken_checks
-        self.max_length = max_length
-        self.tokenizer = tokenizer
-        self.target_indexer = target_indexer
-        self.position = [str(p) for p in range(self.max_length)]
 
-    def __len__(self):
-        return len(self.targets)
+class EncodedDataset(Dataset):
+    """
+    Dataset over pre-encoded arrays, each item is a row slice. In memory arrays are
+    converted to contiguous tensors once, memory mapped arrays are read row by row.
+    """
+    field_dtypes = {"input_ids": numpy.int64, "target": numpy.int64,
+                    "attention_mask": numpy.int64, "subtoken_check": numpy.bool_}
 
-    def __getitem__(self, item_index):
-        data = self.tokenizer.encode_plus(text=self.texts[item_index],
-                                          add_special_tokens=True,
-                                          max_length=self.max_length,
-                                          return_tensors="pt",
-                                          padding="max_length",
-                                          truncation=True)
-        subtoken_check = self.tokenizer.encode_plus(text=self.subtoken_checks[item_index],
-                                                    add_special_tokens=True,
-                                                    max_length=self.max_length,
-                                                    return_tensors="pt",
-                                                    padding="max_length",
-                                                    truncation=True).input_ids
-
-        target = self.target_indexer.convert_samples_to_indexes([self.targets[item_index]])[0]
-
-        return {"input_ids": data["input_ids"].flatten(),
-                "target": torch.LongTensor(target),
-                "attention_mask": data["attention_mask"].flatten(),
-                "subtoken_check": subtoken_check.flatten()}
-
-
-class InferenceDataset(Dataset):
-    def __init__(self, texts: List[list], subtoken_checks: List[list], tokenizer, max_length: int):
-        self.texts = texts
-        self.subtoken_checks = subtoken_checks
-        self.tokenizer = tokenizer
-        self.max_length = max_length
+    def __init__(self, arrays: dict):
+        self.arrays = {name: array if isinstance(array, numpy.memmap) else torch.from_numpy(
+            numpy.ascontiguousarray(array, dtype=self.field_dtypes[name]))
+                       for name, array in arrays.items()}
 
     def __len__(self):
-        return len(self.texts)
+        return len(self.arrays["input_ids"])
+
+    def lengths(self) -> numpy.ndarray:
+        """
+        method to get number of non pad input ids of every sample
+
+        Returns:
+            array of sample lengths
+
+        """
+        attention_mask = self.arrays["attention_mask"]
+        if isinstance(attention_mask, torch.Tensor):
+            return attention_mask.sum(dim=1).numpy()
+        return numpy.asarray(attention_mask).sum(axis=1)
+
+    def _get_row(self, name: str, item_index: int) -> torch.Tensor:
+        array = self.arrays[name]
+        if isinstance(array, torch.Tensor):
+            return array[item_index]
+        return torch.from_numpy(array[item_index].astype(self.field_dtypes[name]))
 
     def __getitem__(self, item_index):
-        inputs = self.tokenizer.encode_plus(
-            text=self.texts[item_index],
-            max_length=self.max_length,
-            padding="max_length",
-            return_tensors="pt",
-            add_special_tokens=True,
-            truncation=True
-        )
-
-        subtoken_check = self.tokenizer.encode_plus(
-            text=self.subtoken_checks[item_index],
-            max_length=self.max_length,
-            padding="max_length",
-            return_tensors="pt",
-            add_special_tokens=True,
-            truncation=True
-        ).input_ids
-
-        return {"input_ids": inputs["input_ids"].flatten(),
-                "attention_mask": inputs["attention_mask"].flatten(),
-                "subtoken_check": subtoken_check.flatten()}
+        return {"input_ids": self._get_row("input_ids", item_index),
+                "target": self._get_row("target", item_index),
+                "attention_mask": self._get_row("attention_mask", item_index),
+                "subtoken_check": self._get_row("subtoken_check", item_index)}
 
 
-class DataModule(pl.LightningDataModule):
+class CustomDataset(EncodedDataset):
+    """
+    Dataset that encodes tokenized samples once at construction
+    """
+
+    def __init__(self, texts: List[list], targets: List[list],
+                 subtoken_checks: List[list], max_length: int, tokenizer, target_indexer):
+        super().__init__(encode_samples(texts, targets, subtoken_checks, tokenizer=tokenizer,
+                                        target_indexer=target_indexer, max_length=max_length))
+        self.max_length = max_length
 
-    def __init__(self, data: dict, batch_size, max_length, tokenizer, target_indexer):
+
+class DataModule(pl.LightningDataModule):
+    """
+    DataModule, with padding="fixed" every sample is padded to max_length and with
+    padding="dynamic" each batch is padded to its longest sample and samples of similar
+    length are batched together. If max_tokens is set, batches are filled up to max_tokens
+    (padded) tokens instead of batch_size samples. With padding="packed", train samples are
+    packed into sequences of max_length (batch_size sequences per batch) and the model uses
+    a block diagonal attention mask; validation and test batches use dynamic padding.
+    Splits of data can also be ready datasets (ex: FeatureDataset).
+    """
+
+    def __init__(self, data: dict, batch_size, max_length, tokenizer, target_indexer,
+                 padding: str = "fixed", max_tokens: int = 0, num_workers: int = 10,
+                 persistent_workers: bool = False, pin_memory: bool = False,
+                 prefetch_factor: int = 2):
         super().__init__()
         self.data = data
         self.batch_size = batch_size
         self.max_length = max_length
         self.tokenizer = tokenizer
         self.target_indexer = target_indexer
+        self.padding = padding
+        self.max_tokens = max_tokens
+        self.loader_kwargs = build_loader_kwargs(num_workers=num_workers,
+                                                 persistent_workers=persistent_workers,
+                                                 pin_memory=pin_memory,
+                                                 prefetch_factor=prefetch_factor)
         self.train_dataset, self.val_dataset, self.test_dataset = None, None, None
 
-    def setup(self):
-        self.train_dataset = CustomDataset(texts=self.data["train_data"][0],
-                                           targets=self.data["train_data"][1],
-                                           subtoken_checks=self.data["train_data"][2],
-                                           max_length=self.max_length,
-                                           tokenizer=self.tokenizer,
-                                           target_indexer=self.target_indexer)
-
-        self.val_dataset = CustomDataset(texts=self.data["val_data"][0],
-                                         targets=self.data["val_data"][1],
-                                         subtoken_checks=self.data["val_data"][2],
-                                         max_length=self.max_length,
-                                         tokenizer=self.tokenizer,
-                                         target_indexer=self.target_indexer)
-
-        self.test_dataset = CustomDataset(texts=self.data["val_data"][0],
-                                          targets=self.data["val_data"][1],
-                                          subtoken_checks=self.data["val_data"][2],
-                                          max_length=self.max_length,
-                                          tokenizer=self.tokenizer,
-                                          target_indexer=self.target_indexer)
+    def _build_dataset(self, data):
+        if isinstance(data, Dataset):
+            return data
+        if isinstance(data, dict):
+            return EncodedDataset(data)
+        return CustomDataset(texts=data[0], targets=data[1], subtoken_checks=data[2],
+                             max_length=self.max_length, tokenizer=self.tokenizer,
+                             target_indexer=self.target_indexer)
+
+    def setup(self, stage=None):
+        # Trainer.fit / Trainer.test call setup with their stage, every split is built anyway
+        self.train_dataset = self._build_dataset(self.data["train_data"])
+        self.val_dataset = self._build_dataset(self.data["val_data"])
+        self.test_dataset = self._build_dataset(self.data["test_data"])
+
+    def _build_dataloader(self, dataset, shuffle: bool = False, packing: bool = False):
+        if packing:
+            batch_sampler = PackedBatchSampler(dataset.lengths(), max_length=self.max_length,
+                                               batch_size=self.batch_size, shuffle=shuffle)
+            return DataLoader(dataset, batch_sampler=batch_sampler,
+                              collate_fn=functools.partial(collate_packed,
+                                                           max_length=self.max_length),
+                              **self.loader_kwargs)
+        if self.padding == "fixed" and not self.max_tokens:
+            return DataLoader(dataset, batch_size=self.batch_size, shuffle=shuffle,
+                              **self.loader_kwargs)
+        if self.padding != "fixed":
+            lengths, collate_fn = dataset.lengths(), collate_dynamic_padding
+        else:
+            lengths, collate_fn = numpy.full(len(dataset), self.max_length), None
+        batch_sampler = build_batch_sampler(lengths, batch_size=self.batch_size,
+                                            max_tokens=self.max_tokens, shuffle=shuffle)
+        return DataLoader(dataset, batch_sampler=batch_sampler, collate_fn=collate_fn,
+                          **self.loader_kwargs)
 
     def train_dataloader(self):
-        return DataLoader(self.train_dataset, batch_size=self.batch_size, shuffle=True, num_workers=10)
+        return self._build_dataloader(self.train_dataset, shuffle=True,
+                                      packing=self.padding == "packed")
 
     def val_dataloader(self):
-        return DataLoader(self.val_dataset, batch_size=self.batch_size, num_workers=10)
+        return self._build_dataloader(self.val_dataset)
 
     def test_dataloader(self):
-        return DataLoader(self.test_dataset, batch_size=self.batch_size, num_workers=10)
+        return self._build_dataloader(self.test_dataset)
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        dataset:
+            feature_store.py
+"""
+# ============================ Third Party libs ============================
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import Callable
+
+import numpy
+import torch
+
+# ============================ My packages ============================
+from data_loader import write_json
+from data_preparation import model_fingerprint, hash_arrays, read_shards, shards_exist
+from data_preparation.shard_cache import META_FILE, hash_file
+from .batching import build_batch_sampler, collate_dynamic_padding
+from .dataset import EncodedDataset
+from .sentence_store import SentenceStore
+
+# encoder outputs are stored in half precision, only non pad positions are kept
+FEATURE_DTYPE = numpy.float16
+
+
+def _write_sample_vectors(encode: Callable[[dict], torch.Tensor], dim: int,
+                          dataset: EncodedDataset, path: str, batch_size: int,
+                          max_tokens: int = 0, device: torch.device = torch.device("cpu"),
+                          meta: dict = None) -> None:
+    """
+    function to run encode once over dataset and write its [batch_size, seq_len, dim] outputs
+    at the non pad positions of every sample as one flat memory mappable [n_tokens, dim] array
+    plus sample offsets (see SentenceStore)
+
+    Args:
+        encode: function from a batch (on device) to vectors of each position
+        dim: size of vectors
+        dataset: dataset of encoded samples
+        path: store directory
+        batch_size: number of samples in each batch
+        max_tokens: maximum number of (padded) tokens in each batch, 0 disables it
+        device: device to run encode on
+        meta: extra information saved next to vectors
+
+    Returns:
+        None
+
+    """
+    lengths = dataset.lengths()
+    offsets = numpy.concatenate([[0], numpy.cumsum(lengths)]).astype(numpy.int64)
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    features = numpy.lib.format.open_memmap(
+        os.path.join(tmp_path, "features.npy"), mode="w+", dtype=FEATURE_DTYPE,
+        shape=(int(offsets[-1]), dim))
+
+    with torch.no_grad():
+        for indexes in build_batch_sampler(lengths, batch_size=batch_size,
+                                           max_tokens=max_tokens):
+            batch = collate_dynamic_padding([dataset[index] for index in indexes])
+            vectors = encode({name: value.to(device) for name, value in batch.items()})
+            vectors = vectors.float().cpu().numpy()
+            for row, index in enumerate(indexes):
+                features[offsets[index]: offsets[index + 1]] = vectors[row, :lengths[index]]
+    features.flush()
+    del features
+
+    numpy.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+    meta = dict(meta or {})
+    meta["fields"] = ["features", "offsets"]
+    meta["n_samples"] = len(dataset)
+    write_json(data=meta, path=os.path.join(tmp_path, META_FILE))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def write_features(t5_model, dataset: EncodedDataset, path: str, batch_size: int,
+                   max_tokens: int = 0, device: torch.device = torch.device("cpu"),
+                   meta: dict = None) -> None:
+    """
+    function to run T5 encoder once over dataset and write last_hidden_state of the non pad
+    positions of every sample as one flat memory mappable [n_tokens, hid_dim] array plus
+    sample offsets (see SentenceStore)
+
+    Args:
+        t5_model: T5 encoder model
+        dataset: dataset of encoded samples
+        path: feature store directory
+        batch_size: number of samples in each encoder batch
+        max_tokens: maximum number of (padded) tokens in each encoder batch, 0 disables it
+        device: device to run the encoder on
+        meta: extra information saved next to features
+
+    Returns:
+        None
+
+    """
+    training = t5_model.training
+    t5_model.eval()
+    _write_sample_vectors(lambda batch: t5_model(input_ids=batch["input_ids"],
+                                                 attention_mask=batch["attention_mask"]
+                                                 ).last_hidden_state,
+                          t5_model.config.hidden_size, dataset, path, batch_size=batch_size,
+                          max_tokens=max_tokens, device=device, meta=meta)
+    t5_model.train(training)
+
+
+def write_teacher_logits(teacher, dataset: EncodedDataset, path: str, batch_size: int,
+                         max_tokens: int = 0, device: torch.device = torch.device("cpu"),
+                         meta: dict = None) -> None:
+    """
+    function to run teacher Classifier once over dataset and write its logits of the non pad
+    positions of every sample (same layout as write_features)
+
+    Args:
+        teacher: trained Classifier
+        dataset: dataset of encoded samples
+        path: logits store directory
+        batch_size: number of samples in each teacher batch
+        max_tokens: maximum number of (padded) tokens in each teacher batch, 0 disables it
+        device: device to run the teacher on
+        meta: extra information saved next to logits
+
+    Returns:
+        None
+
+    """
+    training = teacher.training
+    teacher.eval()
+    _write_sample_vectors(teacher, teacher.output_layer.out_features, dataset, path,
+                          batch_size=batch_size, max_tokens=max_tokens, device=device,
+                          meta=meta)
+    teacher.train(training)
+
+
+def read_features(path: str) -> SentenceStore:
+    """
+    function to open feature store in memory mapped read only mode
+
+    Args:
+        path: feature store directory
+
+    Returns:
+        store of [sample_length, hid_dim] features of every sample
+
+    """
+    arrays, _ = read_shards(path)
+    return SentenceStore(arrays["features"], arrays["offsets"])
+
+
+class FeatureDataset(EncodedDataset):
+    """
+    EncodedDataset with cached vectors of each position, each item also has a field (name)
+    of shape [max_length, dim] (zero at pad positions). With "features" (T5 encoder outputs)
+    the model uses them instead of running T5, with "teacher_logits" they are distillation
+    targets.
+    """
+
+    def __init__(self, arrays: dict, features: SentenceStore, name: str = "features"):
+        super().__init__(arrays)
+        self.features = features
+        self.name = name
+
+    def __getitem__(self, item_index):
+        item = super().__getitem__(item_index)
+        sample_features = self.features[item_index]
+        features = torch.zeros(len(item["input_ids"]), sample_features.shape[1])
+        features[:len(sample_features)] = torch.from_numpy(
+            sample_features.astype(numpy.float32))
+        item[self.name] = features
+        return item
+
+
+def prepare_feature_data(data: dict, t5_model, cache_dir: str, model_path: str,
+                         batch_size: int, max_tokens: int = 0,
+                         device: torch.device = torch.device("cpu"),
+                         disable_cache: bool = False) -> dict:
+    """
+    function to create feature datasets of (frozen) T5 encoder outputs, reusing cached feature
+    stores when the encoder weights and the input ids are the same
+
+    Args:
+        data: dictionary of encoded train_data, val_data and test_data arrays
+        t5_model: T5 encoder model
+        cache_dir: directory of cached feature stores
+        model_path: pretrained T5 directory, part of the cache key
+        batch_size: number of samples in each encoder batch
+        max_tokens: maximum number of (padded) tokens in each encoder batch, 0 disables it
+        device: device to run the encoder on
+        disable_cache: always re-run the encoder and ignore cached feature stores
+
+    Returns:
+        dictionary of FeatureDataset objects with the keys of data
+
+    """
+    model_key = model_fingerprint(model_path)
+    feature_data, stores = {}, {}
+    for name, arrays in data.items():
+        key = hashlib.sha1(json.dumps({
+            "model": model_key, "dtype": numpy.dtype(FEATURE_DTYPE).str,
+            "data": hash_arrays({field: arrays[field]
+                                 for field in ("input_ids", "attention_mask")})},
+            sort_keys=True).encode("utf8")).hexdigest()
+        path = os.path.join(cache_dir, "features", key)
+        if key not in stores:
+            if disable_cache or not shards_exist(path):
+                logging.debug("Write {} features to {}".format(name, path))
+                write_features(t5_model, EncodedDataset(arrays), path, batch_size=batch_size,
+                               max_tokens=max_tokens, device=device, meta={"model": model_key})
+            else:
+                logging.debug("Load cached {} features from {}".format(name, path))
+            stores[key] = read_features(path)
+        feature_data[name] = FeatureDataset(arrays, stores[key])
+    return feature_data
+
+
+def prepare_teacher_logits(arrays: dict, teacher, cache_dir: str, teacher_path: str,
+                           batch_size: int, max_tokens: int = 0,
+                           device: torch.device = torch.device("cpu"),
+                           disable_cache: bool = False) -> FeatureDataset:
+    """
+    function to create dataset with cached teacher logits ("teacher_logits" field), reusing
+    the cached logits store when the teacher checkpoint and the input ids are the same
+
+    Args:
+        arrays: encoded arrays (ex: train_data of prepare_training_data)
+        teacher: trained Classifier
+        cache_dir: directory of cached logits stores
+        teacher_path: teacher checkpoint file, part of the cache key
+        batch_size: number of samples in each teacher batch
+        max_tokens: maximum number of (padded) tokens in each teacher batch, 0 disables it
+        device: device to run the teacher on
+        disable_cache: always re-run the teacher and ignore cached logits
+
+    Returns:
+        FeatureDataset with teacher_logits field
+
+    """
+    key = hashlib.sha1(json.dumps({
+        "teacher": hash_file(teacher_path), "dtype": numpy.dtype(FEATURE_DTYPE).str,
+        "data": hash_arrays({field: arrays[field] for field in ("input_ids", "attention_mask")})},
+        sort_keys=True).encode("utf8")).hexdigest()
+    path = os.path.join(cache_dir, "teacher_logits", key)
+    if disable_cache or not shards_exist(path):
+        logging.debug("Write teacher logits to {}".format(path))
+        write_teacher_logits(teacher, EncodedDataset(arrays), path, batch_size=batch_size,
+                             max_tokens=max_tokens, device=device,
+                             meta={"teacher": teacher_path})
+    else:
+        logging.debug("Load cached teacher logits from {}".format(path))
+    return FeatureDataset(arrays, read_features(path), name="teacher_logits")
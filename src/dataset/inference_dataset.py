@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        dataset:
+            inference_dataset.py
+"""
+# ============================ Third Party libs ============================
+from typing import List
+
+import numpy
+import torch
+from torch.utils.data import Dataset
+
+# ============================ My packages ============================
+from .sentence_store import SentenceStore
+
+
+def _subtoken_mask(subtoken_check: numpy.ndarray, max_length: int) -> torch.Tensor:
+    """
+    function to convert subtoken check of a sample to a fixed length boolean mask
+
+    Args:
+        subtoken_check: 1 for the first sub_token of each word and 0 for others
+        max_length: maximum length for sentences
+
+    Returns:
+        boolean mask tensor
+
+    """
+    mask = numpy.zeros(max_length, dtype=numpy.bool_)
+    subtoken_check = subtoken_check[:max_length]
+    mask[:len(subtoken_check)] = subtoken_check
+    return torch.from_numpy(mask)
+
+
+class InferenceDataset(Dataset):
+    def __init__(self, texts: List[list], subtoken_checks: List[list], tokenizer, max_length: int):
+        # keep samples as flat integer arrays instead of lists of Python strings
+        self.texts = SentenceStore.from_sequences(
+            tokenizer.convert_tokens_to_ids(text) for text in texts)
+        self.subtoken_checks = SentenceStore.from_sequences(
+            ([check == "1" for check in subtoken_check] for subtoken_check in subtoken_checks),
+            dtype=numpy.bool_)
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        # T5 special tokens (eos) follow the sentence, items are built from store slices
+        # without the tokenizer
+        self.special_ids = numpy.asarray(tokenizer.build_inputs_with_special_tokens([]),
+                                         dtype=numpy.int64)
+        self.pad_token_id = tokenizer.pad_token_id
+
+    def __len__(self):
+        return len(self.texts)
+
+    def lengths(self) -> numpy.ndarray:
+        """
+        method to get number of non pad input ids of every sample
+
+        Returns:
+            array of sample lengths
+
+        """
+        return numpy.minimum(self.texts.lengths() + len(self.special_ids), self.max_length)
+
+    def __getitem__(self, item_index):
+        # same as tokenizer.prepare_for_model with truncation and max_length padding
+        text = self.texts[item_index][:self.max_length - len(self.special_ids)]
+        length = len(text) + len(self.special_ids)
+        input_ids = numpy.full(self.max_length, self.pad_token_id, dtype=numpy.int64)
+        input_ids[:len(text)] = text
+        input_ids[len(text):length] = self.special_ids
+        attention_mask = numpy.zeros(self.max_length, dtype=numpy.int64)
+        attention_mask[:length] = 1
+
+        return {"input_ids": torch.from_numpy(input_ids),
+                "attention_mask": torch.from_numpy(attention_mask),
+                "subtoken_check": _subtoken_mask(self.subtoken_checks[item_index],
+                                                 self.max_length)}
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        dataset:
+            sentence_store.py
+"""
+# ============================ Third Party libs ============================
+from array import array
+from typing import Iterable
+
+import numpy
+
+
+class SentenceStore:
+    """
+    Compact store of variable length integer sequences: one flat value array and one offset
+    array. It holds two numpy arrays instead of a Python object per token, so forked data
+    loader workers do not touch (and copy) per token reference counts.
+    """
+    __slots__ = ("values", "offsets")
+
+    def __init__(self, values: numpy.ndarray, offsets: numpy.ndarray):
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[list], dtype=numpy.int32) -> "SentenceStore":
+        """
+        method to build store from sequences of integers, one sequence at a time
+
+        Args:
+            sequences: iterable over sequences of integers
+            dtype: numpy dtype of values
+
+        Returns:
+            SentenceStore object
+
+        """
+        values, offsets = array("q"), array("q", [0])
+        for sequence in sequences:
+            values.extend(sequence)
+            offsets.append(len(values))
+        return cls(numpy.frombuffer(values, dtype=numpy.int64).astype(dtype),
+                   numpy.frombuffer(offsets, dtype=numpy.int64).copy())
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, item_index) -> numpy.ndarray:
+        """
+        method to get a sequence as a view on the flat value array (no copy)
+
+        Args:
+            item_index: sequence index
+
+        Returns:
+            values of the sequence
+
+        """
+        return self.values[self.offsets[item_index]: self.offsets[item_index + 1]]
+
+    def lengths(self) -> numpy.ndarray:
+        """
+        method to get length of every sequence
+
+        Returns:
+            array of sequence lengths
+
+        """
+        return numpy.diff(self.offsets)
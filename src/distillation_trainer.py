@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        train a smaller T5 student Classifier from a trained teacher Classifier with token level
+        KL plus cross entropy and compare their accuracy and latency on the dev set
+"""
+
+# ============================ Third Party libs ============================
+
+import os
+import copy
+import logging
+from pytorch_lightning.loggers import CSVLogger
+from pytorch_lightning.callbacks import EarlyStopping
+from transformers import T5Tokenizer, T5TokenizerFast
+
+# ============================ My packages ============================
+from configuration import BaseConfig
+from data_loader import read_text_lines, write_json
+from data_preparation import prepare_training_data, iter_conll_data
+from models import build_checkpoint_callback, build_trainer, TeacherCallback, load_classifier
+from dataset import DataModule, prepare_teacher_logits
+from models.complex_ner_model import Classifier
+from inference import Inference, build_inference_dataloader, benchmark_inference
+from utils import setup_device
+
+logging.basicConfig(level=logging.DEBUG)
+
+if __name__ == "__main__":
+    # create config instance, language_model_path is the (smaller) student T5
+    CONFIG_CLASS = BaseConfig()
+    CONFIG = CONFIG_CLASS.get_config()
+
+    DEVICE = setup_device(CONFIG.device, num_threads=CONFIG.num_threads,
+                          num_interop_threads=CONFIG.num_interop_threads,
+                          cpu_cores=CONFIG.cpu_cores)
+
+    # create CSVLogger instance
+    LOGGER = CSVLogger(save_dir=CONFIG.saved_model_path, name=CONFIG.model_name)
+
+    # teacher and student share the tokenizer, so their logits are aligned token by token
+    TOKENIZER_CLASS = T5TokenizerFast if CONFIG.fast_tokenizer else T5Tokenizer
+    TOKENIZER = TOKENIZER_CLASS.from_pretrained(CONFIG.language_model_tokenizer_path)
+
+    # tokenize, index and encode data (or load it from cached shards)
+    DATA, TAG2IDX, SENTENCE_MAX_LENGTH = prepare_training_data(
+        CONFIG, TOKENIZER, mode="x_mode", n_train_samples=CONFIG.n_train_samples or None)
+    IDX2TAG = {idx: tag for tag, idx in TAG2IDX.items()}
+    CONFIG.SENTENCE_MAX_LENGTH = SENTENCE_MAX_LENGTH
+
+    STEPS_PER_EPOCH = len(DATA["train_data"]["input_ids"]) // CONFIG.batch_size
+    CONFIG.steps_per_epoch = STEPS_PER_EPOCH
+    CONFIG.warmup_steps = int(50 * STEPS_PER_EPOCH * 0.01)
+
+    TEACHER = load_classifier(CONFIG.teacher_checkpoint_path, map_location=DEVICE).eval()
+    assert TEACHER.tag2idx == TAG2IDX, "teacher uses another label schema"
+
+    # run the teacher once over train data or on every train batch
+    CALLBACKS = []
+    if CONFIG.cache_teacher_logits:
+        DATA["train_data"] = prepare_teacher_logits(
+            DATA["train_data"], TEACHER, cache_dir=CONFIG.cache_dir,
+            teacher_path=CONFIG.teacher_checkpoint_path, batch_size=CONFIG.batch_size,
+            max_tokens=CONFIG.max_tokens, device=DEVICE, disable_cache=CONFIG.disable_cache)
+    else:
+        CALLBACKS.append(TeacherCallback(TEACHER))
+
+    # Create the student Classifier Model
+    MODEL = Classifier(tag2idx=TAG2IDX,
+                       idx2tag=IDX2TAG,
+                       pad_token=TOKENIZER.pad_token, config=CONFIG)
+
+    DATA_MODULE = DataModule(data=DATA,
+                             batch_size=CONFIG.batch_size,
+                             max_length=SENTENCE_MAX_LENGTH,
+                             tokenizer=TOKENIZER,
+                             target_indexer=None,
+                             padding=CONFIG.padding,
+                             max_tokens=CONFIG.max_tokens,
+                             num_workers=CONFIG.num_workers,
+                             persistent_workers=CONFIG.persistent_workers,
+                             pin_memory=CONFIG.pin_memory,
+                             prefetch_factor=CONFIG.prefetch_factor)
+
+    DATA_MODULE.setup()
+
+    CHECKPOINT_CALLBACK = build_checkpoint_callback(CONFIG.save_top_k)
+    CHECKPOINT_CALLBACK_F1 = build_checkpoint_callback(CONFIG.save_top_k, monitor="val_f1",
+                                                       mode="max")
+    EARLY_STOPPING_CALLBACK = EarlyStopping(monitor="val_loss", patience=30, mode="min")
+
+    # Instantiate the Model Trainer
+    TRAINER = build_trainer(CONFIG, DEVICE,
+                            callbacks=[CHECKPOINT_CALLBACK, CHECKPOINT_CALLBACK_F1,
+                                       EARLY_STOPPING_CALLBACK, *CALLBACKS],
+                            logger=LOGGER)
+
+    # Train the student, test loads its best checkpoint
+    TRAINER.fit(MODEL, DATA_MODULE)
+    TRAINER.test(ckpt_path="best", datamodule=DATA_MODULE)
+
+    # save best model path, the student checkpoint is a normal Classifier checkpoint
+    write_json(path=os.path.join(CONFIG.saved_model_path, CONFIG.model_name,
+                                 "b_model_path.json"),
+               data={"best_model_path": CHECKPOINT_CALLBACK.best_model_path})
+
+    # compare teacher and student on the dev set
+    SAMPLES = list(iter_conll_data(read_text_lines(
+        path=os.path.join(CONFIG.processed_data_dir, CONFIG.dev_data))))
+    LABELS = [tags for _, tags in SAMPLES]
+    DATALOADER, BATCHES, SUBTOKEN_CHECKS = build_inference_dataloader(
+        copy.copy([tokens for tokens, _ in SAMPLES]), TOKENIZER, CONFIG)
+
+    REPORT = {}
+    for NAME, NER_MODEL in [("teacher", TEACHER), ("student", MODEL.eval().to(DEVICE))]:
+        REPORT[NAME] = benchmark_inference(Inference(NER_MODEL, TOKENIZER,
+                                                     precision=CONFIG.precision),
+                                           DATALOADER, BATCHES, SUBTOKEN_CHECKS, LABELS,
+                                           device=DEVICE)
+        REPORT[NAME]["parameters"] = sum(parameter.numel()
+                                         for parameter in NER_MODEL.parameters())
+        logging.info("{}: f1 {:.4f}, {:.1f} sentences/s".format(
+            NAME, REPORT[NAME]["f1_score"], REPORT[NAME]["sentences_per_second"]))
+    REPORT["speedup"] = REPORT["student"]["sentences_per_second"] / \
+        REPORT["teacher"]["sentences_per_second"]
+    REPORT["f1_drop"] = REPORT["teacher"]["f1_score"] - REPORT["student"]["f1_score"]
+
+    write_json(data=REPORT, path=os.path.join(CONFIG.assets_dir, "distillation_report.json"))
@@ -3,5 +3,10 @@
     Complex NER Project:
         Make the importing much shorter
 """
-from .evaluation import Evaluator, evaluate_with_seqeval
-from .helper import create_best_result_log
+from utils.lazy_import import lazy_import
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    "Evaluator": ".evaluation",
+    "evaluate_with_seqeval": ".evaluation",
+    "create_best_result_log": ".helper",
+})
@@ -5,21 +5,13 @@
 """
 
 # ============================ Third Party libs ============================
-import logging
 from collections import namedtuple
 from copy import deepcopy
 from typing import List
-from seqeval.metrics import f1_score, accuracy_score, classification_report
 
 # ============================ My packages ============================
 from .helper import compute_metrics, collect_named_entities, compute_precision_recall_f1_wrapper
 
-logging.basicConfig(
-    format="%(asctime)s %(name)s %(levelname)s: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    level="DEBUG",
-)
-
 Entity = namedtuple("Entity", "e_type start_offset end_offset")
 
 
@@ -30,6 +22,8 @@ def evaluate_with_seqeval(true_labels: List[list], predicted_labels: List[list])
     :param predicted_labels:
     :return:
     """
+    from seqeval.metrics import f1_score, accuracy_score
+
     tags = ["PER", "LOC", "CW", "GRP", "PROD", "CORP"]
 
     metrics2value = {"acc": accuracy_score(true_labels, predicted_labels),
@@ -53,6 +47,8 @@ def classification_f1_report(true_targets: List[list],
     :param tags:
     :return:
     """
+    from seqeval.metrics import classification_report
+
     report = classification_report(y_true=true_targets, y_pred=pred_targets)
     metric_names, metric_values = [], []
     for line in report.split("\n"):
@@ -3,13 +3,16 @@
     Complex NER Project:
 
 """
+from __future__ import annotations
 
 # ============================ Third Party libs ============================
 
 from copy import deepcopy
 from collections import namedtuple, defaultdict
+from typing import TYPE_CHECKING
 
-import pandas
+if TYPE_CHECKING:
+    import pandas
 
 Entity = namedtuple("Entity", "e_type start_offset end_offset")
 
@@ -361,7 +364,8 @@ def compute_precision_recall_f1_wrapper(results):
     return results
 
 
-def create_best_result_log(train_logs: dict, valid_logs: dict, test_logs: dict) -> pandas.DataFrame:
+def create_best_result_log(train_logs: dict, valid_logs: dict,
+                           test_logs: dict) -> pandas.DataFrame:
     """
 
     :param train_logs:
@@ -369,6 +373,8 @@ def create_best_result_log(train_logs: dict, valid_logs: dict, test_logs: dict)
     :param test_logs:
     :return:
     """
+    # pandas is only needed here, importing it at module level slows down importing evaluation
+    import pandas
 
     best_result_log = defaultdict(list)
     train_logs['name'] = 'train'
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        export the checkpoint forward pass to a standalone TorchScript or ONNX graph, or its
+        weights only to a safetensors file
+"""
+
+# ============================ Third Party libs ============================
+import logging
+
+# ============================ My packages ============================
+from configuration import BaseConfig
+from models import load_classifier
+from inference import export_model
+
+logging.basicConfig(level=logging.INFO)
+
+if __name__ == "__main__":
+    CONFIG_CLASS = BaseConfig()
+    CONFIG = CONFIG_CLASS.get_config()
+    assert CONFIG.exported_model_path, "exported_model_path is not set"
+
+    MODEL = load_classifier(CONFIG.checkpoint_path, map_location="cpu")
+    export_model(MODEL, CONFIG.exported_model_path, export_format=CONFIG.export_format)
+    logging.info("{} model is saved to {}".format(CONFIG.export_format,
+                                                   CONFIG.exported_model_path))
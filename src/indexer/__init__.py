@@ -10,3 +10,4 @@
 
 from .indexer import Indexer
 from .token_indexer import TokenIndexer
+from .label_schema import LabelSchema, LABEL_SCHEMA_FILE
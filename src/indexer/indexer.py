@@ -10,6 +10,8 @@ import os
 from typing import List
 from abc import abstractmethod
 
+import numpy
+
 # =============================== My packages ==============================
 from data_loader import write_json, write_text
 
@@ -19,6 +21,7 @@ class Indexer:
         self.vocabs = vocabs
         self._vocab2idx = None
         self._idx2vocab = None
+        self._lookup_tables = None
         self._unitize_vocabs()  # build unique vocab
 
     def get_vocab2idx(self) -> dict:
@@ -144,14 +147,109 @@ class Indexer:
                 indexed_samples[index][token_index] = self.get_word(token)
         return indexed_samples
 
+    def _get_lookup_tables(self) -> dict:
+        """
+        method to build (once per vocab2idx/idx2vocab) lookup tables for bulk conversion
+
+        Returns:
+            dictionary of sorted vocabs, their indexes and index to vocab table
+
+        """
+        vocab2idx, idx2vocab = self.get_vocab2idx(), self.get_idx2vocab()
+        if self._lookup_tables is None or self._lookup_tables["vocab2idx"] is not vocab2idx \
+                or self._lookup_tables["idx2vocab"] is not idx2vocab:
+            sorted_vocabs = numpy.array(sorted(vocab2idx), dtype=str)
+            idx2vocab_table = numpy.full(max(idx2vocab) + 1, None, dtype=object)
+            idx2vocab_table[list(idx2vocab.keys())] = list(idx2vocab.values())
+            self._lookup_tables = {
+                "vocab2idx": vocab2idx, "idx2vocab": idx2vocab,
+                "sorted_vocabs": sorted_vocabs,
+                "sorted_indexes": numpy.array([vocab2idx[vocab] for vocab in sorted_vocabs],
+                                              dtype=numpy.int64),
+                "idx2vocab_table": idx2vocab_table}
+        return self._lookup_tables
+
+    def _handle_missing_indexes(self, tokens: numpy.ndarray, indexes: numpy.ndarray,
+                                found: numpy.ndarray) -> numpy.ndarray:
+        """
+        method to handle tokens which are not in vocab2idx in bulk conversion
+
+        Args:
+            tokens: input tokens
+            indexes: converted indexes
+            found: False for tokens which are not in vocab2idx
+
+        Returns:
+            converted indexes
+        """
+        raise KeyError("tokens are not in vocab2idx: {}".format(
+            sorted(set(tokens[~found].tolist()))))
+
+    def _handle_missing_tokens(self, indexes: numpy.ndarray, tokens: numpy.ndarray,
+                               found: numpy.ndarray) -> numpy.ndarray:
+        """
+        method to handle indexes which are not in idx2vocab in bulk conversion
+
+        Args:
+            indexes: input indexes
+            tokens: converted tokens
+            found: False for indexes which are not in idx2vocab
+
+        Returns:
+            converted tokens
+        """
+        raise KeyError("indexes are not in idx2vocab: {}".format(
+            sorted(set(indexes[~found].tolist()))))
+
+    def convert_samples_to_index_array(self, tokenized_samples) -> numpy.ndarray:
+        """
+        Method to convert a padded batch of tokens to an index array in one vectorized call
+
+        Args:
+            tokenized_samples: padded tokenized samples (list of same length lists or array)
+
+        Returns:
+            int64 array of indexes with the same shape as tokenized_samples
+        """
+        tables = self._get_lookup_tables()
+        tokens = numpy.asarray(tokenized_samples, dtype=str)
+        sorted_vocabs = tables["sorted_vocabs"]
+        positions = numpy.minimum(numpy.searchsorted(sorted_vocabs, tokens),
+                                  len(sorted_vocabs) - 1)
+        indexes = tables["sorted_indexes"][positions]
+        found = sorted_vocabs[positions] == tokens
+        if not found.all():
+            indexes = self._handle_missing_indexes(tokens, indexes, found)
+        return indexes
+
+    def convert_index_array_to_samples(self, indexed_samples) -> numpy.ndarray:
+        """
+        Method to convert an index array to tokens in one vectorized call
+
+        Args:
+            indexed_samples: padded indexed samples (list of same length lists or array)
+
+        Returns:
+            object array of tokens with the same shape as indexed_samples
+        """
+        table = self._get_lookup_tables()["idx2vocab_table"]
+        indexes = numpy.asarray(indexed_samples, dtype=numpy.int64)
+        in_range = (indexes >= 0) & (indexes < len(table))
+        tokens = table[numpy.where(in_range, indexes, 0)]
+        found = in_range & numpy.not_equal(tokens, None)
+        if not found.all():
+            tokens = self._handle_missing_tokens(indexes, tokens, found)
+        return tokens
+
     def _unitize_vocabs(self) -> None:
         """
-        initialized created vocabs
+        initialized created vocabs, duplicates are removed and the first occurrence order is
+        kept, so indexes do not change between runs
 
         Returns:
             None
         """
-        self.vocabs = list(set(self.vocabs))
+        self.vocabs = list(dict.fromkeys(self.vocabs))
 
     def save(self, path) -> None:
         """
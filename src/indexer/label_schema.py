@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        indexer:
+            label_schema
+"""
+
+# ============================ Third Party libs ============================
+import hashlib
+import struct
+from typing import Iterable
+
+# =============================== My packages ==============================
+from .indexer import Indexer
+
+LABEL_SCHEMA_VERSION = 1
+LABEL_SCHEMA_FILE = "label_schema.bin"
+_MAGIC = b"NERLS"
+_HEADER = struct.Struct("<5sB20s")
+
+
+class LabelSchema:
+    """
+    Frozen, ordered list of tags. The position of a tag is its index, and the content hash
+    identifies the schema, so caches and exported models can check they use the same ids.
+    """
+
+    def __init__(self, tags: Iterable[str], version: int = LABEL_SCHEMA_VERSION):
+        tags = tuple(tags)
+        assert len(set(tags)) == len(tags), "Tags of label schema should be unique"
+        self._tags = tags
+        self._version = version
+        self._digest = hashlib.sha1(self._payload(tags, version)).digest()
+
+    @staticmethod
+    def _payload(tags: tuple, version: int) -> bytes:
+        return bytes([version]) + "\0".join(tags).encode("utf8")
+
+    @classmethod
+    def from_tags(cls, tags: Iterable[str]) -> "LabelSchema":
+        """
+        method to build schema from (repeated) tags of data in a canonical (sorted) order
+
+        Args:
+            tags: tags of data
+
+        Returns:
+            LabelSchema object
+
+        """
+        return cls(sorted(set(tags)))
+
+    @classmethod
+    def from_idx2tag(cls, idx2tag: dict) -> "LabelSchema":
+        """
+        method to build schema from index to tag dictionary of a model
+
+        Args:
+            idx2tag: index to tag dictionary (indexes may be strings, as in json), indexes
+                should be 0 to len(idx2tag) - 1
+
+        Returns:
+            LabelSchema object
+
+        """
+        idx2tag = {int(idx): tag for idx, tag in idx2tag.items()}
+        assert set(idx2tag) == set(range(len(idx2tag))), "idx2tag indexes should be contiguous"
+        return cls(idx2tag[idx] for idx in range(len(idx2tag)))
+
+    @property
+    def tags(self) -> tuple:
+        return self._tags
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def content_hash(self) -> str:
+        return self._digest.hex()
+
+    @property
+    def tag2idx(self) -> dict:
+        return {tag: idx for idx, tag in enumerate(self._tags)}
+
+    @property
+    def idx2tag(self) -> dict:
+        return dict(enumerate(self._tags))
+
+    def __len__(self):
+        return len(self._tags)
+
+    def __eq__(self, other):
+        return isinstance(other, LabelSchema) and self._digest == other._digest
+
+    def __hash__(self):
+        return hash(self._digest)
+
+    def to_indexer(self) -> Indexer:
+        """
+        method to create Indexer which uses the schema ids
+
+        Returns:
+            Indexer object
+
+        """
+        indexer = Indexer(vocabs=list(self._tags))
+        indexer.build_vocab2idx()
+        indexer.build_idx2vocab()
+        assert indexer.get_vocab2idx() == self.tag2idx
+        return indexer
+
+    def save(self, path: str) -> None:
+        """
+        Method to save schema in binary format
+
+        Args:
+            path: file path
+
+        Returns:
+            None
+        """
+        with open(path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, self._version, self._digest))
+            file.write("\0".join(self._tags).encode("utf8"))
+
+    @classmethod
+    def load(cls, path: str) -> "LabelSchema":
+        """
+        Method to load schema saved with save
+
+        Args:
+            path: file path
+
+        Returns:
+            LabelSchema object
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, digest = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise Exception("{} is not a label schema file".format(path))
+        payload = data[_HEADER.size:]
+        schema = cls(payload.decode("utf8").split("\0") if payload else (), version=version)
+        if schema._digest != digest:
+            raise Exception("label schema {} is corrupted".format(path))
+        return schema
@@ -4,6 +4,9 @@
         indexer:
             index
 """
+# ============================ Third Party libs ============================
+import numpy
+
 # =============================== My packages ==============================
 from .indexer import Indexer
 
@@ -75,3 +78,37 @@ class TokenIndexer(Indexer):
         self._idx2vocab[self.unk_index] = "<UNK>"
         for vocab in self.vocabs:
             self._idx2vocab[len(self._idx2vocab)] = vocab
+
+    def _handle_missing_indexes(self, tokens: numpy.ndarray, indexes: numpy.ndarray,
+                                found: numpy.ndarray) -> numpy.ndarray:
+        """
+        method to map tokens which are not in vocab2idx to unk index
+
+        Args:
+            tokens: input tokens
+            indexes: converted indexes
+            found: False for tokens which are not in vocab2idx
+
+        Returns:
+            converted indexes
+
+        """
+        indexes[~found] = self._vocab2idx["<UNK>"]
+        return indexes
+
+    def _handle_missing_tokens(self, indexes: numpy.ndarray, tokens: numpy.ndarray,
+                               found: numpy.ndarray) -> numpy.ndarray:
+        """
+        method to map indexes which are not in idx2vocab to unk token
+
+        Args:
+            indexes: input indexes
+            tokens: converted tokens
+            found: False for indexes which are not in idx2vocab
+
+        Returns:
+            converted tokens
+
+        """
+        tokens[~found] = self._idx2vocab[self.unk_index]
+        return tokens
@@ -4,4 +4,15 @@
         Make the importing much shorter
 """
 
-from .inference import Inference
+from utils.lazy_import import lazy_import
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    **dict.fromkeys(["Inference", "build_inference_dataloader"], ".inference"),
+    **dict.fromkeys(["quantize_model", "save_quantized_model", "load_quantized_model",
+                     "load_or_quantize_model"], ".quantization"),
+    "benchmark_inference": ".benchmark",
+    **dict.fromkeys(["ExportWrapper", "export_model"], ".export"),
+    **dict.fromkeys(["ExportedModel", "load_exported_model"], ".runtime"),
+    **dict.fromkeys(["export_weights", "read_weights", "load_weights_only_model"], ".weights"),
+    **dict.fromkeys(["export_adapter", "load_adapter_model"], ".adapters"),
+})
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        inference:
+            adapters.py
+"""
+
+# ============================ Third Party libs ============================
+from typing import List
+
+import torch
+
+# ============================ My packages ============================
+from data_preparation import model_fingerprint
+from models.complex_ner_model import Classifier
+from models.lora import AdapterBank, read_adapter, save_adapter
+from .weights import dump_hyper_parameters, load_hyper_parameters
+
+
+def export_adapter(model: Classifier, path: str, language: str) -> None:
+    """
+    function to save low rank adapters and head of a Classifier trained with lora_rank as a
+    small per language artifact. The fingerprint of the base T5 is saved with it, so adapters
+    of different base models are not mixed.
+
+    Args:
+        model: Classifier with LoRA adapters
+        path: file path
+        language: adapter name
+
+    Returns:
+        None
+
+    """
+    assert model.lora_rank, "model has no LoRA adapters"
+    save_adapter(model, path, metadata={
+        "language": language, "hyper_parameters": dump_hyper_parameters(model),
+        "base_model": model_fingerprint(model.config.language_model_path)})
+
+
+def load_adapter_model(paths: List[str], device="cpu") -> AdapterBank:
+    """
+    function to load per language adapters over one shared base T5 (loaded once from
+    language_model_path of the adapters). Adapters should use the same tags and be trained
+    on the T5 which is loaded, otherwise ValueError is raised.
+
+    Args:
+        paths: adapter files saved with export_adapter
+        device: device of model
+
+    Returns:
+        AdapterBank of the model in eval mode, the first adapter is active
+
+    """
+    adapters = [read_adapter(path) for path in paths]
+    _, metadata = adapters[0]
+    for _, other_metadata in adapters[1:]:
+        if other_metadata["base_model"] != metadata["base_model"]:
+            raise ValueError("adapter of {} uses another base model than adapter of {}".format(
+                other_metadata["language"], metadata["language"]))
+        if other_metadata["hyper_parameters"]["idx2tag"] != \
+                metadata["hyper_parameters"]["idx2tag"]:
+            raise ValueError("adapter of {} uses other tags than adapter of {}".format(
+                other_metadata["language"], metadata["language"]))
+
+    hyper_parameters = load_hyper_parameters(metadata["hyper_parameters"])
+    hyper_parameters["t5_config"] = None
+    language_model_path = hyper_parameters["config"].language_model_path
+    if model_fingerprint(language_model_path) != metadata["base_model"]:
+        raise ValueError("adapters were trained on another base model than {}".format(
+            language_model_path))
+    model = Classifier(**hyper_parameters).eval().to(torch.device(device))
+
+    adapter_bank = AdapterBank(model)
+    for tensors, adapter_metadata in adapters:
+        adapter_bank.add(adapter_metadata["language"], tensors)
+    adapter_bank.activate(metadata["language"])
+    return adapter_bank
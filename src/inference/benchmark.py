@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        inference:
+            benchmark.py
+"""
+
+# ============================ Third Party libs ============================
+import time
+from typing import List
+
+# ============================ My packages ============================
+from evaluation import evaluate_with_seqeval
+
+
+def benchmark_inference(infer, dataloader, batches: List[list], subtoken_checks: List[list],
+                        labels: List[list], device="cpu") -> dict:
+    """
+    function to predict every sample of dataloader and report seqeval metrics and latency
+
+    Args:
+        infer: Inference object
+        dataloader: DataLoader (see build_inference_dataloader)
+        batches: sample indexes of each batch
+        subtoken_checks: subtoken check of each sample
+        labels: true labels of each sample
+        device: device of model
+
+    Returns:
+        dictionary of metric name to value
+
+    """
+    start_time = time.perf_counter()
+    predicted_labels = infer.predict_samples(dataloader, batches, subtoken_checks,
+                                             device=device)
+    seconds = time.perf_counter() - start_time
+
+    metrics2value = {name: float(value) for name, value in
+                     evaluate_with_seqeval(labels, predicted_labels).items()}
+    metrics2value.update(seconds=seconds, sentences_per_second=len(labels) / seconds)
+    return metrics2value
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        inference:
+            export.py
+"""
+
+# ============================ Third Party libs ============================
+import importlib.util
+
+import torch
+
+# ============================ My packages ============================
+from data_loader import write_json
+
+EXPORT_FORMATS = ("torchscript", "onnx", "safetensors")
+
+
+class ExportWrapper(torch.nn.Module):
+    """
+    Classifier forward pass (T5 encoder, EncoderLayer and output layer) on plain tensors,
+    without the LightningModule, so it can be traced
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.t5_model = model.t5_model
+        self.enc_layer = model.enc_layer
+        self.output_layer = model.output_layer
+
+    def forward(self, input_ids, attention_mask):
+        mt5_tokens = self.t5_model(input_ids=input_ids,
+                                   attention_mask=attention_mask).last_hidden_state
+        enc_out = self.enc_layer(mt5_tokens, src_mask=attention_mask.type(torch.uint8))
+        return self.output_layer(enc_out)
+
+
+def _sample_inputs(vocab_size: int) -> tuple:
+    # two samples of different lengths, batch and sequence axes stay dynamic
+    input_ids = torch.randint(2, vocab_size, (2, 8))
+    attention_mask = torch.ones(2, 8, dtype=torch.long)
+    attention_mask[1, 5:] = 0
+    return input_ids, attention_mask
+
+
+def export_model(model, path: str, export_format: str = "torchscript") -> None:
+    """
+    function to export Classifier forward pass to a standalone TorchScript or ONNX graph
+    with dynamic batch and sequence axes. idx2tag and pad_token are saved in path + ".json"
+    for the runtime loader (see load_exported_model). "safetensors" saves the weights only
+    (see export_weights). ONNX export needs the optional onnx package.
+
+    Args:
+        model: Classifier
+        path: graph file path
+        export_format: "torchscript", "onnx" or "safetensors"
+
+    Returns:
+        None
+
+    """
+    assert export_format in EXPORT_FORMATS, \
+        "export_format should be one of {}".format(EXPORT_FORMATS)
+    if export_format == "safetensors":
+        from .weights import export_weights
+
+        export_weights(model, path)
+        return
+    if export_format == "onnx" and importlib.util.find_spec("onnx") is None:
+        raise ImportError("ONNX export needs the onnx package (pip install onnx)")
+    wrapper = ExportWrapper(model.to("cpu").eval()).eval()
+    sample_inputs = _sample_inputs(model.t5_model.config.vocab_size)
+    with torch.no_grad():
+        if export_format == "torchscript":
+            traced_model = torch.jit.freeze(torch.jit.trace(wrapper, sample_inputs,
+                                                            check_trace=False))
+            torch.jit.save(traced_model, path)
+        else:
+            # TorchScript based exporter, the dynamo exporter needs onnxscript
+            torch.onnx.export(wrapper, sample_inputs, path, dynamo=False,
+                              input_names=["input_ids", "attention_mask"],
+                              output_names=["logits"],
+                              dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                                            "attention_mask": {0: "batch", 1: "sequence"},
+                                            "logits": {0: "batch", 1: "sequence"}})
+    write_json(data={"export_format": export_format,
+                     "idx2tag": {int(idx): tag for idx, tag in model.hparams["idx2tag"].items()},
+                     "pad_token": model.hparams["pad_token"]},
+               path=path + ".json")
@@ -7,13 +7,62 @@
 
 # ============================ Third Party libs ============================
 from typing import List
+import logging
 import numpy
+import torch
+from torch.utils.data import DataLoader
+
+# ============================ My packages ============================
+from data_preparation import create_test_samples, batch_create_test_samples, \
+    build_subword_cache
+from dataset import InferenceDataset, build_batch_sampler, build_loader_kwargs, \
+    collate_dynamic_padding
+from indexer import LabelSchema
+from utils import handle_subtoken_labels, convert_x_label_to_true_label, progress_bar
+
+
+def build_inference_dataloader(tokens: List[list], tokenizer, config):
+    """
+    function to tokenize sentences and create a DataLoader over batches of similar length
+    sentences (by sentence count or by token budget)
+
+    :param tokens: words of each sentence
+    :param tokenizer: tokenizer object
+    :param config: config with batch_size, max_tokens and DataLoader worker arguments
+    :return: dataloader, sample indexes of each batch and subtoken check of each sample
+    """
+    if tokenizer.is_fast:
+        sentences, subtoken_checks = batch_create_test_samples(tokens, tokenizer)
+    else:
+        word_cache = build_subword_cache(config, tokenizer)
+        sentences, subtoken_checks = create_test_samples(tokens, tokenizer,
+                                                         word_cache=word_cache)
+        if word_cache is not None:
+            logging.debug("Subword cache: {}".format(word_cache.stats()))
+
+    dataset = InferenceDataset(texts=sentences, subtoken_checks=subtoken_checks,
+                               tokenizer=tokenizer,
+                               max_length=max(len(sentence) for sentence in sentences))
+
+    batches = list(build_batch_sampler(dataset.lengths(), batch_size=config.batch_size,
+                                       max_tokens=config.max_tokens))
+    dataloader = DataLoader(dataset, batch_sampler=batches, collate_fn=collate_dynamic_padding,
+                            **build_loader_kwargs(num_workers=config.num_workers,
+                                                  pin_memory=config.pin_memory,
+                                                  prefetch_factor=config.prefetch_factor))
+    return dataloader, batches, subtoken_checks
 
 
 class Inference:
-    def __init__(self, model, tokenizer):
+    def __init__(self, model, tokenizer, label_schema=None, precision: str = "32"):
         self.model = model
         self.tokenizer = tokenizer
+        # "bf16" runs the model in bfloat16 autocast
+        self.precision = precision
+        # ids of label schema artifact are used instead of the checkpoint hparams
+        self.idx2tag = label_schema.idx2tag if label_schema is not None \
+            else self.model.hparams["idx2tag"]
+        self.target_indexer = LabelSchema.from_idx2tag(self.idx2tag).to_indexer()
 
     def tokenizing_sentences(self, sentence: str, max_length: int):
         inputs = self.tokenizer.encode_plus(
@@ -29,17 +78,45 @@ class Inference:
         return inputs
 
     def predict(self, inputs):
-        outputs = self.model(inputs)
-        outputs = numpy.argmax(outputs.cpu().detach().numpy(), axis=2)
+        device_type = inputs["input_ids"].device.type
+        with torch.inference_mode(), torch.autocast(device_type=device_type, dtype=torch.bfloat16,
+                                                    enabled=self.precision == "bf16"):
+            outputs = self.model(inputs)
+        outputs = numpy.argmax(outputs.float().cpu().numpy(), axis=2)
         return list(outputs)
 
+    def predict_samples(self, dataloader, batches: List[list], subtoken_checks: List[list],
+                        device="cpu") -> List[list]:
+        """
+        method to predict word labels of every sample of dataloader
+
+        :param dataloader: DataLoader over InferenceDataset which uses batches as batch_sampler
+        :param batches: sample indexes of each batch
+        :param subtoken_checks: subtoken check of each sample
+        :param device: device of model
+        :return: predicted labels in the original sample order
+        """
+        predicted_labels = [None] * len(dataloader.dataset)
+        for i_batch, (batch_indexes, sample_batched) in enumerate(zip(batches, dataloader)):
+            sample_batched["input_ids"] = sample_batched["input_ids"].to(device)
+            sample_batched["attention_mask"] = sample_batched["attention_mask"].to(device)
+            outputs = self.predict(sample_batched)
+
+            for sample_index, sample_output in zip(batch_indexes, outputs):
+                entities = self.convert_ids_to_entities([sample_output])
+                entities = handle_subtoken_labels(entities, subtoken_checks[sample_index])
+                predicted_labels[sample_index] = convert_x_label_to_true_label(entities, "X")
+
+            progress_bar(i_batch, len(dataloader), "testing ....")
+        return predicted_labels
+
     def convert_ids_to_entities(self, predicted_tags: List[list]) -> List[list]:
         """
 
         :param predicted_tags: [[ t1, t2, ..., tn][t1, t2, ..., tn]]
         :return:
         """
-        outputs = [self.model.hparams["idx2tag"][tag] for tag in predicted_tags[0]]
+        outputs = self.target_indexer.convert_index_array_to_samples(predicted_tags[0]).tolist()
         # outputs = [[self.model.hparams["idx2tag"][tag] for tag in item]
         #            for item in predicted_tags]
         return outputs
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        inference:
+            quantization.py
+"""
+
+# ============================ Third Party libs ============================
+import copy
+import os
+
+import torch
+
+# ============================ My packages ============================
+from models.complex_ner_model import Classifier, load_classifier
+from .weights import dump_hyper_parameters, load_hyper_parameters
+
+
+def quantize_model(model: Classifier) -> Classifier:
+    """
+    function to apply dynamic int8 quantization to every linear layer of model (T5 blocks,
+    attention and feedforward layers of enc_layer and output_layer). Weights are stored in
+    int8 and activations are quantized on the fly, so it only runs on cpu. model itself is
+    not changed (it keeps its device and train/eval mode).
+
+    Args:
+        model: fp32 Classifier
+
+    Returns:
+        quantized copy of model in eval mode
+
+    """
+    return _quantize_linear_layers(copy.deepcopy(model))
+
+
+def _quantize_linear_layers(model: Classifier) -> Classifier:
+    """
+    function to quantize linear layers of model in place (see quantize_model)
+
+    Args:
+        model: fp32 Classifier, it is moved to cpu and changed
+
+    Returns:
+        model in eval mode
+
+    """
+    return torch.ao.quantization.quantize_dynamic(model.to("cpu").eval(), {torch.nn.Linear},
+                                                  dtype=torch.qint8, inplace=True)
+
+
+def save_quantized_model(model: Classifier, path: str) -> None:
+    """
+    function to save quantized model weights with the hyper parameters and T5 config to
+    rebuild it
+
+    Args:
+        model: quantized Classifier (see quantize_model)
+        path: file path
+
+    Returns:
+        None
+
+    """
+    torch.save({"hyper_parameters": dump_hyper_parameters(model),
+                "state_dict": model.state_dict()}, path)
+
+
+def load_quantized_model(path: str) -> Classifier:
+    """
+    function to load model saved with save_quantized_model, the fp32 structure is created
+    from the saved T5 config (without loading pretrained weights), quantized and then the
+    int8 weights are loaded
+
+    Args:
+        path: file path
+
+    Returns:
+        quantized Classifier in eval mode
+
+    """
+    artifact = torch.load(path, map_location="cpu")
+    model = _quantize_linear_layers(
+        Classifier(**load_hyper_parameters(artifact["hyper_parameters"])))
+    model.load_state_dict(artifact["state_dict"])
+    return model
+
+
+def load_or_quantize_model(checkpoint_path: str, quantized_model_path: str) -> Classifier:
+    """
+    function to load quantized model or, if it does not exist, quantize the fp32 checkpoint
+    and save it
+
+    Args:
+        checkpoint_path: fp32 Classifier checkpoint
+        quantized_model_path: quantized model artifact path
+
+    Returns:
+        quantized Classifier in eval mode
+
+    """
+    if os.path.isfile(quantized_model_path):
+        return load_quantized_model(quantized_model_path)
+    model = _quantize_linear_layers(load_classifier(checkpoint_path, map_location="cpu"))
+    save_quantized_model(model, quantized_model_path)
+    return model
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        inference:
+            runtime.py
+"""
+
+# ============================ Third Party libs ============================
+import torch
+
+# ============================ My packages ============================
+from data_loader import read_json
+
+
+class ExportedModel:
+    """
+    Runtime for graphs created by export_model, it runs with torch only (TorchScript) or
+    onnxruntime (ONNX) and can be used as model of Inference
+    """
+
+    def __init__(self, path: str, num_threads: int = 0):
+        meta = read_json(path + ".json")
+        self.hparams = {"idx2tag": {int(idx): tag for idx, tag in meta["idx2tag"].items()},
+                        "pad_token": meta["pad_token"]}
+        self.export_format = meta["export_format"]
+        if self.export_format == "onnx":
+            try:
+                import onnxruntime
+            except ImportError as error:
+                raise ImportError("ONNX graphs run with the onnxruntime package "
+                                  "(pip install onnxruntime)") from error
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = num_threads
+            self.session = onnxruntime.InferenceSession(path, sess_options=options,
+                                                        providers=["CPUExecutionProvider"])
+        else:
+            self.graph = torch.jit.load(path, map_location="cpu")
+
+    def __call__(self, batch: dict) -> torch.Tensor:
+        if self.export_format == "onnx":
+            logits, = self.session.run(["logits"], {
+                "input_ids": batch["input_ids"].cpu().numpy(),
+                "attention_mask": batch["attention_mask"].cpu().numpy()})
+            return torch.from_numpy(logits)
+        return self.graph(batch["input_ids"], batch["attention_mask"])
+
+
+def load_exported_model(path: str, num_threads: int = 0) -> ExportedModel:
+    """
+    function to load graph exported with export_model
+
+    Args:
+        path: graph file path
+        num_threads: number of onnxruntime intra-op threads (0: onnxruntime default)
+
+    Returns:
+        ExportedModel object
+
+    """
+    return ExportedModel(path, num_threads=num_threads)
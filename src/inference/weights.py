@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        inference:
+            weights.py
+"""
+
+# ============================ Third Party libs ============================
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+
+import torch
+from safetensors.torch import save_file
+
+# ============================ My packages ============================
+from models.complex_ner_model import Classifier
+
+_DTYPES = {"F64": torch.float64, "F32": torch.float32, "F16": torch.float16,
+           "BF16": torch.bfloat16, "I64": torch.int64, "I32": torch.int32, "I16": torch.int16,
+           "I8": torch.int8, "U8": torch.uint8, "BOOL": torch.bool}
+
+
+def dump_hyper_parameters(model: Classifier) -> dict:
+    """
+    function to get json serializable Classifier arguments, with the T5 config needed to
+    rebuild the architecture
+
+    Args:
+        model: Classifier
+
+    Returns:
+        hyper parameters dictionary
+
+    """
+    hyper_parameters = dict(model.hparams)
+    hyper_parameters["config"] = vars(model.config)
+    hyper_parameters["t5_config"] = model.t5_model.config.to_dict()
+    return hyper_parameters
+
+
+def load_hyper_parameters(hyper_parameters: dict) -> dict:
+    """
+    function to convert hyper parameters created by dump_hyper_parameters back to
+    Classifier arguments
+
+    Args:
+        hyper_parameters: hyper parameters dictionary
+
+    Returns:
+        Classifier arguments
+
+    """
+    hyper_parameters = dict(hyper_parameters)
+    hyper_parameters["config"] = argparse.Namespace(**hyper_parameters["config"])
+    hyper_parameters["idx2tag"] = {int(idx): tag for idx, tag in
+                                   hyper_parameters["idx2tag"].items()}
+    return hyper_parameters
+
+
+def export_weights(model: Classifier, path: str) -> None:
+    """
+    function to save model weights (without optimizer state) in safetensors format with the
+    hyper parameters and T5 config needed to rebuild the architecture. Tied weights are
+    saved once.
+
+    Args:
+        model: Classifier
+        path: file path
+
+    Returns:
+        None
+
+    """
+    tensors, aliases, data_ptrs = {}, {}, {}
+    for name, tensor in model.state_dict().items():
+        if tensor.data_ptr() in data_ptrs:
+            aliases[name] = data_ptrs[tensor.data_ptr()]
+        else:
+            data_ptrs[tensor.data_ptr()] = name
+            tensors[name] = tensor.detach().cpu().contiguous()
+
+    save_file(tensors, path, metadata={"hyper_parameters": json.dumps(
+        dump_hyper_parameters(model), default=str), "aliases": json.dumps(aliases)})
+
+
+def read_weights(path: str) -> [dict, dict]:
+    """
+    function to memory map tensors of a safetensors file. The file is mapped copy on write
+    and tensors are views of the mapping (torch.frombuffer), so they are not copied and
+    processes that load the same file share its pages. safetensors safe_open copies every
+    tensor it returns, so the header is parsed here. It is checked against the file size, a
+    truncated file or a malformed header raises ValueError.
+
+    Args:
+        path: file path
+
+    Returns:
+        tensors dictionary and metadata
+
+    """
+    with open(path, "rb") as file:
+        file_size = os.fstat(file.fileno()).st_size
+        if file_size < 8:
+            raise ValueError("{} is not a safetensors file, it has {} bytes".format(
+                path, file_size))
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_size, = struct.unpack_from("<Q", buffer)
+    if 8 + header_size > file_size:
+        raise ValueError("{} is truncated, its header needs {} bytes".format(path, header_size))
+    try:
+        header = json.loads(buffer[8: 8 + header_size])
+    except ValueError as error:
+        raise ValueError("{} has a malformed header".format(path)) from error
+    metadata = header.pop("__metadata__", {})
+    data_size = file_size - 8 - header_size
+    tensors = {}
+    for name, info in header.items():
+        start, end = info["data_offsets"]
+        if info["dtype"] not in _DTYPES:
+            raise ValueError("{} of {} has unknown dtype {}".format(name, path, info["dtype"]))
+        dtype = _DTYPES[info["dtype"]]
+        if not 0 <= start <= end <= data_size or \
+                end - start != math.prod(info["shape"]) * dtype.itemsize:
+            raise ValueError("{} of {} does not fit in the file (file is truncated or its "
+                             "header is malformed)".format(name, path))
+        tensors[name] = torch.frombuffer(buffer, dtype=dtype,
+                                         count=(end - start) // dtype.itemsize,
+                                         offset=8 + header_size + start).view(info["shape"])
+    return tensors, metadata
+
+
+def load_weights_only_model(path: str, device="cpu") -> Classifier:
+    """
+    function to load model saved with export_weights. The architecture is created on the
+    meta device (no pretrained weights and no initialization) and the memory mapped tensors
+    are assigned to it, so weights are read once.
+
+    Args:
+        path: file path
+        device: device of model, tensors are copied when it is not cpu
+
+    Returns:
+        Classifier in eval mode
+
+    """
+    tensors, metadata = read_weights(path)
+    for name, alias in json.loads(metadata["aliases"]).items():
+        tensors[name] = tensors[alias]
+
+    with torch.device("meta"):
+        model = Classifier(**load_hyper_parameters(json.loads(metadata["hyper_parameters"])))
+    model.load_state_dict(tensors, assign=True)
+    return model.eval().to(device)
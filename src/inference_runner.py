@@ -6,20 +6,18 @@
 # ============================ Third Party libs ============================
 import os
 import copy
+import itertools
 import pickle as pkl
-from torch.utils.data import DataLoader
 import transformers
 import logging
 
 # ============================ My packages ============================
 from configuration import BaseConfig
-from data_loader import read_text
-from models.complex_ner_model import Classifier
-from dataset import InferenceDataset
-from data_preparation import prepare_conll_data, create_test_samples
-from utils import find_max_length_in_list, handle_subtoken_labels, convert_x_label_to_true_label, \
-    progress_bar
-from inference import Inference
+from data_loader import read_text_lines
+from data_preparation import iter_conll_data
+from utils import setup_device
+from inference import Inference, build_inference_dataloader, load_exported_model
+from indexer import LabelSchema, LABEL_SCHEMA_FILE
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -29,56 +27,70 @@ if __name__ == "__main__":
 
     logging.debug("test file : {}".format(CONFIG.dev_data))
 
-    MODEL_PATH = "../assets/saved_models/english/version_1/checkpoints/" \
-                 "QTag-epoch=00-val_loss=1.85.ckpt"
-
-    MODEL = Classifier.load_from_checkpoint(MODEL_PATH, map_location="cuda:1")
-    MODEL.eval().to("cuda:1")
-
-    TOKENIZER = transformers.MT5Tokenizer.from_pretrained(CONFIG.language_model_tokenizer_path)
-
-    # load raw data
-    RAW_DATA = read_text(path=os.path.join(CONFIG.processed_data_dir, CONFIG.dev_data))
-
-    TOKENS, LABELS = prepare_conll_data(RAW_DATA)
-    TOKENS = TOKENS[:10]
-    LABELS = LABELS[:10]
+    DEVICE = setup_device(CONFIG.device, num_threads=CONFIG.num_threads,
+                          num_interop_threads=CONFIG.num_interop_threads,
+                          cpu_cores=CONFIG.cpu_cores)
+
+    if CONFIG.exported_model_path:
+        # standalone graph, the model code (pytorch lightning, T5 modeling) is only imported
+        # by the other branches
+        assert DEVICE.type == "cpu", "exported model runs on cpu"
+        MODEL = load_exported_model(CONFIG.exported_model_path, num_threads=CONFIG.num_threads)
+    elif CONFIG.adapter_paths:
+        from inference import load_adapter_model
+
+        # one shared T5, adapters of other languages can be activated in place
+        ADAPTER_BANK = load_adapter_model(CONFIG.adapter_paths, device=DEVICE)
+        MODEL = ADAPTER_BANK.activate(CONFIG.model_name)
+    elif CONFIG.weights_path:
+        from inference import load_weights_only_model
+
+        MODEL = load_weights_only_model(CONFIG.weights_path, device=DEVICE)
+    elif CONFIG.quantize:
+        assert DEVICE.type == "cpu", "quantized model only runs on cpu"
+        assert CONFIG.precision == "32", "quantized model does not run in bf16 autocast"
+        from inference import load_or_quantize_model
+
+        MODEL = load_or_quantize_model(CONFIG.checkpoint_path, CONFIG.quantized_model_path)
+    else:
+        from models import load_classifier
+
+        MODEL = load_classifier(CONFIG.checkpoint_path, map_location=DEVICE)
+        MODEL.eval().to(DEVICE)
+
+    TOKENIZER_CLASS = transformers.MT5TokenizerFast if CONFIG.fast_tokenizer \
+        else transformers.MT5Tokenizer
+    TOKENIZER = TOKENIZER_CLASS.from_pretrained(CONFIG.language_model_tokenizer_path)
+
+    # stream raw data
+    RAW_DATA = read_text_lines(path=os.path.join(CONFIG.processed_data_dir, CONFIG.dev_data))
+
+    SAMPLES = list(itertools.islice(iter_conll_data(RAW_DATA), 10))
+    TOKENS = [tokens for tokens, _ in SAMPLES]
+    LABELS = [tags for _, tags in SAMPLES]
     TOKEN_ = copy.copy(TOKENS)
 
-    SENTENCES, SUBTOKEN_CHECKS = create_test_samples(TOKEN_, TOKENIZER)
-    SEN_MAX_LENGTH = find_max_length_in_list(SENTENCES)
-
-    INFER = Inference(MODEL, TOKENIZER)
-
-    DATASET = InferenceDataset(texts=SENTENCES, subtoken_checks=SUBTOKEN_CHECKS,
-                               tokenizer=TOKENIZER, max_length=SEN_MAX_LENGTH)
+    # batches of similar length sentences, by sentence count or by token budget
+    DATALOADER, BATCHES, SUBTOKEN_CHECKS = build_inference_dataloader(TOKEN_, TOKENIZER, CONFIG)
 
-    DATALOADER = DataLoader(DATASET, batch_size=1,
-                            shuffle=False, num_workers=4)
+    # frozen label schema written by the trainer, its ids should match the model output layer
+    LABEL_SCHEMA = LabelSchema.load(os.path.join(CONFIG.assets_dir, LABEL_SCHEMA_FILE))
+    assert {int(idx): tag for idx, tag in MODEL.hparams["idx2tag"].items()} == \
+        LABEL_SCHEMA.idx2tag, "label schema does not match the model"
 
-    FILE = open("tr.pred.conll", "w")
+    INFER = Inference(MODEL, TOKENIZER, label_schema=LABEL_SCHEMA, precision=CONFIG.precision)
 
-    PREDICTED_LABELS = []
-    for i_batch, sample_batched in enumerate(DATALOADER):
-        sample_batched["input_ids"] = sample_batched["input_ids"].to("cuda:1")
-        sample_batched["attention_mask"] = sample_batched["attention_mask"].to("cuda:1")
-        OUTPUT = INFER.predict(sample_batched)
+    PREDICTED_LABELS = INFER.predict_samples(DATALOADER, BATCHES, SUBTOKEN_CHECKS, device=DEVICE)
+    for ENTITIES, LABEL in zip(PREDICTED_LABELS, LABELS):
+        assert len(ENTITIES) == len(LABEL), f"{len(LABEL)}, {len(ENTITIES)}"
 
-        ENTITIES = INFER.convert_ids_to_entities(OUTPUT)
-
-        ENTITIES = handle_subtoken_labels(ENTITIES, SUBTOKEN_CHECKS[i_batch])
-
-        ENTITIES = convert_x_label_to_true_label(ENTITIES, "X")
-        assert len(ENTITIES) == len(LABELS[i_batch]), f"{len(LABELS[i_batch])}, {len(ENTITIES)}"
-
-        PREDICTED_LABELS.append(ENTITIES)
-
-        for entity in ENTITIES:
-            FILE.write(entity.strip())
+    # write predictions in the original sentence order
+    with open("tr.pred.conll", "w") as FILE:
+        for ENTITIES in PREDICTED_LABELS:
+            for entity in ENTITIES:
+                FILE.write(entity.strip())
+                FILE.write("\n")
             FILE.write("\n")
-        FILE.write("\n")
-
-        progress_bar(i_batch, len(DATALOADER), "testing ....")
 
     DATA = [TOKENS, LABELS, PREDICTED_LABELS]
     with open("preds.pkl", "wb") as file:
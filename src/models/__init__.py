@@ -4,4 +4,14 @@
         Make the importing much shorter
 """
 
-from .helper import build_checkpoint_callback, add_metric_to_log_dic
+from utils.lazy_import import lazy_import
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    "build_checkpoint_callback": ".helper",
+    "build_trainer": ".helper",
+    "add_metric_to_log_dic": ".helper",
+    "load_classifier": ".complex_ner_model",
+    **dict.fromkeys(["LoRALinear", "AdapterBank", "add_lora_adapters", "merge_lora_adapters",
+                     "adapter_state_dict", "save_adapter", "read_adapter"], ".lora"),
+    **dict.fromkeys(["distillation_loss", "TeacherCallback"], ".distillation"),
+})
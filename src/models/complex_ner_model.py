@@ -6,7 +6,9 @@
 """
 
 # ============================ Third Party libs ============================
+import argparse
 import torch
+import torch.utils.checkpoint
 import pytorch_lightning as pl
 import transformers
 import numpy as np
@@ -14,37 +16,104 @@ from typing import List
 from seqeval.metrics import f1_score, accuracy_score, classification_report
 
 # ============================ My packages ============================
-from utils import ignore_pad_index, convert_index_to_tag
+from utils import ignore_pad_index, reset_peak_memory, peak_memory_mb
 from evaluation import Evaluator
+from indexer import LabelSchema
 from .helper import add_metric_to_log_dic
 from models.transformer import EncoderLayer
+from models.lora import add_lora_adapters, is_adapter_key, LORA_TARGETS
+from models.distillation import distillation_loss
 
 
 class Classifier(pl.LightningModule):
-    def __init__(self, idx2tag: dict, tag2idx: dict, pad_token: str, config):
+    def __init__(self, idx2tag: dict, tag2idx: dict, pad_token: str, config,
+                 t5_config: dict = None):
+        """
+        :param config: argparse.Namespace or dictionary of config values
+        :param t5_config: T5 config dictionary, when it is set T5 is created from it without
+            loading pretrained weights (weights are loaded later, see load_weights_only_model)
+        """
         super().__init__()
+        if isinstance(config, dict):
+            config = argparse.Namespace(**config)
         self.config = config
         self.idx2tag = idx2tag
         self.tag2idx = tag2idx
         self.pad_token = pad_token
+        # bulk index to tag conversion of evaluation
+        self.target_indexer = LabelSchema.from_idx2tag(idx2tag).to_indexer()
 
         self.tags = self.extract_tags()
 
-        self.t5_model = transformers.T5EncoderModel.from_pretrained(
-            config.language_model_path)
+        if t5_config is None:
+            self.t5_model = transformers.T5EncoderModel.from_pretrained(
+                config.language_model_path)
+        else:
+            self.t5_model = transformers.T5EncoderModel(transformers.T5Config.from_dict(t5_config))
 
         transformer_input_dim = self.t5_model.config.hidden_size
         self.enc_layer = EncoderLayer(hid_dim=transformer_input_dim,
                                       n_heads=8, pf_dim=transformer_input_dim * 2,
-                                      dropout=config.dropout)
+                                      dropout=config.dropout,
+                                      attention_impl=getattr(config, "attention_impl", "sdpa"))
 
         self.output_layer = torch.nn.Linear(in_features=transformer_input_dim,
                                             out_features=len(self.idx2tag))
 
+        # recompute activations of T5 blocks and enc_layer in backward instead of storing them
+        self.gradient_checkpointing = getattr(config, "gradient_checkpointing", False)
+        if self.gradient_checkpointing:
+            self.t5_model.gradient_checkpointing_enable(
+                gradient_checkpointing_kwargs={"use_reentrant": False})
+
+        # low rank adapters on a frozen T5, only adapters and head are trained and saved
+        self.lora_rank = getattr(config, "lora_rank", 0)
+        if self.lora_rank:
+            self.t5_model.requires_grad_(False)
+            add_lora_adapters(self.t5_model, rank=self.lora_rank,
+                              alpha=getattr(config, "lora_alpha", 16),
+                              dropout=getattr(config, "lora_dropout", 0.0),
+                              targets=getattr(config, "lora_targets", None) or LORA_TARGETS)
+
+        # head only training on cached T5 features (see prepare_feature_data)
+        self.feature_cache = getattr(config, "feature_cache", False)
+        assert not (self.feature_cache and self.lora_rank), \
+            "cached T5 features can not train T5 adapters"
+        if self.feature_cache:
+            self.t5_model.requires_grad_(False)
+
         self.dropout = torch.nn.Dropout(config.dropout)
 
         self.criterion = torch.nn.CrossEntropyLoss(ignore_index=self.tag2idx[self.pad_token])
-        self.save_hyperparameters()
+        # config is saved as a dict, so checkpoints only hold plain types and load with
+        # torch weights only unpickling (the default of torch.load)
+        self.save_hyperparameters({"idx2tag": idx2tag, "tag2idx": tag2idx,
+                                   "pad_token": pad_token, "config": vars(config),
+                                   "t5_config": t5_config})
+
+    def _encode(self, batch):
+        """
+        method to run encoders, the attention mask is used in both T5 and enc_layer.
+        For packed batches (see collate_packed) tokens only attend to tokens of their own
+        sample with a block diagonal mask built from segment_ids.
+        If the batch has cached T5 outputs ("features", see FeatureDataset) T5 is skipped.
+        :param batch:
+        :return: [batch_size, seq_len, hid_dim]
+        """
+        attn_masks = batch["attention_mask"]
+        if "segment_ids" in batch:
+            segment_ids = batch["segment_ids"]
+            attn_masks = segment_ids[:, :, None] == segment_ids[:, None, :]
+        if "features" in batch:
+            mt5_tokens = batch["features"]
+        else:
+            mt5_tokens = self.t5_model(input_ids=batch["input_ids"],
+                                       attention_mask=attn_masks).last_hidden_state
+        if self.gradient_checkpointing and self.training:
+            return torch.utils.checkpoint.checkpoint(self.enc_layer, mt5_tokens,
+                                                     attn_masks.type(torch.uint8),
+                                                     use_reentrant=False)
+        return self.enc_layer(mt5_tokens, src_mask=attn_masks.type(torch.uint8))
 
     def forward(self, batch, labels=None):
         """
@@ -53,10 +122,30 @@ class Classifier(pl.LightningModule):
         :param labels:
         :return:
         """
-        attn_masks = batch["attention_mask"].type(torch.uint8)
-        mt5_tokens = self.t5_model(input_ids=batch["input_ids"]).last_hidden_state
-        enc_out = self.enc_layer(mt5_tokens, src_mask=attn_masks)
-        return self.output_layer(enc_out)
+        return self.output_layer(self._encode(batch))
+
+    def forward_non_pad(self, batch):
+        """
+        forward method which computes logits (and gathers targets) of non pad positions only
+        :param batch:
+        :return: logits [n_non_pad, n_tags], targets [n_non_pad], lengths of samples
+        """
+        enc_out = self._gather_non_pad(batch, self._encode(batch))
+        targets = self._gather_non_pad(batch, batch["target"])
+        lengths = batch["segment_lengths"] if "segment_lengths" in batch \
+            else batch["attention_mask"].sum(dim=1)
+        return self.output_layer(enc_out), targets, lengths.tolist()
+
+    @staticmethod
+    def _gather_non_pad(batch, tensor: torch.Tensor) -> torch.Tensor:
+        """
+        method to gather non pad positions of a [batch_size, seq_len, ...] tensor
+        :param batch:
+        :param tensor:
+        :return: [n_non_pad, ...]
+        """
+        non_pad_indexes = batch["attention_mask"].reshape(-1).nonzero(as_tuple=True)[0]
+        return tensor.reshape(-1, *tensor.shape[2:]).index_select(0, non_pad_indexes)
 
     def extract_tags(self):
         """
@@ -69,21 +158,27 @@ class Classifier(pl.LightningModule):
         return list(tags)
 
     def _convert_pred_indexes_to_entities(self, true_indexes: torch.Tensor,
-                                          pred_indexes: torch.Tensor) -> [List[list], List[list]]:
+                                          pred_indexes: torch.Tensor,
+                                          lengths: List[int]) -> [List[list], List[list]]:
         """
 
-        :param true_indexes:
-        :param pred_indexes:
+        :param true_indexes: [n_non_pad]
+        :param pred_indexes: [n_non_pad, n_tags]
+        :param lengths: number of non pad positions of each sample
         :return:
         """
         # Transfer logits and labels to CPU
         true_indexes = true_indexes.detach().cpu().numpy()
-        pred_indexes = pred_indexes.detach().cpu().numpy()
-        pred_indexes = [list(p) for p in np.argmax(pred_indexes, axis=2)]
+        pred_indexes = pred_indexes.detach().argmax(dim=-1).cpu().numpy()
 
         # convert predicted and true index to their tags
-        true_entities = convert_index_to_tag(data=true_indexes, idx2tag=self.idx2tag)
-        pred_entities = convert_index_to_tag(data=pred_indexes, idx2tag=self.idx2tag)
+        true_entities = self.target_indexer.convert_index_array_to_samples(true_indexes).tolist()
+        pred_entities = self.target_indexer.convert_index_array_to_samples(pred_indexes).tolist()
+
+        # split flat tags to samples
+        offsets = np.cumsum([0] + lengths)
+        true_entities = [true_entities[start:end] for start, end in zip(offsets, offsets[1:])]
+        pred_entities = [pred_entities[start:end] for start, end in zip(offsets, offsets[1:])]
 
         # ignore predicted and true pad item
         true_entities, pred_entities = ignore_pad_index(true_labels=true_entities,
@@ -98,13 +193,25 @@ class Classifier(pl.LightningModule):
         :param _:
         :return:
         """
-        outputs = self.forward(batch)
-        loss = self.criterion(outputs.view(-1, outputs.shape[-1]), batch["target"].view(-1))
+        outputs, targets, lengths = self.forward_non_pad(batch)
+        loss = self.criterion(outputs, targets)
+
+        # knowledge distillation, teacher logits come from TeacherCallback or a cache
+        distillation_metrics = {}
+        if "teacher_logits" in batch:
+            alpha = getattr(self.config, "distillation_alpha", 0.5)
+            kd_loss = distillation_loss(outputs, self._gather_non_pad(batch,
+                                                                      batch["teacher_logits"]),
+                                        temperature=getattr(self.config,
+                                                            "distillation_temperature", 1.0))
+            distillation_metrics = {"train_ce_loss": loss, "train_kd_loss": kd_loss}
+            loss = (1 - alpha) * loss + alpha * kd_loss
 
         true_targets, pred_targets = self._convert_pred_indexes_to_entities(
-            true_indexes=batch["target"], pred_indexes=outputs)
+            true_indexes=targets, pred_indexes=outputs, lengths=lengths)
 
-        metrics2value = {"train_loss": loss,
+        metrics2value = {**distillation_metrics,
+                         "train_loss": loss,
                          "train_accuracy": accuracy_score(true_targets, pred_targets),
                          "train_f1": f1_score(true_targets, pred_targets)}
 
@@ -116,7 +223,29 @@ class Classifier(pl.LightningModule):
 
         self.log_dict(metrics2value, on_step=False, on_epoch=True, prog_bar=True, logger=True)
 
-        return {"loss": loss, "predictions": outputs, "labels": batch["target"]}
+        return {"loss": loss, "predictions": outputs, "labels": targets}
+
+    def on_train_batch_start(self, batch, batch_idx):
+        if getattr(self.config, "log_peak_memory", False):
+            self._start_memory_mb = reset_peak_memory(self.device)
+
+    def on_train_batch_end(self, outputs, batch, batch_idx):
+        if getattr(self.config, "log_peak_memory", False):
+            # cpu has no per step peak, it logs the resident memory change of the step
+            name = "peak_memory_mb" if self.device.type == "cuda" else "rss_delta_mb"
+            self.log(name, peak_memory_mb(self.device, self._start_memory_mb), on_step=True,
+                     on_epoch=False, prog_bar=True, logger=True)
+
+    def on_save_checkpoint(self, checkpoint: dict) -> None:
+        if self.lora_rank:
+            # frozen T5 weights are loaded from language_model_path, keep adapters and head
+            checkpoint["state_dict"] = {name: tensor for name, tensor in
+                                        checkpoint["state_dict"].items()
+                                        if is_adapter_key(name)}
+
+    def on_load_checkpoint(self, checkpoint: dict) -> None:
+        if self.lora_rank:
+            checkpoint["state_dict"] = {**self.state_dict(), **checkpoint["state_dict"]}
 
     def validation_step(self, batch: dict, _):
         """
@@ -125,11 +254,11 @@ class Classifier(pl.LightningModule):
         :param _:
         :return:
         """
-        outputs = self.forward(batch)
-        loss = self.criterion(outputs.view(-1, outputs.shape[-1]), batch["target"].view(-1))
+        outputs, targets, lengths = self.forward_non_pad(batch)
+        loss = self.criterion(outputs, targets)
 
         true_targets, pred_targets = self._convert_pred_indexes_to_entities(
-            true_indexes=batch["target"], pred_indexes=outputs)
+            true_indexes=targets, pred_indexes=outputs, lengths=lengths)
 
         metrics2value = {"val_loss": loss,
                          "val_accuracy": accuracy_score(true_targets, pred_targets),
@@ -152,11 +281,11 @@ class Classifier(pl.LightningModule):
         :param _:
         :return:
         """
-        outputs = self.forward(batch)
-        loss = self.criterion(outputs.view(-1, outputs.shape[-1]), batch["target"].view(-1))
+        outputs, targets, lengths = self.forward_non_pad(batch)
+        loss = self.criterion(outputs, targets)
 
         true_targets, pred_targets = self._convert_pred_indexes_to_entities(
-            true_indexes=batch["target"], pred_indexes=outputs)
+            true_indexes=targets, pred_indexes=outputs, lengths=lengths)
 
         metrics2value = {"test_loss": loss,
                          "test_accuracy": accuracy_score(true_targets, pred_targets),
@@ -196,10 +325,35 @@ class Classifier(pl.LightningModule):
         configure_optimizers method to config optimizer
         :return
         """
-        optimizer = transformers.AdamW(self.parameters(), lr=self.config.lr)
+        parameters = [parameter for parameter in self.parameters() if parameter.requires_grad]
+        if getattr(self.config, "optimizer", "adamw") == "adafactor":
+            # factored second moments, much less optimizer state than AdamW
+            optimizer = transformers.Adafactor(parameters, lr=self.config.lr,
+                                               scale_parameter=False, relative_step=False,
+                                               warmup_init=False)
+        else:
+            optimizer = transformers.AdamW(parameters, lr=self.config.lr)
         # warmup_steps = self.config.steps_per_epoch // 3
         # total_steps = self.config.steps_per_epoch * self.config.n_epochs - warmup_steps
         # scheduler = transformers.get_linear_schedule_with_warmup(
         #     optimizer, warmup_steps, total_steps
         # )
         return [optimizer]  # , [scheduler]
+
+
+def load_classifier(checkpoint_path: str, map_location="cpu") -> Classifier:
+    """
+    function to load Classifier checkpoint written by pl.Trainer. Checkpoints written before
+    config was saved as a dict hold an argparse.Namespace, it is allowed for torch weights
+    only unpickling.
+
+    Args:
+        checkpoint_path: checkpoint path
+        map_location: device of loaded tensors
+
+    Returns:
+        Classifier
+
+    """
+    with torch.serialization.safe_globals([argparse.Namespace]):
+        return Classifier.load_from_checkpoint(checkpoint_path, map_location=map_location)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        models:
+            distillation.py
+"""
+
+# ============================ Third Party libs ============================
+import torch
+import pytorch_lightning as pl
+
+
+def distillation_loss(student_logits: torch.Tensor, teacher_logits: torch.Tensor,
+                      temperature: float = 1.0) -> torch.Tensor:
+    """
+    function to compute token level KL(teacher || student) of temperature softened
+    distributions, scaled by temperature ** 2 so its gradients keep their size
+
+    Args:
+        student_logits: [n_tokens, n_tags]
+        teacher_logits: [n_tokens, n_tags]
+        temperature: softmax temperature
+
+    Returns:
+        mean KL divergence over tokens
+
+    """
+    return torch.nn.functional.kl_div(
+        torch.log_softmax(student_logits.float() / temperature, dim=-1),
+        torch.log_softmax(teacher_logits.float() / temperature, dim=-1),
+        reduction="batchmean", log_target=True) * temperature ** 2
+
+
+class TeacherCallback(pl.Callback):
+    """
+    Callback that runs a trained (frozen) teacher Classifier on each train batch and adds its
+    logits to the batch as "teacher_logits", see Classifier.training_step. The teacher is not
+    part of the student, so it is not saved in student checkpoints.
+    """
+
+    def __init__(self, teacher: pl.LightningModule):
+        super().__init__()
+        self.teacher = teacher.eval().requires_grad_(False)
+
+    def on_train_batch_start(self, trainer, pl_module, batch, batch_idx):
+        if self.teacher.device != pl_module.device:
+            self.teacher.to(pl_module.device)
+        with torch.no_grad():
+            batch["teacher_logits"] = self.teacher(batch)
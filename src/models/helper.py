@@ -6,11 +6,15 @@
 """
 
 # ============================ Third Party libs ============================
+import pytorch_lightning as pl
 from pytorch_lightning.callbacks import ModelCheckpoint
 
+# ============================ My packages ============================
+from utils import build_trainer_device_kwargs
+
 
 def build_checkpoint_callback(save_top_k: int, filename="QTag-{epoch:02d}-{val_loss:.2f}",
-                              monitor="val_loss", mode="min"):
+                              monitor="val_loss", mode="min", dirpath: str = None):
     """
     function to build checkpoint callback
     Args:
@@ -18,6 +22,7 @@ def build_checkpoint_callback(save_top_k: int, filename="QTag-{epoch:02d}-{val_l
         filename: the name that checkpoint is saved.
         monitor: how to monitor val loss
         mode: mode of the monitored quantity for optimization
+        dirpath: checkpoint directory (default: checkpoints directory of the trainer logger)
 
     Returns:
         callback of checkpoint
@@ -29,10 +34,29 @@ def build_checkpoint_callback(save_top_k: int, filename="QTag-{epoch:02d}-{val_l
         filename=filename,
         save_top_k=save_top_k,  # save the top k models
         mode=mode,  # mode of the monitored quantity for optimization
+        dirpath=dirpath,
     )
     return checkpoint_callback
 
 
+def build_trainer(config, device, callbacks: list = None, logger=False) -> pl.Trainer:
+    """
+    function to build the pytorch lightning Trainer used by the training scripts
+    Args:
+        config: config object (n_epochs and precision are used)
+        device: torch device (see setup_device)
+        callbacks: list of callbacks
+        logger: pytorch lightning logger, False disables logging
+
+    Returns:
+        Trainer
+
+    """
+    return pl.Trainer(max_epochs=config.n_epochs,
+                      **build_trainer_device_kwargs(device, config.precision),
+                      callbacks=callbacks, logger=logger)
+
+
 def add_metric_to_log_dic(log_dict: dict, results_agg: dict, tags: list) -> dict:
     """
 
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        models:
+            lora.py
+"""
+
+# ============================ Third Party libs ============================
+import json
+import math
+from typing import List
+
+import torch
+from safetensors import safe_open
+from safetensors.torch import load_file, save_file
+
+# T5 attention (q, k, v, o) and feed forward (wi, wi_0, wi_1, wo) projections
+LORA_TARGETS = ("q", "k", "v", "o", "wi", "wi_0", "wi_1", "wo")
+
+
+class LoRALinear(torch.nn.Module):
+    """
+    Linear layer with a trainable low rank update: base(x) + (dropout(x) @ A^T @ B^T) * scale.
+    B starts at zero, so the layer starts as the (frozen) base layer.
+    """
+
+    def __init__(self, base: torch.nn.Linear, rank: int, alpha: float = 16,
+                 dropout: float = 0.0):
+        super().__init__()
+        self.base = base
+        self.rank = rank
+        self.scaling = alpha / rank
+        self.lora_A = torch.nn.Parameter(torch.empty(rank, base.in_features,
+                                                     device=base.weight.device))
+        self.lora_B = torch.nn.Parameter(torch.zeros(base.out_features, rank,
+                                                     device=base.weight.device))
+        torch.nn.init.kaiming_uniform_(self.lora_A, a=math.sqrt(5))
+        self.dropout = torch.nn.Dropout(dropout)
+
+    @property
+    def weight(self):
+        # T5 layers check the dtype of their projection weights
+        return self.base.weight
+
+    def forward(self, inputs: torch.Tensor) -> torch.Tensor:
+        update = self.dropout(inputs) @ self.lora_A.t().to(inputs.dtype)
+        return self.base(inputs) + (update @ self.lora_B.t().to(inputs.dtype)) * self.scaling
+
+    def merged_linear(self) -> torch.nn.Linear:
+        """
+        method to create a plain linear layer with the low rank update added to its weight
+
+        Returns:
+            linear layer
+
+        """
+        linear = torch.nn.Linear(self.base.in_features, self.base.out_features,
+                                 bias=self.base.bias is not None,
+                                 device=self.base.weight.device, dtype=self.base.weight.dtype)
+        with torch.no_grad():
+            linear.weight.copy_(self.base.weight + (self.lora_B @ self.lora_A) * self.scaling)
+            if self.base.bias is not None:
+                linear.bias.copy_(self.base.bias)
+        return linear
+
+
+def add_lora_adapters(model: torch.nn.Module, rank: int, alpha: float = 16,
+                      dropout: float = 0.0, targets: List[str] = LORA_TARGETS) -> List[str]:
+    """
+    function to replace the linear layers named in targets with LoRALinear layers
+
+    Args:
+        model: model (ex: T5EncoderModel)
+        rank: rank of low rank updates
+        alpha: scale of low rank updates is alpha / rank
+        dropout: dropout on the input of low rank updates
+        targets: attribute names of linear layers to adapt
+
+    Returns:
+        names of adapted layers
+
+    """
+    names = [name for name, module in model.named_modules()
+             if isinstance(module, torch.nn.Linear) and name.rsplit(".", 1)[-1] in targets]
+    for name in names:
+        parent_name, _, child_name = name.rpartition(".")
+        parent = model.get_submodule(parent_name)
+        setattr(parent, child_name, LoRALinear(getattr(parent, child_name), rank=rank,
+                                               alpha=alpha, dropout=dropout))
+    return names
+
+
+def merge_lora_adapters(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    function to fold low rank updates into their base layers (in place), the merged model has
+    no adapter overhead but adapters can no longer be swapped
+
+    Args:
+        model: model with LoRALinear layers
+
+    Returns:
+        model
+
+    """
+    names = [name for name, module in model.named_modules() if isinstance(module, LoRALinear)]
+    for name in names:
+        parent_name, _, child_name = name.rpartition(".")
+        parent = model.get_submodule(parent_name)
+        setattr(parent, child_name, getattr(parent, child_name).merged_linear())
+    return model
+
+
+def is_adapter_key(name: str, base_prefix: str = "t5_model.") -> bool:
+    """
+    function to check whether a state dict key belongs to the adapter (low rank updates and
+    every layer outside the shared base model)
+
+    Args:
+        name: state dict key
+        base_prefix: state dict prefix of the shared base model
+
+    Returns:
+        True for adapter keys
+
+    """
+    return "lora_" in name or not name.startswith(base_prefix)
+
+
+def adapter_state_dict(model: torch.nn.Module, base_prefix: str = "t5_model.") -> dict:
+    """
+    function to get the adapter part of model state dict
+
+    Args:
+        model: model with LoRALinear layers
+        base_prefix: state dict prefix of the shared base model
+
+    Returns:
+        adapter state dict
+
+    """
+    return {name: tensor for name, tensor in model.state_dict().items()
+            if is_adapter_key(name, base_prefix)}
+
+
+def save_adapter(model: torch.nn.Module, path: str, metadata: dict = None,
+                 base_prefix: str = "t5_model.") -> None:
+    """
+    function to save the adapter part of model in safetensors format
+
+    Args:
+        model: model with LoRALinear layers
+        path: file path
+        metadata: json serializable information saved with tensors
+        base_prefix: state dict prefix of the shared base model
+
+    Returns:
+        None
+
+    """
+    tensors = {name: tensor.detach().cpu().contiguous()
+               for name, tensor in adapter_state_dict(model, base_prefix).items()}
+    save_file(tensors, path, metadata={name: json.dumps(value, default=str)
+                                       for name, value in (metadata or {}).items()})
+
+
+def read_adapter(path: str) -> [dict, dict]:
+    """
+    function to load adapter saved with save_adapter
+
+    Args:
+        path: file path
+
+    Returns:
+        tensors dictionary and metadata
+
+    """
+    with safe_open(path, framework="pt") as file:
+        metadata = {name: json.loads(value) for name, value in (file.metadata() or {}).items()}
+    return load_file(path), metadata
+
+
+class AdapterBank:
+    """
+    Per language adapters over one shared base model. Adapters are small, so all of them are
+    kept in memory and activating one copies its tensors into the model in place.
+    """
+
+    def __init__(self, model: torch.nn.Module, base_prefix: str = "t5_model."):
+        self.model = model
+        self.base_prefix = base_prefix
+        self.adapters = {}
+        self.active = None
+
+    def add(self, language: str, tensors: dict) -> None:
+        """
+        method to register adapter of a language
+
+        Args:
+            language: adapter name
+            tensors: adapter state dict (see read_adapter)
+
+        Returns:
+            None
+
+        """
+        model_state = adapter_state_dict(self.model, self.base_prefix)
+        assert tensors.keys() == model_state.keys(), \
+            "adapter of {} does not match the model".format(language)
+        for name, tensor in tensors.items():
+            assert tensor.shape == model_state[name].shape, \
+                "adapter of {} does not match the model: {}".format(language, name)
+        self.adapters[language] = {name: tensor.to(model_state[name].device)
+                                   for name, tensor in tensors.items()}
+
+    def activate(self, language: str) -> torch.nn.Module:
+        """
+        method to copy adapter of a language into the model
+
+        Args:
+            language: adapter name
+
+        Returns:
+            model
+
+        """
+        if language != self.active:
+            model_state = self.model.state_dict()
+            with torch.no_grad():
+                for name, tensor in self.adapters[language].items():
+                    model_state[name].copy_(tensor)
+            self.active = language
+        return self.model
@@ -9,28 +9,36 @@
 import torch
 
 
+def _fp32_layer_norm(layer_norm: torch.nn.LayerNorm, inputs: torch.Tensor) -> torch.Tensor:
+    # layer norm (and the residual stream) stays in fp32 in bf16 autocast too
+    with torch.autocast(device_type=inputs.device.type, enabled=False):
+        return layer_norm(inputs.float())
+
+
 class EncoderLayer(torch.nn.Module):
-    def __init__(self, hid_dim, n_heads, pf_dim, dropout):
+    def __init__(self, hid_dim, n_heads, pf_dim, dropout, attention_impl="sdpa"):
         super().__init__()
 
         self.self_attn_layer_norm = torch.nn.LayerNorm(hid_dim)
         self.ff_layer_norm = torch.nn.LayerNorm(hid_dim)
-        self.self_attention = MultiHeadAttentionLayer(hid_dim, n_heads, dropout)
+        self.self_attention = MultiHeadAttentionLayer(hid_dim, n_heads, dropout,
+                                                      attention_impl=attention_impl)
         self.positionwise_feedforward = PositionwiseFeedforwardLayer(hid_dim, pf_dim, dropout)
         self.dropout = torch.nn.Dropout(dropout)
 
     def forward(self, src, src_mask):
         # src = [batch_size, src_len, hid_dim]
-        # src_mask = [batch_size, 1, 1, src_len]
+        # src_mask = [batch_size, src_len] or [batch_size, src_len, src_len] (block diagonal)
         src_mask = src_mask.unsqueeze(1)
-        src_mask = src_mask.unsqueeze(2)
-        # src_mask = [batch_size, 1, 1, src_len]
+        if src_mask.dim() == 3:
+            src_mask = src_mask.unsqueeze(2)
+        # src_mask = [batch_size, 1, 1, src_len] or [batch_size, 1, src_len, src_len]
 
         # self attention
         _src, _ = self.self_attention(src, src, src, src_mask)
 
         # dropout, residual connection and layer norm
-        src = self.self_attn_layer_norm(src + self.dropout(_src))
+        src = _fp32_layer_norm(self.self_attn_layer_norm, src + self.dropout(_src))
 
         # src = [batch_size, src_len, hid_dim]
 
@@ -38,7 +46,7 @@ class EncoderLayer(torch.nn.Module):
         _src = self.positionwise_feedforward(src)
 
         # dropout, residual and layer norm
-        src = self.ff_layer_norm(src + self.dropout(_src))
+        src = _fp32_layer_norm(self.ff_layer_norm, src + self.dropout(_src))
 
         # src = [batch size, src len, hid dim]
 
@@ -48,37 +56,60 @@ class EncoderLayer(torch.nn.Module):
 class MultiHeadAttentionLayer(torch.nn.Module):
     """
     MultiHeadAttentionLayer
+
+    attention_impl="sdpa" uses the fused torch scaled_dot_product_attention kernel,
+    attention_impl="reference" computes (and can return) the attention matrix explicitly.
+    Query, key and value are projected with one fused linear layer.
     """
 
-    def __init__(self, hid_dim, n_heads, dropout):
+    ATTENTION_IMPLS = ("sdpa", "reference")
+
+    def __init__(self, hid_dim, n_heads, dropout, attention_impl="sdpa"):
         super().__init__()
 
         assert hid_dim % n_heads == 0
+        assert attention_impl in self.ATTENTION_IMPLS, \
+            "attention_impl should be one of {}".format(self.ATTENTION_IMPLS)
 
         self.hid_dim = hid_dim
         self.n_heads = n_heads
         self.head_dim = hid_dim // n_heads
+        self.attention_impl = attention_impl
 
-        self.fc_q = torch.nn.Linear(hid_dim, hid_dim)
-        self.fc_k = torch.nn.Linear(hid_dim, hid_dim)
-        self.fc_v = torch.nn.Linear(hid_dim, hid_dim)
+        # weights of query, key and value projections in one matrix
+        self.fc_qkv = torch.nn.Linear(hid_dim, 3 * hid_dim)
 
         self.fc_o = torch.nn.Linear(hid_dim, hid_dim)
 
         self.dropout = torch.nn.Dropout(dropout)
 
-        self.scale = torch.sqrt(torch.FloatTensor([self.head_dim])).to("cuda:1")
-
-    def forward(self, query, key, value, mask=None):
+        self.scale = self.head_dim ** 0.5
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # checkpoints saved before fusing have separate fc_q, fc_k and fc_v layers
+        for param in ("weight", "bias"):
+            names = [prefix + "fc_{}.{}".format(item, param) for item in "qkv"]
+            if all(name in state_dict for name in names):
+                state_dict[prefix + "fc_qkv." + param] = torch.cat(
+                    [state_dict.pop(name) for name in names])
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
+    def _project(self, query, key, value):
+        if query is key and key is value:
+            return self.fc_qkv(query).chunk(3, dim=-1)
+        weights = self.fc_qkv.weight.chunk(3)
+        biases = self.fc_qkv.bias.chunk(3)
+        return [torch.nn.functional.linear(inputs, weight, bias)
+                for inputs, weight, bias in zip((query, key, value), weights, biases)]
+
+    def forward(self, query, key, value, mask=None, need_weights=False):
         batch_size = query.shape[0]
 
         # query = [batch_size, query_len, hid_dim]
         # key = [batch_size, key_len, hid_dim]
         # value = [batch_size, value_len, hid_dim]
 
-        query = self.fc_q(query)
-        key = self.fc_k(key)
-        value = self.fc_v(value)
+        query, key, value = self._project(query, key, value)
 
         # query = [batch_size, query_len, hid_dim]
         # key = [batch_size, key_len, hid_dim]
@@ -92,18 +123,13 @@ class MultiHeadAttentionLayer(torch.nn.Module):
         # key = [batch_size, n_heads, key_len, head_dim]
         # value = [batch_size, n_heads, value_len, head_dim]
 
-        energy = torch.matmul(query, key.permute(0, 1, 3, 2)) / self.scale
-
-        # energy = [batch_size, n_heads, query_len, key_len]
-
-        if mask is not None:
-            energy = energy.masked_fill(mask == 0, -1e10)
-
-        attention = torch.softmax(energy, dim=-1)
-
-        # attention = [batch_size, n_heads, query_len, key_len]
-
-        context = torch.matmul(self.dropout(attention), value)
+        if self.attention_impl == "sdpa" and not need_weights:
+            context = torch.nn.functional.scaled_dot_product_attention(
+                query, key, value, attn_mask=None if mask is None else mask.bool(),
+                dropout_p=self.dropout.p if self.training else 0.0)
+            attention = None
+        else:
+            context, attention = self._reference_attention(query, key, value, mask)
 
         # context = [batch_size, n_heads, query_len, head_dim]
 
@@ -121,6 +147,20 @@ class MultiHeadAttentionLayer(torch.nn.Module):
 
         return context, attention
 
+    def _reference_attention(self, query, key, value, mask):
+        energy = torch.matmul(query, key.permute(0, 1, 3, 2)) / self.scale
+
+        # energy = [batch_size, n_heads, query_len, key_len]
+
+        if mask is not None:
+            energy = energy.masked_fill(mask == 0, -1e10)
+
+        attention = torch.softmax(energy.float(), dim=-1).type_as(value)
+
+        # attention = [batch_size, n_heads, query_len, key_len]
+
+        return torch.matmul(self.dropout(attention), value), attention
+
 
 class PositionwiseFeedforwardLayer(torch.nn.Module):
     """
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        preprocess every language directory into cached shards with a process pool
+"""
+
+# ============================ Third Party libs ============================
+import os
+import glob
+import time
+import logging
+from transformers import T5Tokenizer, T5TokenizerFast
+
+# ============================ My packages ============================
+from configuration import BaseConfig
+from data_preparation import prepare_training_data, load_cached_training_data, \
+    create_tokenize_pool
+
+logging.basicConfig(level=logging.INFO)
+
+
+def find_language_files(data_dir: str, language: str) -> [str, str]:
+    """
+    function to find train and dev conll files of a language directory
+
+    Args:
+        data_dir: processed data directory
+        language: language directory name (ex: EN-English)
+
+    Returns:
+        train and dev file paths relative to data_dir
+
+    """
+    train_files = sorted(glob.glob(os.path.join(data_dir, language, "*_train.conll*")))
+    dev_files = sorted(glob.glob(os.path.join(data_dir, language, "*_dev.conll*")))
+    assert train_files and dev_files, "{} needs *_train.conll and *_dev.conll".format(language)
+    return os.path.relpath(train_files[0], data_dir), os.path.relpath(dev_files[0], data_dir)
+
+
+if __name__ == "__main__":
+    CONFIG_CLASS = BaseConfig()
+    CONFIG = CONFIG_CLASS.get_config()
+
+    TOKENIZER_CLASS = T5TokenizerFast if CONFIG.fast_tokenizer else T5Tokenizer
+    TOKENIZER = TOKENIZER_CLASS.from_pretrained(CONFIG.language_model_tokenizer_path)
+
+    LANGUAGES = CONFIG.languages or sorted(
+        item for item in os.listdir(CONFIG.processed_data_dir)
+        if glob.glob(os.path.join(CONFIG.processed_data_dir, item, "*_train.conll*")))
+    ASSETS_DIR = CONFIG.assets_dir
+
+    # one pool for all languages, each language is split into sentence chunks
+    with create_tokenize_pool(TOKENIZER, CONFIG.preprocess_workers or None,
+                              CONFIG.subword_cache_size) as POOL:
+        for LANGUAGE in LANGUAGES:
+            CONFIG.train_data, CONFIG.dev_data = find_language_files(CONFIG.processed_data_dir,
+                                                                     LANGUAGE)
+            CONFIG.assets_dir = os.path.join(ASSETS_DIR, LANGUAGE)
+            os.makedirs(CONFIG.assets_dir, exist_ok=True)
+
+            # a cache hit only reads shards, so it says nothing about tokenization throughput
+            N_TRAIN_SAMPLES = CONFIG.n_train_samples or None
+            if load_cached_training_data(CONFIG, TOKENIZER, mode="x_mode",
+                                         n_train_samples=N_TRAIN_SAMPLES) is not None:
+                logging.info("{}: cached shards are up to date".format(LANGUAGE))
+                continue
+
+            START_TIME = time.perf_counter()
+            DATA, _, _ = prepare_training_data(CONFIG, TOKENIZER, mode="x_mode",
+                                               n_train_samples=N_TRAIN_SAMPLES, pool=POOL)
+            ELAPSED_TIME = time.perf_counter() - START_TIME
+
+            N_SENTENCES = len(DATA["train_data"]["input_ids"]) + \
+                len(DATA["val_data"]["input_ids"])
+            logging.info("{}: {} sentences in {:.2f}s ({:.0f} sentences/s)".format(
+                LANGUAGE, N_SENTENCES, ELAPSED_TIME, N_SENTENCES / max(ELAPSED_TIME, 1e-9)))
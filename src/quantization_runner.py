@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        compare accuracy and latency of the fp32 checkpoint, bf16 autocast and the int8
+        quantized model on the dev set
+"""
+
+# ============================ Third Party libs ============================
+import os
+import copy
+import logging
+import transformers
+
+# ============================ My packages ============================
+from configuration import BaseConfig
+from data_loader import read_text_lines, write_json
+from models import load_classifier
+from data_preparation import iter_conll_data
+from utils import setup_device
+from inference import Inference, build_inference_dataloader, load_or_quantize_model, \
+    benchmark_inference
+
+logging.basicConfig(level=logging.INFO)
+
+if __name__ == "__main__":
+    CONFIG_CLASS = BaseConfig()
+    CONFIG = CONFIG_CLASS.get_config()
+
+    # quantized linear layers only run on cpu
+    DEVICE = setup_device("cpu", num_threads=CONFIG.num_threads,
+                          num_interop_threads=CONFIG.num_interop_threads,
+                          cpu_cores=CONFIG.cpu_cores)
+
+    MODELS = {"fp32": load_classifier(CONFIG.checkpoint_path, map_location=DEVICE).eval(),
+              "int8": load_or_quantize_model(CONFIG.checkpoint_path, CONFIG.quantized_model_path)}
+
+    TOKENIZER_CLASS = transformers.MT5TokenizerFast if CONFIG.fast_tokenizer \
+        else transformers.MT5Tokenizer
+    TOKENIZER = TOKENIZER_CLASS.from_pretrained(CONFIG.language_model_tokenizer_path)
+
+    SAMPLES = list(iter_conll_data(read_text_lines(
+        path=os.path.join(CONFIG.processed_data_dir, CONFIG.dev_data))))
+    LABELS = [tags for _, tags in SAMPLES]
+    DATALOADER, BATCHES, SUBTOKEN_CHECKS = build_inference_dataloader(
+        copy.copy([tokens for tokens, _ in SAMPLES]), TOKENIZER, CONFIG)
+
+    REPORT = {}
+    for NAME, MODEL, PRECISION in [("fp32", MODELS["fp32"], "32"), ("bf16", MODELS["fp32"], "bf16"),
+                                   ("int8", MODELS["int8"], "32")]:
+        REPORT[NAME] = benchmark_inference(Inference(MODEL, TOKENIZER, precision=PRECISION),
+                                           DATALOADER, BATCHES, SUBTOKEN_CHECKS, LABELS,
+                                           device=DEVICE)
+        logging.info("{}: f1 {:.4f}, {:.1f} sentences/s".format(
+            NAME, REPORT[NAME]["f1_score"], REPORT[NAME]["sentences_per_second"]))
+    REPORT["speedup"] = REPORT["int8"]["sentences_per_second"] / \
+        REPORT["fp32"]["sentences_per_second"]
+    REPORT["f1_drop"] = REPORT["fp32"]["f1_score"] - REPORT["int8"]["f1_score"]
+
+    write_json(data=REPORT, path=os.path.join(CONFIG.assets_dir, "quantization_report.json"))
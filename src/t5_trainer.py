@@ -6,24 +6,19 @@
 # ============================ Third Party libs ============================
 
 import os
-import copy
 import logging
-import pytorch_lightning as pl
 from pytorch_lightning.loggers import CSVLogger
 from pytorch_lightning.callbacks import EarlyStopping
-from transformers import T5Tokenizer
-import itertools
+from transformers import T5Tokenizer, T5TokenizerFast
 
 # ============================ My packages ============================
 from configuration import BaseConfig
-from data_loader import read_text, write_json
-from data_preparation import prepare_conll_data, tokenize_and_keep_labels, \
-    pad_sequence, truncate_sequence
-from indexer import Indexer
-from utils import find_max_length_in_list
-from models import build_checkpoint_callback
-from dataset import DataModule
+from data_loader import write_json
+from data_preparation import prepare_training_data, create_tokenize_pool
+from models import build_checkpoint_callback, build_trainer
+from dataset import DataModule, prepare_feature_data
 from models.complex_ner_model import Classifier
+from utils import setup_device
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -32,88 +27,62 @@ if __name__ == "__main__":
     CONFIG_CLASS = BaseConfig()
     CONFIG = CONFIG_CLASS.get_config()
 
+    DEVICE = setup_device(CONFIG.device, num_threads=CONFIG.num_threads,
+                          num_interop_threads=CONFIG.num_interop_threads,
+                          cpu_cores=CONFIG.cpu_cores)
+
     # create CSVLogger instance
     LOGGER = CSVLogger(save_dir=CONFIG.saved_model_path, name=CONFIG.model_name)
 
     # create BertTokenizer instance
-    TOKENIZER = T5Tokenizer.from_pretrained(CONFIG.language_model_tokenizer_path)
-
-    # load raw data
-    RAW_TRAIN_DATA = read_text(path=os.path.join(CONFIG.processed_data_dir, CONFIG.train_data))
-    RAW_VAL_DATA = read_text(path=os.path.join(CONFIG.processed_data_dir, CONFIG.dev_data))
-
-    TRAIN_SENTENCES, TRAIN_LABELS = prepare_conll_data(RAW_TRAIN_DATA)
-    TRAIN_SENTENCES = TRAIN_SENTENCES[:100]
-    TRAIN_LABELS = TRAIN_LABELS[:100]
-    logging.debug("We have {} train samples.".format(len(TRAIN_LABELS)))
-
-    VAL_SENTENCES, VAL_LABELS = prepare_conll_data(RAW_VAL_DATA)
-    logging.debug("We have {} val samples.".format(len(VAL_LABELS)))
-    VAL_SENTENCES = VAL_SENTENCES
-    VAL_LABELS = VAL_LABELS
-
-    # Create token indexer
-    TOKENS = list(itertools.chain(*TRAIN_SENTENCES))
-
-    TRAIN_SENTENCES_COPY = copy.deepcopy(TRAIN_SENTENCES)
-    VAL_SENTENCES_COPY = copy.deepcopy(VAL_SENTENCES)
-
-    # prepare data for training
-    TRAIN_SENTENCES, TRAIN_LABELS, TRAIN_SUBTOKEN_CHECKS = tokenize_and_keep_labels(
-        sentences=TRAIN_SENTENCES,
-        labels=TRAIN_LABELS,
-        tokenizer=TOKENIZER,
-        mode="x_mode")
-
-    logging.debug("Create Train Samples")
-
-    VAL_SENTENCES, VAL_LABELS, VAL_SUBTOKEN_CHECKS = tokenize_and_keep_labels(
-        sentences=VAL_SENTENCES,
-        labels=VAL_LABELS,
-        tokenizer=TOKENIZER,
-        mode="x_mode")
-    logging.debug("Create Valid Samples")
-
-    # label padding
-    SENTENCE_MAX_LENGTH = find_max_length_in_list(TRAIN_SENTENCES)
+    TOKENIZER_CLASS = T5TokenizerFast if CONFIG.fast_tokenizer else T5Tokenizer
+    TOKENIZER = TOKENIZER_CLASS.from_pretrained(CONFIG.language_model_tokenizer_path)
+
+    # tokenize, index and encode data (or load it from cached shards)
+    if CONFIG.preprocess_workers == 1:
+        DATA, TAG2IDX, SENTENCE_MAX_LENGTH = prepare_training_data(
+            CONFIG, TOKENIZER, mode="x_mode", n_train_samples=CONFIG.n_train_samples or None)
+    else:
+        with create_tokenize_pool(TOKENIZER, CONFIG.preprocess_workers or None,
+                                  CONFIG.subword_cache_size) as POOL:
+            DATA, TAG2IDX, SENTENCE_MAX_LENGTH = prepare_training_data(
+                CONFIG, TOKENIZER, mode="x_mode", n_train_samples=CONFIG.n_train_samples or None,
+                pool=POOL)
+    IDX2TAG = {idx: tag for tag, idx in TAG2IDX.items()}
     CONFIG.SENTENCE_MAX_LENGTH = SENTENCE_MAX_LENGTH
 
-    TRAIN_LABELS = pad_sequence(TRAIN_LABELS, max_length=SENTENCE_MAX_LENGTH,
-                                pad_item=TOKENIZER.pad_token)
-    VAL_LABELS = pad_sequence(VAL_LABELS, max_length=SENTENCE_MAX_LENGTH,
-                              pad_item=TOKENIZER.pad_token)
-
-    # label truncating
-    TRAIN_LABELS = truncate_sequence(TRAIN_LABELS, SENTENCE_MAX_LENGTH)
-    VAL_LABELS = truncate_sequence(VAL_LABELS, SENTENCE_MAX_LENGTH)
-
-    # Create target indexer
-    TAGS = list(itertools.chain(*TRAIN_LABELS))
-    TAGS.append(TOKENIZER.pad_token)
-
-    TARGET_INDEXER = Indexer(vocabs=TAGS)
-    TARGET_INDEXER.build_vocab2idx()
-    TARGET_INDEXER.build_idx2vocab()
-    TARGET_INDEXER.save(CONFIG.assets_dir)
-
-    NUM_BATCHES = len(TRAIN_SENTENCES) // CONFIG.batch_size
+    NUM_BATCHES = len(DATA["train_data"]["input_ids"]) // CONFIG.batch_size
     TOTAL_STEPS = 50 * NUM_BATCHES
     WARMUP_STEPS = int(TOTAL_STEPS * 0.01)
-    STEPS_PER_EPOCH = len(TRAIN_SENTENCES) // CONFIG.batch_size
+    STEPS_PER_EPOCH = len(DATA["train_data"]["input_ids"]) // CONFIG.batch_size
 
     CONFIG.steps_per_epoch = STEPS_PER_EPOCH
     CONFIG.warmup_steps = WARMUP_STEPS
 
-    DATA_MODULE = DataModule(data={"train_data": [TRAIN_SENTENCES, TRAIN_LABELS,
-                                                  TRAIN_SUBTOKEN_CHECKS],
-                                   "val_data": [VAL_SENTENCES, VAL_LABELS,
-                                                VAL_SUBTOKEN_CHECKS],
-                                   "test_data": [VAL_SENTENCES, VAL_LABELS,
-                                                 VAL_SUBTOKEN_CHECKS]},
+    # Create the Classifier Model
+    MODEL = Classifier(tag2idx=TAG2IDX,
+                       idx2tag=IDX2TAG,
+                       pad_token=TOKENIZER.pad_token, config=CONFIG)
+
+    # run the frozen T5 encoder once and train the head on its cached outputs
+    if CONFIG.feature_cache:
+        DATA = prepare_feature_data(DATA, MODEL.t5_model.to(DEVICE),
+                                    cache_dir=CONFIG.cache_dir,
+                                    model_path=CONFIG.language_model_path,
+                                    batch_size=CONFIG.batch_size, max_tokens=CONFIG.max_tokens,
+                                    device=DEVICE, disable_cache=CONFIG.disable_cache)
+
+    DATA_MODULE = DataModule(data=DATA,
                              batch_size=CONFIG.batch_size,
                              max_length=SENTENCE_MAX_LENGTH,
                              tokenizer=TOKENIZER,
-                             target_indexer=TARGET_INDEXER)
+                             target_indexer=None,
+                             padding=CONFIG.padding,
+                             max_tokens=CONFIG.max_tokens,
+                             num_workers=CONFIG.num_workers,
+                             persistent_workers=CONFIG.persistent_workers,
+                             pin_memory=CONFIG.pin_memory,
+                             prefetch_factor=CONFIG.prefetch_factor)
 
     DATA_MODULE.setup()
 
@@ -123,20 +92,26 @@ if __name__ == "__main__":
     EARLY_STOPPING_CALLBACK = EarlyStopping(monitor="val_loss", patience=30, mode="min")
 
     # Instantiate the Model Trainer
-    TRAINER = pl.Trainer(max_epochs=CONFIG.n_epochs, gpus=[1],  # CONFIG.num_of_gpu,
-                         callbacks=[CHECKPOINT_CALLBACK, CHECKPOINT_CALLBACK_F1,
-                                    EARLY_STOPPING_CALLBACK],
-                         progress_bar_refresh_rate=60, logger=LOGGER, auto_scale_batch_size=True)
+    TRAINER = build_trainer(CONFIG, DEVICE,
+                            callbacks=[CHECKPOINT_CALLBACK, CHECKPOINT_CALLBACK_F1,
+                                       EARLY_STOPPING_CALLBACK],
+                            logger=LOGGER)
 
     # Train the Classifier Model
-    MODEL = Classifier(tag2idx=TARGET_INDEXER.get_vocab2idx(),
-                       idx2tag=TARGET_INDEXER.get_idx2vocab(),
-                       pad_token=TOKENIZER.pad_token, config=CONFIG)
-
     TRAINER.fit(MODEL, DATA_MODULE)
     TRAINER.test(ckpt_path="best", datamodule=DATA_MODULE)
 
     # save best model path
+    BEST_MODEL_PATHS = {"best_model_path": CHECKPOINT_CALLBACK.best_model_path}
+
+    # adapters and head of the best checkpoint (loaded by test) as a per language artifact
+    if CONFIG.lora_rank:
+        from inference import export_adapter
+
+        BEST_MODEL_PATHS["adapter_path"] = os.path.join(CONFIG.saved_model_path,
+                                                        CONFIG.model_name, "adapter.safetensors")
+        export_adapter(MODEL, BEST_MODEL_PATHS["adapter_path"], language=CONFIG.model_name)
+
     write_json(path=os.path.join(CONFIG.saved_model_path, CONFIG.model_name,
                                  "b_model_path.json"),
-               data={"best_model_path": CHECKPOINT_CALLBACK.best_model_path})
+               data=BEST_MODEL_PATHS)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        small local models shared by the tests
+"""
+
+# ============================ Third Party libs ============================
+import argparse
+import io
+import os
+
+import sentencepiece
+import torch
+import transformers
+from torch.utils.data import DataLoader
+
+# ============================ My packages ============================
+from dataset import collate_dynamic_padding
+from models import build_checkpoint_callback, build_trainer
+from models.complex_ner_model import Classifier
+
+TINY_TAGS = ("<pad>", "B-PER", "I-PER", "O", "X")
+TINY_CORPUS = ["John lives in New York City .",
+               "Maria works at the United Nations in Geneva .",
+               "Das ist ein Test über Köln ."]
+
+
+def build_tiny_tokenizers(tmp_dir: str) -> [transformers.T5Tokenizer,
+                                            transformers.T5TokenizerFast]:
+    """
+    function to train a tiny sentencepiece model and create slow and fast T5 tokenizers on it
+
+    Args:
+        tmp_dir: directory of spiece.model
+
+    Returns:
+        slow and fast tokenizer with the same vocab
+
+    """
+    model = io.BytesIO()
+    sentencepiece.SentencePieceTrainer.train(
+        sentence_iterator=iter(TINY_CORPUS * 20), model_writer=model, vocab_size=40,
+        character_coverage=1.0, hard_vocab_limit=False, minloglevel=2)
+    vocab_file = os.path.join(tmp_dir, "spiece.model")
+    with open(vocab_file, "wb") as file:
+        file.write(model.getvalue())
+    return transformers.T5Tokenizer(vocab_file, extra_ids=0, legacy=True), \
+        transformers.T5TokenizerFast(vocab_file=vocab_file, extra_ids=0, legacy=True)
+
+
+def build_tiny_classifier(tmp_dir: str, name: str = "t5", d_model: int = 16,
+                          **config) -> Classifier:
+    """
+    function to create a Classifier on a tiny random T5 with TINY_TAGS. The T5 is saved in
+    tmp_dir/name once, later calls with the same name use the same T5 weights.
+
+    Args:
+        tmp_dir: directory of T5 models
+        name: T5 directory name (it is the language_model_path of the config)
+        d_model: T5 hidden size, only used when the T5 is created
+        **config: config values, they are added to (or replace) dropout and lr
+
+    Returns:
+        Classifier in eval mode
+
+    """
+    language_model_path = os.path.join(tmp_dir, name)
+    if not os.path.isdir(language_model_path):
+        t5_config = transformers.T5Config(vocab_size=32, d_model=d_model, d_kv=4,
+                                          d_ff=2 * d_model, num_layers=1, num_heads=4)
+        transformers.T5EncoderModel(t5_config).save_pretrained(language_model_path)
+    config = argparse.Namespace(**{"language_model_path": language_model_path, "dropout": 0.1,
+                                   "lr": 2e-5, **config})
+    return Classifier(idx2tag=dict(enumerate(TINY_TAGS)),
+                      tag2idx={tag: idx for idx, tag in enumerate(TINY_TAGS)},
+                      pad_token="<pad>", config=config).eval()
+
+
+def build_tiny_batch() -> dict:
+    """
+    function to create a padded batch of two samples for the tiny Classifier
+
+    Returns:
+        input_ids, attention_mask and target tensors
+
+    """
+    return {"input_ids": torch.tensor([[5, 6, 7, 1, 0, 0], [5, 8, 9, 10, 11, 1]]),
+            "attention_mask": torch.tensor([[1, 1, 1, 1, 0, 0], [1, 1, 1, 1, 1, 1]]),
+            "target": torch.tensor([[1, 2, 3, 0, 0, 0], [3, 1, 4, 3, 3, 0]])}
+
+
+def train_tiny_checkpoint(tmp_dir: str, **config) -> str:
+    """
+    function to train a tiny Classifier (see build_tiny_classifier) for one epoch with
+    pl.Trainer, so the checkpoint is written like the training scripts write it
+
+    Args:
+        tmp_dir: directory of T5 models and checkpoints
+        **config: config values of build_tiny_classifier
+
+    Returns:
+        best checkpoint path
+
+    """
+    model = build_tiny_classifier(tmp_dir, **{"n_epochs": 1, "precision": "32", **config})
+    batch = build_tiny_batch()
+    samples = [{name: value[index] for name, value in batch.items()} for index in range(2)]
+    dataloader = DataLoader(samples, batch_size=2, collate_fn=collate_dynamic_padding)
+    checkpoint_callback = build_checkpoint_callback(
+        save_top_k=1, dirpath=os.path.join(tmp_dir, "checkpoints"))
+    trainer = build_trainer(model.config, torch.device("cpu"), callbacks=[checkpoint_callback])
+    trainer.fit(model.train(), train_dataloaders=dataloader, val_dataloaders=dataloader)
+    return checkpoint_callback.best_model_path
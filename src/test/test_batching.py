@@ -0,0 +1,79 @@
+import unittest
+
+import numpy
+import torch
+
+from dataset import BucketBatchSampler, TokenBudgetBatchSampler, PackedBatchSampler, \
+    build_loader_kwargs, collate_dynamic_padding, collate_packed, pack_lengths
+
+
+class TestBatching(unittest.TestCase):
+    def setUp(self) -> None:
+        self.lengths = numpy.array([5, 1, 3, 8, 2, 7, 4, 6, 9, 1])
+
+    def test_bucket_batch_sampler(self):
+        sampler = BucketBatchSampler(self.lengths, batch_size=3, bucket_size_multiplier=2)
+        batches = list(sampler)
+        self.assertEqual(len(batches), len(sampler))
+        self.assertEqual(sorted(index for batch in batches for index in batch), list(range(10)))
+        self.assertNotEqual(batches, list(sampler))
+
+    def test_sorted_bucket_batch_sampler(self):
+        sampler = BucketBatchSampler(self.lengths, batch_size=4, shuffle=False, drop_last=True)
+        batches = list(sampler)
+        self.assertEqual(len(batches), 2)
+        self.assertEqual([self.lengths[index] for index in batches[0]], [1, 1, 2, 3])
+
+    def test_token_budget_batch_sampler(self):
+        sampler = TokenBudgetBatchSampler(self.lengths, max_tokens=8, shuffle=False)
+        batches = list(sampler)
+        self.assertEqual(len(batches), len(sampler))
+        self.assertEqual(sorted(index for batch in batches for index in batch), list(range(10)))
+        for batch in batches:
+            longest = max(self.lengths[index] for index in batch)
+            self.assertTrue(len(batch) == 1 or len(batch) * longest <= 8)
+
+    def test_collate_dynamic_padding(self):
+        batch = [{"input_ids": torch.tensor([4, 1, 0, 0]),
+                  "attention_mask": torch.tensor([1, 1, 0, 0])},
+                 {"input_ids": torch.tensor([4, 5, 1, 0]),
+                  "attention_mask": torch.tensor([1, 1, 1, 0])}]
+        output = collate_dynamic_padding(batch)
+        self.assertEqual(output["input_ids"].tolist(), [[4, 1, 0], [4, 5, 1]])
+        self.assertEqual(output["attention_mask"].shape, (2, 3))
+
+    def test_pack_lengths(self):
+        self.assertEqual(pack_lengths([3, 4, 2, 9, 1], max_length=8), [[0, 1], [2], [3], [4]])
+
+    def test_packed_batch_sampler(self):
+        sampler = PackedBatchSampler(self.lengths, max_length=10, batch_size=2, shuffle=False)
+        batches = list(sampler)
+        self.assertEqual(len(batches), len(sampler))
+        self.assertEqual(sorted(index for batch in batches for index in batch), list(range(10)))
+        for batch in batches:
+            self.assertLessEqual(len(pack_lengths(self.lengths[batch], max_length=10)), 2)
+
+    def test_collate_packed(self):
+        batch = [{"input_ids": torch.tensor([4, 1, 0, 0]), "target": torch.tensor([2, 0, 0, 0]),
+                  "attention_mask": torch.tensor([1, 1, 0, 0])},
+                 {"input_ids": torch.tensor([4, 5, 1, 0]), "target": torch.tensor([3, 2, 0, 0]),
+                  "attention_mask": torch.tensor([1, 1, 1, 0])},
+                 {"input_ids": torch.tensor([6, 7, 8, 1]), "target": torch.tensor([2, 2, 3, 0]),
+                  "attention_mask": torch.tensor([1, 1, 1, 1])}]
+        packed = collate_packed(batch, max_length=5)
+        self.assertEqual(packed["input_ids"].tolist(), [[4, 1, 4, 5, 1], [6, 7, 8, 1, 0]])
+        self.assertEqual(packed["target"].tolist(), [[2, 0, 3, 2, 0], [2, 2, 3, 0, 0]])
+        self.assertEqual(packed["segment_ids"].tolist(), [[1, 1, 2, 2, 2], [1, 1, 1, 1, 0]])
+        self.assertEqual(packed["attention_mask"].tolist(), [[1, 1, 1, 1, 1], [1, 1, 1, 1, 0]])
+        self.assertEqual(packed["segment_lengths"].tolist(), [2, 3, 4])
+
+    def test_build_loader_kwargs(self):
+        self.assertEqual(build_loader_kwargs(num_workers=0, persistent_workers=True),
+                         {"num_workers": 0, "pin_memory": False})
+        self.assertEqual(build_loader_kwargs(num_workers=2, persistent_workers=True),
+                         {"num_workers": 2, "pin_memory": False, "persistent_workers": True,
+                          "prefetch_factor": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
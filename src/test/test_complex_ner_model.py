@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+
+import torch
+import transformers
+
+from dataset import collate_packed
+from test.helper import build_tiny_classifier, build_tiny_batch
+
+
+class TestClassifier(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        torch.manual_seed(0)
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.model = build_tiny_classifier(cls.tmp_dir.name)
+        cls.batch = build_tiny_batch()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def test_forward_non_pad(self):
+        with torch.no_grad():
+            logits = self.model(self.batch)
+            non_pad_logits, targets, lengths = self.model.forward_non_pad(self.batch)
+        mask = self.batch["attention_mask"].bool()
+        self.assertEqual(lengths, [4, 6])
+        self.assertTrue(torch.allclose(non_pad_logits, logits[mask], atol=1e-6))
+        self.assertTrue(torch.equal(targets, self.batch["target"][mask]))
+
+        loss = self.model.criterion(logits.view(-1, logits.shape[-1]),
+                                    self.batch["target"].view(-1))
+        self.assertTrue(torch.allclose(self.model.criterion(non_pad_logits, targets), loss))
+
+    def test_pad_does_not_change_outputs(self):
+        batch = {key: value[:1, :4] for key, value in self.batch.items()}
+        with torch.no_grad():
+            logits = self.model(batch)
+            padded_logits = self.model(self.batch)
+        self.assertTrue(torch.allclose(logits[0], padded_logits[0, :4], atol=1e-5))
+
+    def test_packed_batch(self):
+        samples = [{key: value[index] for key, value in self.batch.items()} for index in (0, 1)]
+        packed = collate_packed(samples, max_length=10)
+        self.assertEqual(packed["input_ids"].shape, (1, 10))
+        with torch.no_grad():
+            logits = self.model(self.batch)
+            packed_logits, targets, lengths = self.model.forward_non_pad(packed)
+        mask = self.batch["attention_mask"].bool()
+        self.assertEqual(lengths, [4, 6])
+        self.assertTrue(torch.allclose(packed_logits, logits[mask], atol=1e-5))
+        self.assertTrue(torch.equal(targets, self.batch["target"][mask]))
+
+    def test_gradient_checkpointing(self):
+        gradients = []
+        for gradient_checkpointing in (False, True):
+            model = build_tiny_classifier(self.tmp_dir.name,
+                                          gradient_checkpointing=gradient_checkpointing).train()
+            model.load_state_dict(self.model.state_dict())
+            torch.manual_seed(1)
+            logits, targets, _ = model.forward_non_pad(self.batch)
+            model.criterion(logits, targets).backward()
+            gradients.append(model.enc_layer.self_attention.fc_qkv.weight.grad)
+        self.assertTrue(model.t5_model.is_gradient_checkpointing)
+        self.assertTrue(torch.allclose(gradients[0], gradients[1], atol=1e-6))
+
+    def test_configure_optimizers(self):
+        model = build_tiny_classifier(self.tmp_dir.name, optimizer="adafactor")
+        optimizer, = model.configure_optimizers()
+        self.assertIsInstance(optimizer, transformers.Adafactor)
+
+    def test_convert_pred_indexes_to_entities(self):
+        with torch.no_grad():
+            logits, targets, lengths = self.model.forward_non_pad(self.batch)
+        true_entities, pred_entities = self.model._convert_pred_indexes_to_entities(
+            targets, logits, lengths)
+        self.assertEqual(true_entities, [["B-PER", "I-PER", "O"], ["O", "B-PER", "X", "O", "O"]])
+        self.assertEqual([len(item) for item in pred_entities], [3, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
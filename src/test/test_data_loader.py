@@ -0,0 +1,37 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from data_loader import read_text, read_text_lines
+from data_preparation import iter_conll_data, prepare_conll_data
+
+
+class TestDataReader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.lines = ["# id 1\tdomain=en\n", "hi _ _ O\n", "Ehsan _ _ B-PER\n", "\n",
+                      "# id 2\tdomain=en\n", "paris _ _ B-LOC\n"]
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.plain_path = os.path.join(self.tmp_dir.name, "data.conll")
+        self.gzip_path = os.path.join(self.tmp_dir.name, "data.conll.gz")
+        with open(self.plain_path, "w", encoding="utf8") as file:
+            file.writelines(self.lines)
+        with gzip.open(self.gzip_path, "wt", encoding="utf8") as file:
+            file.writelines(self.lines)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_read_text_lines(self):
+        self.assertEqual(list(read_text_lines(self.plain_path)), read_text(self.plain_path))
+        self.assertEqual(list(read_text_lines(self.gzip_path)), self.lines)
+
+    def test_iter_conll_data(self):
+        expected_output = [(["hi", "Ehsan"], ["O", "B-PER"]), (["paris"], ["B-LOC"])]
+        self.assertEqual(list(iter_conll_data(read_text_lines(self.gzip_path))), expected_output)
+        self.assertEqual(prepare_conll_data(read_text_lines(self.plain_path)),
+                         ([["hi", "Ehsan"], ["paris"]], [["O", "B-PER"], ["B-LOC"]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
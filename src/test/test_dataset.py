@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+import torch
+
+from data_preparation import write_shards, read_shards
+from dataset import DataModule, EncodedDataset, InferenceDataset
+from test.helper import build_tiny_tokenizers
+
+
+class TestEncodedDataset(unittest.TestCase):
+    def setUp(self) -> None:
+        self.arrays = {"input_ids": numpy.array([[5, 6, 1, 0], [7, 1, 0, 0]], dtype=numpy.int32),
+                       "attention_mask": numpy.array([[1, 1, 1, 0], [1, 1, 0, 0]],
+                                                     dtype=numpy.int8),
+                       "subtoken_check": numpy.array([[1, 0, 0, 0], [1, 0, 0, 0]],
+                                                     dtype=numpy.bool_),
+                       "target": numpy.array([[2, 3, 0, 0], [2, 0, 0, 0]], dtype=numpy.int32)}
+
+    def test_getitem(self):
+        item = EncodedDataset(self.arrays)[1]
+        self.assertEqual(item["input_ids"].dtype, torch.int64)
+        self.assertEqual(item["subtoken_check"].dtype, torch.bool)
+        self.assertEqual(item["input_ids"].tolist(), [7, 1, 0, 0])
+        self.assertEqual(item["target"].tolist(), [2, 0, 0, 0])
+
+    def test_memory_mapped_getitem(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_shards(self.arrays, os.path.join(tmp_dir, "train"))
+            arrays, _ = read_shards(os.path.join(tmp_dir, "train"))
+            mapped_dataset = EncodedDataset(arrays)
+            dataset = EncodedDataset(self.arrays)
+            self.assertEqual(len(mapped_dataset), len(dataset))
+            for name in self.arrays:
+                self.assertTrue(torch.equal(mapped_dataset[0][name], dataset[0][name]))
+
+
+class TestInferenceDataset(unittest.TestCase):
+    def test_getitem_matches_tokenizer(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tokenizers = build_tiny_tokenizers(tmp_dir)
+        texts = [tokenizers[0].tokenize(sentence) for sentence in ("John lives in Köln .",
+                                                                   "Maria works .")]
+        subtoken_checks = [["1"] * len(text) for text in texts]
+        for tokenizer in tokenizers:
+            # the longest sentence is truncated to make room for eos
+            max_length = max(len(text) for text in texts)
+            dataset = InferenceDataset(texts, subtoken_checks, tokenizer, max_length=max_length)
+            for index, text in enumerate(texts):
+                inputs = tokenizer.prepare_for_model(
+                    tokenizer.convert_tokens_to_ids(text), max_length=max_length,
+                    padding="max_length", return_tensors="pt", truncation=True)
+                item = dataset[index]
+                self.assertTrue(torch.equal(item["input_ids"], inputs["input_ids"]))
+                self.assertTrue(torch.equal(item["attention_mask"], inputs["attention_mask"]))
+                self.assertEqual(int(item["attention_mask"].sum()), dataset.lengths()[index])
+
+
+class TestDataModule(unittest.TestCase):
+    def test_setup_with_trainer_stage(self):
+        arrays = {"input_ids": numpy.array([[5, 6, 1, 0], [7, 1, 0, 0]], dtype=numpy.int32),
+                  "attention_mask": numpy.array([[1, 1, 1, 0], [1, 1, 0, 0]], dtype=numpy.int8),
+                  "subtoken_check": numpy.ones((2, 4), dtype=numpy.bool_),
+                  "target": numpy.array([[2, 3, 0, 0], [2, 0, 0, 0]], dtype=numpy.int32)}
+        data_module = DataModule({"train_data": arrays, "val_data": arrays, "test_data": arrays},
+                                 batch_size=2, max_length=4, tokenizer=None,
+                                 target_indexer=None, num_workers=0)
+        for stage in ("fit", "test"):
+            data_module.setup(stage=stage)
+        batch = next(iter(data_module.val_dataloader()))
+        self.assertEqual(batch["input_ids"].shape, (2, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import unittest
+
+import torch
+
+from utils import setup_device, build_trainer_device_kwargs, reset_peak_memory, peak_memory_mb
+
+
+class TestDevice(unittest.TestCase):
+    def setUp(self) -> None:
+        self.num_threads = torch.get_num_threads()
+
+    def tearDown(self) -> None:
+        torch.set_num_threads(self.num_threads)
+
+    def test_cpu_threads(self):
+        device = setup_device("cpu", num_threads=2)
+        self.assertEqual(device, torch.device("cpu"))
+        self.assertEqual(torch.get_num_threads(), 2)
+
+    @unittest.skipUnless(hasattr(os, "sched_getaffinity"), "core pinning is not supported")
+    def test_cpu_cores(self):
+        cpu_cores = sorted(os.sched_getaffinity(0))
+        setup_device("cpu", cpu_cores=cpu_cores)
+        self.assertEqual(sorted(os.sched_getaffinity(0)), cpu_cores)
+        self.assertEqual(torch.get_num_threads(), len(cpu_cores))
+
+    def test_invalid_device(self):
+        with self.assertRaises(Exception):
+            setup_device("mps")
+        if not torch.cuda.is_available():
+            with self.assertRaises(Exception):
+                setup_device("cuda:1")
+
+    def test_build_trainer_device_kwargs(self):
+        self.assertEqual(build_trainer_device_kwargs(torch.device("cpu")),
+                         {"accelerator": "cpu", "devices": 1, "precision": "32-true"})
+        self.assertEqual(build_trainer_device_kwargs(torch.device("cuda:1"), precision="bf16"),
+                         {"accelerator": "gpu", "devices": [1], "precision": "bf16-mixed"})
+
+    def test_cpu_step_memory(self):
+        device = torch.device("cpu")
+        start_mb = reset_peak_memory(device)
+        tensor = torch.ones(64 * 2 ** 18)  # 64 MB
+        self.assertGreater(peak_memory_mb(device, start_mb), 48)
+        del tensor
+        # the step memory starts from the resident memory of this step, not the process peak
+        self.assertLess(peak_memory_mb(device, reset_peak_memory(device)), 48)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+import torch
+
+from dataset import collate_dynamic_padding, prepare_teacher_logits
+from models import TeacherCallback, distillation_loss, load_classifier
+from test.helper import build_tiny_classifier, train_tiny_checkpoint
+
+
+class TestDistillation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        torch.manual_seed(0)
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        # the teacher is a checkpoint written by pl.Trainer, as distillation_trainer loads it
+        cls.teacher_path = train_tiny_checkpoint(os.path.join(cls.tmp_dir.name, "teacher"),
+                                                 name="teacher", d_model=32, dropout=0.0)
+        cls.teacher = load_classifier(cls.teacher_path).eval()
+        cls.student = build_tiny_classifier(cls.tmp_dir.name, name="student", d_model=16,
+                                            dropout=0.0, distillation_alpha=0.5,
+                                            distillation_temperature=2.0)
+        cls.arrays = {"input_ids": numpy.array([[5, 6, 7, 1, 0, 0], [5, 8, 9, 10, 11, 1]],
+                                               dtype=numpy.int32),
+                      "attention_mask": numpy.array([[1, 1, 1, 1, 0, 0], [1, 1, 1, 1, 1, 1]],
+                                                    dtype=numpy.int8),
+                      "subtoken_check": numpy.ones((2, 6), dtype=numpy.bool_),
+                      "target": numpy.array([[1, 2, 3, 0, 0, 0], [3, 1, 4, 3, 3, 0]],
+                                            dtype=numpy.int32)}
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def test_distillation_loss(self):
+        logits = torch.randn(5, 4)
+        self.assertAlmostEqual(float(distillation_loss(logits, logits, temperature=2.0)), 0,
+                               places=6)
+        teacher_logits = torch.randn(5, 4)
+        expected = (torch.softmax(teacher_logits / 2, -1) *
+                    (torch.log_softmax(teacher_logits / 2, -1) -
+                     torch.log_softmax(logits / 2, -1))).sum(-1).mean() * 4
+        self.assertTrue(torch.allclose(distillation_loss(logits, teacher_logits, 2.0),
+                                       expected, atol=1e-6))
+
+    def test_cached_teacher_logits(self):
+        dataset = prepare_teacher_logits(self.arrays, self.teacher, cache_dir=self.tmp_dir.name,
+                                         teacher_path=self.teacher_path, batch_size=2)
+        batch = collate_dynamic_padding([dataset[index] for index in range(len(dataset))])
+        teacher_batch = {name: value for name, value in batch.items()
+                         if name != "teacher_logits"}
+        TeacherCallback(self.teacher).on_train_batch_start(None, self.student, teacher_batch, 0)
+        mask = batch["attention_mask"].bool()
+        self.assertTrue(torch.allclose(batch["teacher_logits"][mask],
+                                       teacher_batch["teacher_logits"][mask], atol=1e-2))
+
+    def test_training_step_loss(self):
+        batch = collate_dynamic_padding([{name: torch.from_numpy(array[index]).long()
+                                          for name, array in self.arrays.items()}
+                                         for index in range(2)])
+        TeacherCallback(self.teacher).on_train_batch_start(None, self.student, batch, 0)
+        with torch.no_grad():
+            loss = self.student.training_step(batch, 0)["loss"]
+            outputs, targets, _ = self.student.forward_non_pad(batch)
+            teacher_logits = batch["teacher_logits"][batch["attention_mask"].bool()]
+        expected = 0.5 * self.student.criterion(outputs, targets) + \
+            0.5 * distillation_loss(outputs, teacher_logits, temperature=2.0)
+        self.assertTrue(torch.allclose(loss, expected, atol=1e-6))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import torch
+
+from inference import export_model, load_exported_model
+from test.helper import build_tiny_classifier
+
+
+class TestExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        torch.manual_seed(0)
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.model = build_tiny_classifier(cls.tmp_dir.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def test_torchscript(self):
+        path = os.path.join(self.tmp_dir.name, "model.pt")
+        export_model(self.model, path, export_format="torchscript")
+        exported_model = load_exported_model(path)
+        self.assertEqual(exported_model.hparams["idx2tag"], self.model.hparams["idx2tag"])
+
+        # batch and sequence lengths differ from the traced inputs
+        batch = {"input_ids": torch.randint(2, 32, (3, 11)),
+                 "attention_mask": torch.ones(3, 11, dtype=torch.long)}
+        batch["attention_mask"][1, 6:] = 0
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(exported_model(batch), self.model(batch), atol=1e-5))
+
+    @unittest.skipUnless(importlib.util.find_spec("onnx") and
+                         importlib.util.find_spec("onnxruntime"),
+                         "onnx and onnxruntime are not installed")
+    def test_onnx(self):
+        path = os.path.join(self.tmp_dir.name, "model.onnx")
+        export_model(self.model, path, export_format="onnx")
+        exported_model = load_exported_model(path, num_threads=1)
+        self.assertEqual(exported_model.hparams["idx2tag"], self.model.hparams["idx2tag"])
+
+        batch = {"input_ids": torch.randint(2, 32, (3, 11)),
+                 "attention_mask": torch.ones(3, 11, dtype=torch.long)}
+        batch["attention_mask"][1, 6:] = 0
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(exported_model(batch), self.model(batch), atol=1e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+import torch
+
+from dataset import EncodedDataset, FeatureDataset, collate_dynamic_padding, \
+    prepare_feature_data, read_features, write_features
+from test.helper import build_tiny_classifier
+
+
+class TestFeatureStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        torch.manual_seed(0)
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.model = build_tiny_classifier(cls.tmp_dir.name, feature_cache=True)
+        cls.model_path = cls.model.config.language_model_path
+        cls.arrays = {"input_ids": numpy.array([[5, 6, 7, 1, 0, 0], [5, 8, 9, 10, 11, 1],
+                                                [5, 1, 0, 0, 0, 0]], dtype=numpy.int32),
+                      "attention_mask": numpy.array([[1, 1, 1, 1, 0, 0], [1, 1, 1, 1, 1, 1],
+                                                     [1, 1, 0, 0, 0, 0]], dtype=numpy.int8),
+                      "subtoken_check": numpy.ones((3, 6), dtype=numpy.bool_),
+                      "target": numpy.array([[1, 2, 3, 0, 0, 0], [3, 1, 4, 3, 3, 0],
+                                             [3, 0, 0, 0, 0, 0]], dtype=numpy.int32)}
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def test_write_and_read_features(self):
+        path = os.path.join(self.tmp_dir.name, "features")
+        write_features(self.model.t5_model, EncodedDataset(self.arrays), path, batch_size=2)
+        features = read_features(path)
+        self.assertIsInstance(features.values, numpy.memmap)
+        self.assertEqual(features.lengths().tolist(), [4, 6, 2])
+
+        with torch.no_grad():
+            hidden_states = self.model.t5_model(
+                input_ids=torch.from_numpy(self.arrays["input_ids"]).long(),
+                attention_mask=torch.from_numpy(self.arrays["attention_mask"]).long()
+            ).last_hidden_state
+        for index, length in enumerate(features.lengths()):
+            numpy.testing.assert_allclose(features[index], hidden_states[index, :length],
+                                          atol=1e-2, rtol=1e-2)
+
+    def test_features_replace_encoder(self):
+        data = prepare_feature_data({"train_data": self.arrays}, self.model.t5_model,
+                                    cache_dir=self.tmp_dir.name, model_path=self.model_path,
+                                    batch_size=2)
+        self.assertIsInstance(data["train_data"], FeatureDataset)
+        batch = collate_dynamic_padding([data["train_data"][index] for index in range(3)])
+        self.assertEqual(batch["features"].shape, (3, 6, 16))
+        with torch.no_grad():
+            logits = self.model(batch)
+            encoder_logits = self.model({name: value for name, value in batch.items()
+                                         if name != "features"})
+        mask = batch["attention_mask"].bool()
+        self.assertTrue(torch.allclose(logits[mask], encoder_logits[mask], atol=1e-2))
+
+    def test_only_head_is_trained(self):
+        optimizer, = self.model.configure_optimizers()
+        parameters = {id(parameter) for group in optimizer.param_groups
+                      for parameter in group["params"]}
+        self.assertFalse(parameters & {id(parameter)
+                                       for parameter in self.model.t5_model.parameters()})
+        self.assertIn(id(self.model.output_layer.weight), parameters)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("torch", "transformers", "pytorch_lightning", "seqeval", "pandas")
+MAX_IMPORT_SECONDS = 1.0
+
+BENCHMARK = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "modules": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def benchmark_import(statement: str) -> dict:
+    """
+    function to import in a fresh interpreter and report import time and loaded heavy libs
+    """
+    output = subprocess.run([sys.executable, "-c", BENCHMARK.format(statement=statement,
+                                                                     heavy=HEAVY_MODULES)],
+                            cwd=SRC_DIR, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+class TestImportTime(unittest.TestCase):
+    def test_light_imports(self):
+        for statement in ["import utils, evaluation, models, data_preparation",
+                          "from evaluation import Evaluator, evaluate_with_seqeval",
+                          "from data_preparation import iter_conll_data, prepare_training_data",
+                          "from utils import convert_x_label_to_true_label"]:
+            result = benchmark_import(statement)
+            self.assertEqual(result["modules"], [], statement)
+            self.assertLess(result["seconds"], MAX_IMPORT_SECONDS, statement)
+
+    def test_lazy_names(self):
+        result = benchmark_import("from models import build_checkpoint_callback")
+        self.assertIn("pytorch_lightning", result["modules"])
+        result = benchmark_import("from inference import Inference, build_inference_dataloader, "
+                                  "load_exported_model")
+        self.assertEqual(result["modules"], ["torch"])
+        with self.assertRaises(subprocess.CalledProcessError):
+            benchmark_import("from models import not_a_name")
+
+
+if __name__ == "__main__":
+    unittest.main()
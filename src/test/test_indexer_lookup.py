@@ -0,0 +1,37 @@
+import unittest
+
+import numpy
+
+from indexer import Indexer, TokenIndexer
+
+
+class TestIndexerLookup(unittest.TestCase):
+    def setUp(self) -> None:
+        self.indexer = Indexer(vocabs=["O", "B-PER", "I-PER", "X", "<pad>"])
+        self.token_indexer = TokenIndexer(vocabs=["hello", "world"])
+        self.samples = [["B-PER", "X", "O", "<pad>"], ["O", "<pad>", "<pad>", "<pad>"]]
+
+    def test_convert_samples_to_index_array(self):
+        indexes = self.indexer.convert_samples_to_index_array(self.samples)
+        expected_output = [[self.indexer.get_idx(tag) for tag in sample]
+                           for sample in self.samples]
+        self.assertEqual(indexes.tolist(), expected_output)
+        with self.assertRaisesRegex(KeyError, "B-LOC"):
+            self.indexer.convert_samples_to_index_array([["B-LOC", "O"]])
+
+    def test_convert_index_array_to_samples(self):
+        indexes = self.indexer.convert_samples_to_index_array(self.samples)
+        self.assertEqual(self.indexer.convert_index_array_to_samples(indexes).tolist(),
+                         self.samples)
+        with self.assertRaisesRegex(KeyError, "100"):
+            self.indexer.convert_index_array_to_samples(numpy.array([[100, 0]]))
+
+    def test_token_indexer_unknowns(self):
+        indexes = self.token_indexer.convert_samples_to_index_array([["hello", "paris"]])
+        self.assertEqual(indexes.tolist(), [[self.token_indexer.get_idx("hello"), 1]])
+        self.assertEqual(self.token_indexer.convert_index_array_to_samples([[0, 100]]).tolist(),
+                         [["<PAD>", "<UNK>"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
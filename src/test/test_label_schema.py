@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from indexer import Indexer, LabelSchema
+
+
+class TestLabelSchema(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tags = ["O", "B-PER", "X", "O", "I-PER", "<pad>", "B-PER"]
+        self.schema = LabelSchema.from_tags(self.tags)
+
+    def test_from_tags(self):
+        self.assertEqual(self.schema.tags, ("<pad>", "B-PER", "I-PER", "O", "X"))
+        self.assertEqual(self.schema, LabelSchema.from_tags(reversed(self.tags)))
+        self.assertNotEqual(self.schema.content_hash,
+                            LabelSchema(["O", "<pad>", "B-PER", "I-PER", "X"]).content_hash)
+
+    def test_to_indexer(self):
+        indexer = self.schema.to_indexer()
+        self.assertEqual(indexer.get_vocab2idx(), self.schema.tag2idx)
+        self.assertEqual(indexer.get_idx2vocab(), self.schema.idx2tag)
+
+    def test_from_idx2tag(self):
+        self.assertEqual(LabelSchema.from_idx2tag(self.schema.idx2tag), self.schema)
+        with self.assertRaises(AssertionError):
+            LabelSchema.from_idx2tag({0: "O", 2: "B-PER"})
+
+    def test_indexer_order(self):
+        indexer = Indexer(vocabs=self.tags)
+        indexer.build_vocab2idx()
+        self.assertEqual(list(indexer.get_vocab2idx()), ["O", "B-PER", "X", "I-PER", "<pad>"])
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "label_schema.bin")
+            self.schema.save(path)
+            loaded = LabelSchema.load(path)
+            self.assertEqual(loaded.tags, self.schema.tags)
+            self.assertEqual(loaded.content_hash, self.schema.content_hash)
+
+            with open(path, "r+b") as file:
+                file.seek(-1, os.SEEK_END)
+                file.write(b"Y")
+            with self.assertRaises(Exception):
+                LabelSchema.load(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+
+import torch
+import transformers
+
+from inference import export_adapter, load_adapter_model
+from models import load_classifier
+from models.complex_ner_model import Classifier
+from models.lora import LoRALinear, merge_lora_adapters, save_adapter, read_adapter
+from test.helper import build_tiny_classifier, build_tiny_batch, train_tiny_checkpoint
+
+
+class TestLoRA(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        torch.manual_seed(0)
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.batch = build_tiny_batch()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def _build_model(self, seed: int) -> Classifier:
+        torch.manual_seed(seed)
+        model = build_tiny_classifier(self.tmp_dir.name, lora_rank=2, lora_alpha=4,
+                                      lora_dropout=0.0)
+        with torch.no_grad():
+            for name, parameter in model.named_parameters():
+                if "lora_B" in name:
+                    parameter.normal_()
+        return model
+
+    def test_lora_linear(self):
+        base = torch.nn.Linear(8, 4)
+        layer = LoRALinear(base, rank=2, alpha=4)
+        inputs = torch.randn(3, 8)
+        self.assertTrue(torch.allclose(layer(inputs), base(inputs)))
+        with torch.no_grad():
+            layer.lora_B.normal_()
+        self.assertFalse(torch.allclose(layer(inputs), base(inputs)))
+        self.assertTrue(torch.allclose(layer(inputs), layer.merged_linear()(inputs), atol=1e-5))
+
+    def test_only_adapters_and_head_are_trained(self):
+        model = self._build_model(0)
+        trainable = {name for name, parameter in model.named_parameters()
+                     if parameter.requires_grad}
+        self.assertTrue(trainable)
+        for name in trainable:
+            self.assertTrue("lora_" in name or not name.startswith("t5_model."), name)
+        self.assertTrue(any(".SelfAttention.q.lora_A" in name for name in trainable))
+        self.assertTrue(any(".DenseReluDense.wo.lora_B" in name for name in trainable))
+
+    def test_checkpoint_keeps_adapters(self):
+        model = self._build_model(0)
+        checkpoint = {"state_dict": model.state_dict()}
+        model.on_save_checkpoint(checkpoint)
+        self.assertFalse(any(name.startswith("t5_model.") and "lora_" not in name
+                             for name in checkpoint["state_dict"]))
+
+        other_model = self._build_model(1)
+        other_model.on_load_checkpoint(checkpoint)
+        other_model.load_state_dict(checkpoint["state_dict"])
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(model(self.batch), other_model(self.batch)))
+
+    def test_adapter_swapping(self):
+        models = {"english": self._build_model(0), "german": self._build_model(1)}
+        paths = []
+        for language, model in models.items():
+            paths.append(os.path.join(self.tmp_dir.name, language + ".safetensors"))
+            export_adapter(model, paths[-1], language=language)
+
+        adapter_bank = load_adapter_model(paths)
+        self.assertEqual(adapter_bank.active, "english")
+        shared_weight = adapter_bank.model.t5_model.shared.weight
+        with torch.no_grad():
+            for language in ("german", "english", "german"):
+                logits = adapter_bank.activate(language)(self.batch)
+                self.assertTrue(torch.allclose(logits, models[language](self.batch),
+                                               atol=1e-5))
+            self.assertIs(adapter_bank.model.t5_model.shared.weight, shared_weight)
+
+            merged_logits = merge_lora_adapters(models["english"])(self.batch)
+            self.assertTrue(torch.allclose(merged_logits, adapter_bank.activate("english")(
+                self.batch), atol=1e-5))
+
+    def test_trained_adapter(self):
+        # as t5_trainer: train with lora_rank, export the adapter of the best checkpoint and
+        # load it as inference_runner does with adapter_paths
+        checkpoint_path = train_tiny_checkpoint(os.path.join(self.tmp_dir.name, "trained"),
+                                                lora_rank=2, lora_alpha=4, lora_dropout=0.0)
+        model = load_classifier(checkpoint_path).eval()
+        self.assertTrue(any("lora_B" in name and parameter.abs().sum() > 0
+                            for name, parameter in model.named_parameters()))
+        path = os.path.join(self.tmp_dir.name, "trained.safetensors")
+        export_adapter(model, path, language="english")
+
+        adapter_model = load_adapter_model([path]).activate("english")
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(adapter_model(self.batch), model(self.batch),
+                                           atol=1e-5))
+
+    def test_mismatched_adapters(self):
+        path = os.path.join(self.tmp_dir.name, "checked.safetensors")
+        export_adapter(self._build_model(0), path, language="english")
+        tensors, metadata = read_adapter(path)
+        other_path = os.path.join(self.tmp_dir.name, "other_tags.safetensors")
+        metadata["language"] = "german"
+        metadata["hyper_parameters"]["idx2tag"]["1"] = "B-LOC"
+        save_adapter(self._build_model(1), other_path, metadata=metadata)
+        with self.assertRaisesRegex(ValueError, "other tags"):
+            load_adapter_model([path, other_path])
+
+        # the base T5 at language_model_path changed after the adapter was trained
+        model = build_tiny_classifier(self.tmp_dir.name, name="changed_t5", lora_rank=2,
+                                      lora_alpha=4, lora_dropout=0.0)
+        export_adapter(model, path, language="english")
+        transformers.T5EncoderModel(model.t5_model.config).save_pretrained(
+            model.config.language_model_path)
+        with self.assertRaisesRegex(ValueError, "another base model"):
+            load_adapter_model([path])
+
+
+if __name__ == "__main__":
+    unittest.main()
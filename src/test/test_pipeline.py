@@ -0,0 +1,107 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy
+
+from configuration import BaseConfig
+from indexer import LabelSchema, LABEL_SCHEMA_FILE
+from data_preparation import tokenize_and_keep_labels, batch_tokenize_and_keep_labels, \
+    create_tokenize_pool, pool_tokenize_and_keep_labels, prepare_training_data, \
+    load_cached_training_data, truncate_sequence
+from test.helper import TINY_CORPUS, build_tiny_tokenizers
+
+
+class TestPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.slow_tokenizer, cls.fast_tokenizer = build_tiny_tokenizers(cls.tmp_dir.name)
+        words = " ".join(TINY_CORPUS).split()
+        tags = ["O", "B-PER", "I-PER", "B-LOC"]
+        rand = random.Random(0)
+        # sentences of different lengths, so a wrong chunk order changes the output
+        cls.sentences = [rand.choices(words, k=rand.randint(1, 9)) for _ in range(23)]
+        cls.labels = [rand.choices(tags, k=len(sentence)) for sentence in cls.sentences]
+        os.makedirs(os.path.join(cls.tmp_dir.name, "data"))
+        for name, (start, end) in (("train", (0, 15)), ("dev", (15, 23))):
+            with open(os.path.join(cls.tmp_dir.name, "data", name + ".conll"), "w",
+                      encoding="utf-8") as file:
+                for idx in range(start, end):
+                    file.write("# id {}\tdomain=x\n".format(idx))
+                    for token, tag in zip(cls.sentences[idx], cls.labels[idx]):
+                        file.write("{} _ _ {}\n".format(token, tag))
+                    file.write("\n")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def test_pool_keeps_order(self):
+        for tokenizer in (self.slow_tokenizer, self.fast_tokenizer):
+            if tokenizer.is_fast:
+                serial_output = batch_tokenize_and_keep_labels(
+                    [list(sentence) for sentence in self.sentences],
+                    [list(labels) for labels in self.labels], tokenizer, mode="x_mode")
+            else:
+                serial_output = tokenize_and_keep_labels(
+                    [list(sentence) for sentence in self.sentences],
+                    [list(labels) for labels in self.labels], tokenizer, mode="x_mode")
+            with create_tokenize_pool(tokenizer, n_workers=3, subword_cache_size=16) as pool:
+                pool_output = pool_tokenize_and_keep_labels(
+                    pool, self.sentences, self.labels, mode="x_mode", chunk_size=2)
+            with self.subTest(is_fast=tokenizer.is_fast):
+                self.assertEqual(pool_output, serial_output)
+
+    def test_load_cached_training_data(self):
+        config = BaseConfig().parser.parse_args(
+            ["--processed_data_dir", os.path.join(self.tmp_dir.name, "data"),
+             "--train_data", "train.conll", "--dev_data", "dev.conll",
+             "--assets_dir", os.path.join(self.tmp_dir.name, "assets"),
+             "--cache_dir", os.path.join(self.tmp_dir.name, "cache")])
+        os.makedirs(config.assets_dir)
+        self.assertIsNone(load_cached_training_data(config, self.fast_tokenizer))
+        with create_tokenize_pool(self.fast_tokenizer, n_workers=2) as pool:
+            data, tag2idx, max_length = prepare_training_data(config, self.fast_tokenizer,
+                                                              pool=pool)
+        cached_data, cached_tag2idx, cached_max_length = load_cached_training_data(
+            config, self.fast_tokenizer)
+        self.assertEqual((cached_tag2idx, cached_max_length), (tag2idx, max_length))
+        for name, array in data["val_data"].items():
+            numpy.testing.assert_array_equal(cached_data["val_data"][name], array)
+
+    def test_truncate_sequence(self):
+        self.assertEqual(truncate_sequence([["O", "B-PER", "I-PER", "O"], ["O"]], 3,
+                                           end_item="<pad>"),
+                         [["O", "B-PER", "<pad>"], ["O"]])
+
+    def test_dev_sentence_longer_than_train(self):
+        config = BaseConfig().parser.parse_args(
+            ["--processed_data_dir", os.path.join(self.tmp_dir.name, "data"),
+             "--train_data", "train.conll", "--dev_data", "dev.conll",
+             "--assets_dir", os.path.join(self.tmp_dir.name, "long_assets"), "--disable_cache"])
+        os.makedirs(config.assets_dir)
+        data, tag2idx, max_length = prepare_training_data(config, self.slow_tokenizer,
+                                                          n_train_samples=1)
+        # truncated dev labels end with the pad tag, "[SEP]" is not in the tag vocabulary
+        self.assertGreater(max(len(sentence) for sentence in self.sentences[15:]),
+                           len(self.sentences[0]))
+        self.assertNotIn("[SEP]", tag2idx)
+        self.assertEqual(data["val_data"]["target"].shape, (8, max_length))
+        self.assertTrue((data["val_data"]["target"] < len(tag2idx)).all())
+
+    def test_label_schema_of_another_dataset(self):
+        config = BaseConfig().parser.parse_args(
+            ["--processed_data_dir", os.path.join(self.tmp_dir.name, "data"),
+             "--train_data", "train.conll", "--dev_data", "dev.conll",
+             "--assets_dir", os.path.join(self.tmp_dir.name, "other_assets"),
+             "--disable_cache"])
+        os.makedirs(config.assets_dir)
+        LabelSchema(["<pad>", "O", "X"]).save(os.path.join(config.assets_dir, LABEL_SCHEMA_FILE))
+        with self.assertRaisesRegex(ValueError, "B-LOC"):
+            prepare_training_data(config, self.slow_tokenizer)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import torch
+import transformers
+
+from inference import quantize_model, save_quantized_model, load_quantized_model, \
+    load_or_quantize_model
+from models import load_classifier
+from test.helper import build_tiny_classifier, build_tiny_batch, train_tiny_checkpoint
+
+
+class TestQuantization(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        torch.manual_seed(0)
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.model = build_tiny_classifier(cls.tmp_dir.name)
+        cls.batch = build_tiny_batch()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def test_quantize_model(self):
+        quantized_model = quantize_model(self.model.train())
+        self.assertFalse(quantized_model.training)
+        self.assertFalse(any(type(module) is torch.nn.Linear
+                             for module in quantized_model.modules()))
+        # the fp32 model is not changed
+        self.assertTrue(self.model.training)
+        self.model.eval()
+        self.assertTrue(any(type(module) is torch.nn.Linear for module in self.model.modules()))
+        with torch.no_grad():
+            self.assertTrue(torch.allclose(quantized_model(self.batch), self.model(self.batch),
+                                           atol=0.1))
+
+    def test_save_load(self):
+        quantized_model = quantize_model(self.model)
+        path = os.path.join(self.tmp_dir.name, "quantized_model.pt")
+        save_quantized_model(quantized_model, path)
+        # the T5 structure comes from the saved config, pretrained weights are not read
+        with mock.patch.object(transformers.T5EncoderModel, "from_pretrained",
+                               side_effect=AssertionError("from_pretrained was called")):
+            loaded_model = load_quantized_model(path)
+        self.assertEqual(loaded_model.hparams["idx2tag"], self.model.hparams["idx2tag"])
+        with torch.no_grad():
+            self.assertTrue(torch.equal(loaded_model(self.batch), quantized_model(self.batch)))
+
+    def test_load_or_quantize_checkpoint(self):
+        checkpoint_path = train_tiny_checkpoint(self.tmp_dir.name)
+        path = os.path.join(self.tmp_dir.name, "quantized_checkpoint.pt")
+        quantized_model = load_or_quantize_model(checkpoint_path, path)
+        self.assertTrue(os.path.isfile(path))
+        loaded_model = load_or_quantize_model(checkpoint_path, path)
+        model = load_classifier(checkpoint_path).eval()
+        with torch.no_grad():
+            self.assertTrue(torch.equal(loaded_model(self.batch), quantized_model(self.batch)))
+            self.assertTrue(torch.allclose(quantized_model(self.batch), model(self.batch),
+                                           atol=0.1))
+
+
+if __name__ == "__main__":
+    unittest.main()
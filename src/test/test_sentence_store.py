@@ -0,0 +1,24 @@
+import unittest
+
+import numpy
+
+from dataset import SentenceStore
+
+
+class TestSentenceStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = SentenceStore.from_sequences(iter([[4, 5, 6], [], [7]]))
+
+    def test_getitem(self):
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store[0].tolist(), [4, 5, 6])
+        self.assertEqual(self.store[1].tolist(), [])
+        self.assertEqual(self.store[2].tolist(), [7])
+        self.assertEqual(self.store.lengths().tolist(), [3, 0, 1])
+
+    def test_views_share_values(self):
+        self.assertTrue(numpy.shares_memory(self.store[0], self.store.values))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from data_preparation import write_shards, read_shards, shards_exist
+
+
+class TestShardCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "train")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_write_and_read_shards(self):
+        arrays = {"input_ids": numpy.array([[5, 6, 1, 0], [7, 1, 0, 0]], dtype=numpy.int32),
+                  "subtoken_check": numpy.array([[1, 0, 0, 0], [1, 0, 0, 0]], dtype=numpy.bool_)}
+        self.assertFalse(shards_exist(self.path))
+        write_shards(arrays, self.path, meta={"max_length": 4})
+        self.assertTrue(shards_exist(self.path))
+
+        loaded_arrays, meta = read_shards(self.path)
+        self.assertEqual(meta["max_length"], 4)
+        self.assertEqual(meta["n_samples"], 2)
+        for name, array in arrays.items():
+            self.assertIsInstance(loaded_arrays[name], numpy.memmap)
+            numpy.testing.assert_array_equal(loaded_arrays[name], array)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+
+from data_preparation import SubwordCache
+
+
+class CharTokenizer:
+    name_or_path = "char_tokenizer"
+
+    def __len__(self):
+        return 256
+
+    @staticmethod
+    def tokenize(word):
+        return list(word)
+
+
+class TestSubwordCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.word_cache = SubwordCache(CharTokenizer(), max_size=2)
+
+    def test_tokenize(self):
+        self.assertEqual(self.word_cache.tokenize("ab"), ("a", "b"))
+        self.assertEqual(self.word_cache.tokenize("ab"), ("a", "b"))
+        self.assertEqual(self.word_cache.stats()["hits"], 1)
+        self.assertEqual(self.word_cache.stats()["misses"], 1)
+
+    def test_eviction(self):
+        for word in ["ab", "cd", "ab", "ef"]:
+            self.word_cache.tokenize(word)
+        self.assertEqual(len(self.word_cache), 2)
+        self.word_cache.tokenize("ab")
+        self.word_cache.tokenize("cd")
+        self.assertEqual(self.word_cache.stats()["hits"], 2)
+        self.assertEqual(self.word_cache.stats()["misses"], 4)
+
+    def test_save_and_load(self):
+        self.word_cache.tokenize("ab")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.word_cache.save(tmp_dir)
+            word_cache = SubwordCache(CharTokenizer())
+            self.assertTrue(word_cache.load(tmp_dir))
+        self.assertEqual(word_cache.tokenize("ab"), ("a", "b"))
+        self.assertEqual(word_cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
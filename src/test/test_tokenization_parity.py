@@ -0,0 +1,59 @@
+import copy
+import tempfile
+import unittest
+
+from data_preparation import tokenize_and_keep_labels, batch_tokenize_and_keep_labels, \
+    create_test_samples, batch_create_test_samples
+from test.helper import build_tiny_tokenizers
+
+
+class TestTokenizationParity(unittest.TestCase):
+    """
+    the batched fast tokenizer path should give the same output as the per word slow path
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.slow_tokenizer, cls.fast_tokenizer = build_tiny_tokenizers(cls.tmp_dir.name)
+        # "​" and "\t" are empty after normalization, so they have zero sub_tokens
+        cls.sentences = [["John", "lives", "in", "Köln", "."],
+                         ["Maria", "​", "works", "xyzzy"],
+                         ["​", "New-York", "Geneva"],
+                         ["a", "\t", "b"]]
+        cls.labels = [["B-PER", "O", "O", "B-LOC", "O"], ["B-PER", "O", "O", "O"],
+                      ["O", "B-LOC", "B-LOC"], ["O", "O", "O"]]
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp_dir.cleanup()
+
+    def test_zero_piece_word(self):
+        self.assertEqual(self.slow_tokenizer.tokenize("​"), [])
+
+    def test_tokenize_and_keep_labels(self):
+        for mode in ("same", "x_mode"):
+            with self.subTest(mode=mode):
+                slow_output = tokenize_and_keep_labels(
+                    copy.deepcopy(self.sentences), copy.deepcopy(self.labels),
+                    self.slow_tokenizer, mode=mode)
+                fast_output = batch_tokenize_and_keep_labels(
+                    copy.deepcopy(self.sentences), copy.deepcopy(self.labels),
+                    self.fast_tokenizer, mode=mode, batch_size=3)
+                # sub_tokens, labels and subtoken checks
+                self.assertEqual(fast_output, slow_output)
+                self.assertEqual(
+                    [self.fast_tokenizer.convert_tokens_to_ids(tokens)
+                     for tokens in fast_output[0]],
+                    [self.slow_tokenizer.convert_tokens_to_ids(tokens)
+                     for tokens in slow_output[0]])
+
+    def test_create_test_samples(self):
+        slow_output = create_test_samples(copy.deepcopy(self.sentences), self.slow_tokenizer)
+        fast_output = batch_create_test_samples(copy.deepcopy(self.sentences),
+                                                self.fast_tokenizer, batch_size=3)
+        self.assertEqual(fast_output, slow_output)
+
+
+if __name__ == "__main__":
+    unittest.main()
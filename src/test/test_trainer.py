@@ -0,0 +1,43 @@
+import tempfile
+import unittest
+
+import torch
+from pytorch_lightning.callbacks import EarlyStopping
+
+from configuration import BaseConfig
+from models import build_checkpoint_callback, build_trainer, load_classifier
+from test.helper import build_tiny_batch, train_tiny_checkpoint
+
+
+class TestBuildTrainer(unittest.TestCase):
+    def test_trainer_from_default_config(self):
+        config = BaseConfig().parser.parse_args([])
+        checkpoint_callback = build_checkpoint_callback(config.save_top_k)
+        trainer = build_trainer(config, torch.device(config.device),
+                                callbacks=[checkpoint_callback,
+                                           EarlyStopping(monitor="val_loss", mode="min")])
+        self.assertEqual(trainer.max_epochs, config.n_epochs)
+        self.assertEqual(trainer.precision, "32-true")
+        self.assertIs(trainer.checkpoint_callback, checkpoint_callback)
+
+    def test_bf16_trainer(self):
+        config = BaseConfig().parser.parse_args(["--precision", "bf16"])
+        trainer = build_trainer(config, torch.device(config.device))
+        self.assertEqual(trainer.precision, "bf16-mixed")
+
+    def test_load_trainer_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint_path = train_tiny_checkpoint(tmp_dir)
+            # torch.load only unpickles plain types by default
+            checkpoint = torch.load(checkpoint_path, map_location="cpu")
+            self.assertIsInstance(checkpoint["hyper_parameters"]["config"], dict)
+
+            model = load_classifier(checkpoint_path).eval()
+            self.assertEqual(model.config.n_epochs, 1)
+            with torch.no_grad():
+                logits = model(build_tiny_batch())
+            self.assertEqual(logits.shape, (2, 6, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import torch
+
+from models.transformer import EncoderLayer, MultiHeadAttentionLayer
+
+
+class TestMultiHeadAttentionLayer(unittest.TestCase):
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.inputs = torch.randn(2, 5, 16)
+        self.mask = torch.tensor([[1, 1, 1, 0, 0], [1, 1, 1, 1, 1]],
+                                 dtype=torch.uint8)[:, None, None, :]
+        self.sdpa_layer = MultiHeadAttentionLayer(16, 4, dropout=0.1).eval()
+        self.reference_layer = MultiHeadAttentionLayer(16, 4, dropout=0.1,
+                                                       attention_impl="reference").eval()
+        self.reference_layer.load_state_dict(self.sdpa_layer.state_dict())
+
+    def test_sdpa_matches_reference(self):
+        context, attention = self.sdpa_layer(self.inputs, self.inputs, self.inputs, self.mask)
+        expected_context, expected_attention = self.reference_layer(
+            self.inputs, self.inputs, self.inputs, self.mask)
+        self.assertIsNone(attention)
+        self.assertTrue(torch.allclose(context, expected_context, atol=1e-5))
+        self.assertEqual(expected_attention.shape, (2, 4, 5, 5))
+        self.assertTrue(torch.all(expected_attention[0, :, :, 3:] == 0))
+
+        _, attention = self.sdpa_layer(self.inputs, self.inputs, self.inputs, self.mask,
+                                       need_weights=True)
+        self.assertTrue(torch.allclose(attention, expected_attention))
+
+    def test_unfused_checkpoint(self):
+        state_dict = self.sdpa_layer.state_dict()
+        for param in ("weight", "bias"):
+            for name, tensor in zip("qkv", state_dict.pop("fc_qkv." + param).chunk(3)):
+                state_dict["fc_{}.{}".format(name, param)] = tensor
+        layer = MultiHeadAttentionLayer(16, 4, dropout=0.1).eval()
+        layer.load_state_dict(state_dict)
+        self.assertTrue(torch.equal(layer(self.inputs, self.inputs, self.inputs)[0],
+                                    self.sdpa_layer(self.inputs, self.inputs, self.inputs)[0]))
+
+    def test_bf16_autocast(self):
+        layer = EncoderLayer(16, 4, pf_dim=32, dropout=0.1).eval()
+        with torch.no_grad():
+            expected_output = layer(self.inputs, self.mask[:, 0, 0, :])
+            with torch.autocast(device_type="cpu", dtype=torch.bfloat16):
+                output = layer(self.inputs, self.mask[:, 0, 0, :])
+        self.assertEqual(output.dtype, torch.float32)
+        self.assertTrue(torch.allclose(output, expected_output, atol=0.1))
+
+    def test_encoder_layer(self):
+        layer = EncoderLayer(16, 4, pf_dim=32, dropout=0.1).eval()
+        output = layer(self.inputs, self.mask[:, 0, 0, :])
+        self.assertEqual(output.shape, self.inputs.shape)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import torch
+
+from inference import export_weights, load_weights_only_model, read_weights
+from models import load_classifier
+from test.helper import build_tiny_classifier, build_tiny_batch, train_tiny_checkpoint
+
+
+class TestWeights(unittest.TestCase):
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model = build_tiny_classifier(self.tmp_dir)
+        self.batch = build_tiny_batch()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp_dir)
+
+    def test_export_load(self):
+        path = os.path.join(self.tmp_dir, "model.safetensors")
+        export_weights(self.model, path)
+        # pretrained language model is not needed to load the weights
+        shutil.rmtree(self.model.config.language_model_path)
+
+        model = load_weights_only_model(path)
+        self.assertEqual(model.hparams["idx2tag"], self.model.hparams["idx2tag"])
+        self.assertFalse(any(param.is_meta for param in model.parameters()))
+        self.assertIs(model.t5_model.shared.weight, model.t5_model.encoder.embed_tokens.weight)
+        with torch.no_grad():
+            self.assertTrue(torch.equal(model(self.batch), self.model(self.batch)))
+
+    def test_export_trainer_checkpoint(self):
+        checkpoint_model = load_classifier(train_tiny_checkpoint(self.tmp_dir, name="trained")).eval()
+        path = os.path.join(self.tmp_dir, "trained.safetensors")
+        export_weights(checkpoint_model, path)
+
+        model = load_weights_only_model(path)
+        self.assertEqual(model.config.n_epochs, 1)
+        with torch.no_grad():
+            self.assertTrue(torch.equal(model(self.batch), checkpoint_model(self.batch)))
+
+    def test_truncated_or_malformed_file(self):
+        path = os.path.join(self.tmp_dir, "model.safetensors")
+        export_weights(self.model, path)
+        with open(path, "rb") as file:
+            data = file.read()
+        header_size = int.from_bytes(data[:8], "little")
+        for name, broken_data in (("empty", b""), ("header", data[:8 + header_size // 2]),
+                                  ("tensors", data[:-10]),
+                                  ("json", data[:8] + b"{" * header_size + data[8 + header_size:])):
+            with self.subTest(name=name):
+                broken_path = os.path.join(self.tmp_dir, name + ".safetensors")
+                with open(broken_path, "wb") as file:
+                    file.write(broken_data)
+                with self.assertRaises(ValueError):
+                    read_weights(broken_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
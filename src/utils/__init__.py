@@ -4,7 +4,13 @@
         Make the importing much shorter
 """
 
-from .helper import find_max_length_in_list, ignore_pad_index, \
-    convert_index_to_tag, convert_subtoken_to_token, convert_predict_tag,\
-    progress_bar, handle_subtoken_labels, convert_x_label_to_true_label, label_correction, \
-    handle_subtoken_prediction
+from .lazy_import import lazy_import
+
+__getattr__, __dir__, __all__ = lazy_import(__name__, {
+    **dict.fromkeys(["find_max_length_in_list", "ignore_pad_index", "convert_index_to_tag",
+                     "convert_subtoken_to_token", "convert_predict_tag", "progress_bar",
+                     "handle_subtoken_labels", "convert_x_label_to_true_label",
+                     "label_correction", "handle_subtoken_prediction"], ".helper"),
+    **dict.fromkeys(["setup_device", "build_trainer_device_kwargs", "reset_peak_memory",
+                     "peak_memory_mb"], ".device"),
+})
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        utils:
+            device.py
+"""
+
+# ============================ Third Party libs ============================
+import logging
+import os
+import resource
+from typing import List, Optional
+
+import torch
+
+
+def pin_cpu_cores(cpu_cores: List[int]) -> None:
+    """
+    function to pin the current process (and its future threads and workers) to cpu_cores
+
+    Args:
+        cpu_cores: list of cpu core ids
+
+    Returns:
+        None
+
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        logging.warning("Core pinning is not supported on this platform")
+        return
+    os.sched_setaffinity(0, cpu_cores)
+
+
+def set_cpu_threads(num_threads: int = 0, num_interop_threads: int = 0) -> None:
+    """
+    function to set torch intra-op and inter-op thread pool sizes (0 keeps torch default)
+
+    Args:
+        num_threads: number of intra-op threads
+        num_interop_threads: number of inter-op threads
+
+    Returns:
+        None
+
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads and torch.get_num_interop_threads() != num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            # it can only be set once, before any inter-op parallel work
+            logging.warning("Inter-op threads are already in use, keep {}".format(
+                torch.get_num_interop_threads()))
+
+
+def setup_device(device: str, num_threads: int = 0, num_interop_threads: int = 0,
+                 cpu_cores: Optional[List[int]] = None) -> torch.device:
+    """
+    function to check device and set up cpu threads and core pinning. When cores are pinned
+    and num_threads is not set, one intra-op thread is used per pinned core, so several
+    processes on one node do not oversubscribe cores.
+
+    Args:
+        device: "cpu", "cuda" or "cuda:N"
+        num_threads: number of intra-op threads (0 keeps torch default)
+        num_interop_threads: number of inter-op threads (0 keeps torch default)
+        cpu_cores: cpu core ids to pin the process to
+
+    Returns:
+        torch device
+
+    """
+    device = torch.device(device)
+    if device.type == "cuda":
+        if not torch.cuda.is_available():
+            raise Exception("device {} is requested but cuda is not available".format(device))
+        if device.index is not None and device.index >= torch.cuda.device_count():
+            raise Exception("device {} is not available, there are {} cuda devices".format(
+                device, torch.cuda.device_count()))
+    elif device.type != "cpu":
+        raise Exception("device should be cpu or cuda:N, got {}".format(device))
+    if cpu_cores:
+        pin_cpu_cores(cpu_cores)
+        num_threads = num_threads or len(cpu_cores)
+    set_cpu_threads(num_threads, num_interop_threads)
+    logging.debug("Use {} with {} intra-op and {} inter-op threads".format(
+        device, torch.get_num_threads(), torch.get_num_interop_threads()))
+    return device
+
+
+def build_trainer_device_kwargs(device: torch.device, precision: str = "32") -> dict:
+    """
+    function to create pytorch lightning Trainer device and precision arguments
+
+    Args:
+        device: torch device (see setup_device)
+        precision: "32" or "bf16" (bfloat16 autocast, weights stay in fp32)
+
+    Returns:
+        Trainer keyword arguments
+
+    """
+    trainer_kwargs = {"precision": "bf16-mixed" if precision == "bf16" else "32-true"}
+    if device.type == "cuda":
+        trainer_kwargs.update(accelerator="gpu", devices=[device.index or 0])
+    else:
+        trainer_kwargs.update(accelerator="cpu", devices=1)
+    return trainer_kwargs
+
+
+def resident_memory_mb() -> float:
+    """
+    function to get current resident memory of the process in MB. Without /proc (not Linux)
+    it falls back to the peak resident memory of the process.
+
+    Returns:
+        resident memory in MB
+
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        # ru_maxrss is in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def reset_peak_memory(device: torch.device) -> float:
+    """
+    function to start memory measurement of a step. Peak memory statistics of cuda device are
+    reset. The process peak memory of cpu can not be reset, so the current resident memory is
+    returned and peak_memory_mb reports the change from it.
+
+    Args:
+        device: torch device
+
+    Returns:
+        start memory in MB (0 for cuda)
+
+    """
+    if device.type == "cuda":
+        torch.cuda.reset_peak_memory_stats(device)
+        return 0.0
+    return resident_memory_mb()
+
+
+def peak_memory_mb(device: torch.device, start_mb: float = 0.0) -> float:
+    """
+    function to get memory of a step in MB, peak allocated tensor memory since
+    reset_peak_memory for cuda and resident memory change since reset_peak_memory for cpu
+    (memory freed within the step is not seen)
+
+    Args:
+        device: torch device
+        start_mb: start memory returned by reset_peak_memory
+
+    Returns:
+        memory in MB
+
+    """
+    if device.type == "cuda":
+        return torch.cuda.max_memory_allocated(device) / 2 ** 20
+    return resident_memory_mb() - start_mb
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+    Complex NER Project:
+        utils:
+            lazy_import.py
+"""
+
+# ============================ Third Party libs ============================
+import importlib
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_import(package_name: str, name2module: Dict[str, str]) -> \
+        Tuple[Callable, Callable, List[str]]:
+    """
+    function to make the names of a package importable without importing their modules
+    (and their heavy third party libs) until first use
+
+    Args:
+        package_name: __name__ of the package
+        name2module: dictionary of exported name to relative module name (ex: ".helper")
+
+    Returns:
+        __getattr__, __dir__ and __all__ of the package
+
+    """
+    package = importlib.import_module(package_name)
+
+    def __getattr__(name: str):
+        if name not in name2module:
+            raise AttributeError("module {!r} has no attribute {!r}".format(package_name, name))
+        value = getattr(importlib.import_module(name2module[name], package_name), name)
+        # keep it in the package namespace, so __getattr__ is called once per name
+        setattr(package, name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(package)) | set(name2module))
+
+    return __getattr__, __dir__, list(name2module)